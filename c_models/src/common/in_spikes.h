@@ -18,7 +18,14 @@
 
 // Number of iterations to buffer
 // Note: latest test shows there is only enough space for 52 of them
+// With PAGE_RANK_ACC (page_rank_acc build), packets are not kept until their iteration starts:
+//   they are queued in a single buffer as they arrive, with their iteration bits, and the neurons
+//   accumulate them in the slot of their iteration (see neuron_model_page_rank.h).
+#ifdef PAGE_RANK_ACC
+#define N_ITER_BUFFERS  1
+#else
 #define N_ITER_BUFFERS  (1 << ITER_BITS)
+#endif
 
 // Circular array of message buffers, indexed by iteration steps
 static circular_buffer buffers[N_ITER_BUFFERS];
@@ -54,17 +61,19 @@ static inline circular_buffer _get_buffer_for_iter(uint32_t iter_no) {
     return buffers[_iter_to_buff_idx(iter_no)];
 }
 
-// pre-condition: assumes we get a call for each new time step
+// pre-condition: assumes we get a call for each new iteration
 static inline uint32_t in_spikes_increment_iteration_number() {
     circular_buffer buffer = _get_buffer_for_iter(curr_iter);
     log_info("in_spikes_increment_iteration_number [#%u]: enter buff=0x%08x", curr_iter, buffer);
 
+#ifndef PAGE_RANK_ACC
     // Purge current buffer, should already be empty
     uint32_t remaining = circular_buffer_size(buffer);
     if (remaining > 0) {
         log_warning("Dropping #%u messages which were not consumed.", remaining);
     }
     circular_buffer_clear(buffer);
+#endif
 
     // Prepare buffers management parameters for next iteration
     curr_iter++;
@@ -74,6 +83,14 @@ static inline uint32_t in_spikes_increment_iteration_number() {
     return curr_iter;
 }
 
+// Drops the packets buffered for any iteration, and starts over from the first one
+static inline void in_spikes_reset_iteration_number() {
+    for (uint32_t i = 0; i < N_ITER_BUFFERS; i++) {
+        circular_buffer_clear(buffers[i]);
+    }
+    curr_iter = 0;
+}
+
 //
 // Using the buffers
 //
@@ -124,7 +141,12 @@ static inline bool in_spikes_add_key_payload(spike_t key, spike_t _payload) {
               _payload, _payload);
 
     uint32_t iter_no = in_spikes_payload_extract_iter(_payload);
+#ifdef PAGE_RANK_ACC
+    // The iteration bits select the accumulator slot of the neurons
+    spike_t  payload = _payload;
+#else
     spike_t  payload = in_spikes_payload_extract_payload(_payload);
+#endif
     log_debug("in_spikes_add_key_payload [#%u]: iter_no=%d, payload= 0x%08x=>0x%08x", curr_iter,
               iter_no, _payload, payload);
 
@@ -155,9 +177,15 @@ static inline bool in_spikes_get_next_spike(spike_t* spike) {
 }
 
 static inline bool in_spikes_is_next_spike_equal(spike_t spike) {
+#ifdef PAGE_RANK_ACC
+    // Successive packets of a neuron are for distinct iterations, with distinct payloads
+    use(spike);
+    return false;
+#else
     circular_buffer buffer = _get_buffer_for_iter(curr_iter);
     log_debug("in_spikes_is_next_spike_equal [#%u]: buffer=0x%08x", curr_iter, buffer);
     return circular_buffer_advance_if_next_equals(buffer, spike);
+#endif
 }
 
 static inline counter_t in_spikes_get_n_buffer_overflows() {
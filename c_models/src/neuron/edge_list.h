@@ -0,0 +1,117 @@
+#ifndef _EDGE_LIST_H_
+#define _EDGE_LIST_H_
+
+#include <common/neuron-typedefs.h>
+#include <neuron/synapse_row.h>
+#include <sark.h>
+#include <spin1_api.h>
+#include <debug.h>
+
+// Generates the synaptic rows of the indirect matrix from compressed edge lists.
+// See python_models8/connectors/edge_list_codec.py for the formats: the region is
+//   [indirect matrix size | EDGE_LIST_COMPRESSED_MATRIX][n_blocks][blocks...]
+// and each block
+//   [n_words][offset][n_rows][row_length][control][pinned_control]
+//   [varint bytes..., zero padded to a word]
+// with, for each row, its number of targets shifted left by one and or'ed with its pinned flag,
+// its first target and the gaps minus one between consecutive targets.
+
+#define EDGE_LIST_COMPRESSED_MATRIX  0x80000000
+#define EDGE_LIST_N_MATRIX_HEADER_WORDS  2
+#define EDGE_LIST_N_HEADER_WORDS  6
+
+// Words of a row header: plastic region size, #fixed synapses, #plastic control words
+#define EDGE_LIST_N_ROW_HEADER_WORDS  3
+
+typedef struct edge_list_block {
+    uint32_t n_words;
+    uint32_t offset;
+    uint32_t n_rows;
+    uint32_t row_length;
+    uint32_t controls[2];
+    uint32_t stream[];
+} edge_list_block;
+
+static inline uint32_t _edge_list_read_varint(uint8_t **stream) {
+    uint32_t value = 0;
+    uint32_t shift = 0;
+    uint8_t byte;
+
+    do {
+        byte = *(*stream)++;
+        value |= (uint32_t) (byte & 0x7f) << shift;
+        shift += 7;
+    } while (byte & 0x80);
+    return value;
+}
+
+//! \brief Expands a compressed edge list into fixed-length synaptic rows
+//! \param[in] block: the compressed edge list
+//! \param[out] indirect_synapses: the indirect matrix, in which the rows go at the offset of the
+//!                                block
+static inline void edge_list_expand(edge_list_block *block, address_t indirect_synapses) {
+    uint32_t row_words = block->row_length + EDGE_LIST_N_ROW_HEADER_WORDS;
+    uint8_t *stream = (uint8_t *) block->stream;
+    address_t row_address = &indirect_synapses[block->offset >> 2];
+
+    for (uint32_t row = 0; row < block->n_rows; row++, row_address += row_words) {
+        uint32_t row_header = _edge_list_read_varint(&stream);
+        uint32_t row_length = row_header >> 1;
+        uint32_t control = block->controls[row_header & 1];
+
+        row_address[0] = 0;           // No plastic region
+        row_address[1] = row_length;  // #fixed synapses
+        row_address[2] = 0;           // No plastic control words
+
+        uint32_t *synaptic_words = &row_address[EDGE_LIST_N_ROW_HEADER_WORDS];
+        uint32_t target = 0;
+        for (uint32_t i = 0; i < row_length; i++) {
+            target += _edge_list_read_varint(&stream) + (i > 0);
+            *synaptic_words++ = control | target;
+        }
+        for (uint32_t i = row_length; i < block->row_length; i++) {
+            *synaptic_words++ = 0;  // Padding, as written by the host
+        }
+    }
+
+    log_debug("edge_list_expand: %u rows of %u words at offset %u",
+              block->n_rows, row_words, block->offset);
+}
+
+//! \brief Expands a compressed synaptic matrix region in place, into the layout written by
+//!        sPyNNaker: the size of the indirect matrix, its rows and an empty direct matrix
+//! \param[in,out] synaptic_matrix: the synaptic matrix region
+//! \return false if the compressed blocks could not be copied out of the way of the rows
+static inline bool edge_list_expand_matrix(address_t synaptic_matrix) {
+    uint32_t indirect_size = synaptic_matrix[0] & ~EDGE_LIST_COMPRESSED_MATRIX;
+    uint32_t n_blocks = synaptic_matrix[1];
+    address_t blocks = &synaptic_matrix[EDGE_LIST_N_MATRIX_HEADER_WORDS];
+
+    // The rows overwrite the blocks as they grow, so expand from a copy
+    uint32_t n_words = 0;
+    for (uint32_t i = 0; i < n_blocks; i++) {
+        n_words += blocks[n_words];
+    }
+    if (n_words > 0) {
+        uint32_t n_bytes = n_words << 2;
+        address_t copy = (address_t) sark_xalloc(sv->sdram_heap, n_bytes, 0, ALLOC_LOCK);
+        if (copy == NULL) {
+            log_error("Could not allocate %u bytes to expand the synaptic matrix", n_bytes);
+            return false;
+        }
+        spin1_memcpy(copy, blocks, n_bytes);
+
+        for (address_t block = copy; block < &copy[n_words]; block += block[0]) {
+            edge_list_expand((edge_list_block *) block, &synaptic_matrix[1]);
+        }
+        sark_xfree(sv->sdram_heap, copy, ALLOC_LOCK);
+    }
+
+    synaptic_matrix[0] = indirect_size;
+    synaptic_matrix[1 + (indirect_size >> 2)] = 0;  // No direct synapses
+    log_info("edge_list_expand_matrix: %u blocks of %u words expanded to %u bytes",
+             n_blocks, n_words, indirect_size);
+    return true;
+}
+
+#endif // _EDGE_LIST_H_
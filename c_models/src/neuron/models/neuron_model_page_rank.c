@@ -2,10 +2,14 @@
 
 #include <common/maths-util.h>
 #include <debug.h>
-#include <sark.h>
 
 static global_neuron_params_pointer_t global_params;
 
+#ifdef PAGE_RANK_ACC
+// Accumulator slot of the current iteration
+static uint32_t curr_slot = 0;
+#endif
+
 // Checkpoints
 #define READY         0  // When neuron is ready for iteration
 #define SENT_PACKET   1  // When the page rank packet was sent
@@ -22,35 +26,50 @@ void neuron_model_set_global_neuron_params(global_neuron_params_pointer_t params
     global_params = params;
 }
 
+uint32_t neuron_model_get_row_cache_size(void) {
+    return global_params->row_cache_size;
+}
+
+bool neuron_model_is_event_driven(void) {
+    return global_params->event_driven != 0;
+}
+
+#ifdef PAGE_RANK_ACC
+void neuron_model_set_iteration_number(uint32_t iter_no) {
+    curr_slot = iter_no & ACC_SLOT_MASK;
+}
+#endif
+
 
-inline void _finish(neuron_pointer_t neuron) {
-    // Lowers a semaphore associated with the AppID running on this core.
-    sark_app_lower();
+// The iteration barrier is kept by the caller, see neuron.c: functions return whether the neuron
+// just finished its iteration.
+
+inline bool _finish(neuron_pointer_t neuron) {
     CHECKPOINT_SAVE(neuron, FINISHED);
-    log_debug("[idx=   ] neuron_model_state_update: iteration completed (%k)",
-        K(neuron->curr_rank_acc));
+    log_debug("[idx=   ] neuron_model_state_update: iteration completed");
+    return true;
 }
 
-inline void _has_sent_packet(neuron_pointer_t neuron) {
-    // Raises a semaphore associated with the AppID running on this core.
-    sark_app_raise();
+inline bool _has_sent_packet(neuron_pointer_t neuron) {
     CHECKPOINT_SAVE(neuron, SENT_PACKET);
 
     if (!CHECKPOINT_HAS(neuron, FINISHED) && CHECKPOINT_HAS(neuron, RECEIVED_ALL)) {
-        _finish(neuron);
+        return _finish(neuron);
     }
+    return false;
 }
 
-inline void _has_received_all(neuron_pointer_t neuron) {
+inline bool _has_received_all(neuron_pointer_t neuron) {
     CHECKPOINT_SAVE(neuron, RECEIVED_ALL);
 
     if (!CHECKPOINT_HAS(neuron, FINISHED) && CHECKPOINT_HAS(neuron, SENT_PACKET)) {
-        _finish(neuron);
+        return _finish(neuron);
     }
+    return false;
 }
 
 // Triggered when a packet is received
-void neuron_model_receive_packet(input_t key, spike_t payload, neuron_pointer_t neuron) {
+bool neuron_model_receive_packet(input_t key, spike_t payload, neuron_pointer_t neuron) {
 
     // Decode key / payload
     index_t idx = (index_t) key;
@@ -58,23 +77,40 @@ void neuron_model_receive_packet(input_t key, spike_t payload, neuron_pointer_t
         spike_t asSpikeT;
         UFRACT asFract;
     };
+#ifdef PAGE_RANK_ACC
+    // The iteration bits of the payload select the slot, see common/in_spikes.h
+    uint32_t slot = payload & ACC_SLOT_MASK;
+    union payloadDeserializer contrib = { payload & ~ACC_SLOT_MASK };
+    UFRACT *rank_acc = &neuron->curr_rank_acc[slot];
+    uint32_t *rank_count = &neuron->curr_rank_count[slot];
+#else
     union payloadDeserializer contrib = { payload };
+    UFRACT *rank_acc = &neuron->curr_rank_acc;
+    uint32_t *rank_count = &neuron->curr_rank_count;
+#endif
 
     // User signals a packet has arrived
-    UFRACT prev_rank_acc = neuron->curr_rank_acc;
-    uint32_t prev_rank_count = neuron->curr_rank_count;
+    UFRACT prev_rank_acc = *rank_acc;
+    uint32_t prev_rank_count = *rank_count;
 
     // Saved
-    neuron->curr_rank_acc   += contrib.asFract;
-    neuron->curr_rank_count += 1;
+    *rank_acc   += contrib.asFract;
+    *rank_count += 1;
 
     log_debug("[idx=%03u] neuron_model_state_update: %k/%d + %k = %k/%d [exp=%d]", idx,
-        K(prev_rank_acc), prev_rank_count, K(contrib.asFract), K(neuron->curr_rank_acc),
-        neuron->curr_rank_count, neuron->incoming_edges_count);
+        K(prev_rank_acc), prev_rank_count, K(contrib.asFract), K(*rank_acc), *rank_count,
+        neuron->incoming_edges_count);
 
-    if (neuron->curr_rank_count >= neuron->incoming_edges_count) {
-        _has_received_all(neuron);
+#ifdef PAGE_RANK_ACC
+    // Ranks of the next iterations are kept for when they start
+    if (slot != curr_slot) {
+        return false;
+    }
+#endif
+    if (*rank_count >= neuron->incoming_edges_count) {
+        return _has_received_all(neuron);
     }
+    return false;
 }
 
 payload_t neuron_model_get_broadcast_rank(neuron_pointer_t neuron) {
@@ -83,11 +119,10 @@ payload_t neuron_model_get_broadcast_rank(neuron_pointer_t neuron) {
         payload_t asPayloadT;
     };
     union payloadSerializer rank = { neuron->rank };
+    union payloadSerializer reciprocal = { neuron->outgoing_edges_reciprocal };
 
-    // Check we don't divide by 0
-    if (neuron->outgoing_edges_count > 0) {
-        rank.asFract /= neuron->outgoing_edges_count;
-    }
+    // The ARM968 has no divider: rank / out degree as a single truncating 32x32->64 multiply
+    rank.asPayloadT = ((uint64_t) rank.asPayloadT * reciprocal.asPayloadT) >> 32;
     return rank.asPayloadT;
 }
 
@@ -104,32 +139,73 @@ bool neuron_model_should_send_pkt(neuron_pointer_t neuron) {
     return !CHECKPOINT_HAS(neuron, FINISHED) && !CHECKPOINT_HAS(neuron, SENT_PACKET);
 }
 
+bool neuron_model_has_finished(neuron_pointer_t neuron) {
+    return CHECKPOINT_HAS(neuron, FINISHED);
+}
+
+bool neuron_model_expects_packets(neuron_pointer_t neuron) {
+    return neuron->incoming_edges_count > 0;
+}
+
 // Perform operations required to reset the state after a spike
-void neuron_model_will_send_pkt(neuron_pointer_t neuron) {
+bool neuron_model_will_send_pkt(neuron_pointer_t neuron) {
     if (neuron->incoming_edges_count > 0) {
-        _has_sent_packet(neuron);
-    } else {
-        // Else, not expected to receive any packets so iteration is finished for the node
-        CHECKPOINT_SAVE(neuron, FINISHED);
+        return _has_sent_packet(neuron);
     }
+    // Else, not expected to receive any packets so iteration is finished for the node
+    return _finish(neuron);
 }
 
-void neuron_model_iteration_did_finish(neuron_pointer_t neuron) {
+REAL neuron_model_iteration_did_finish(neuron_pointer_t neuron) {
+    union payloadSerializer {
+        UFRACT asFract;
+        REAL asReal;
+    };
+    UFRACT prev_rank = neuron->rank;
+
+#ifdef PAGE_RANK_ACC
+    // The iteration number already moved on, see neuron_model_set_iteration_number
+    uint32_t prev_slot = (curr_slot - 1) & ACC_SLOT_MASK;
+    neuron->rank = global_params->damping_sum
+                 + global_params->damping_factor * neuron->curr_rank_acc[prev_slot];
+    neuron->curr_rank_acc[prev_slot] = 0;
+    neuron->curr_rank_count[prev_slot] = 0;
+    CHECKPOINT_RESET(neuron);
+
+    // All the ranks of the new iteration may have been received already
+    if (neuron->incoming_edges_count > 0
+            && neuron->curr_rank_count[curr_slot] >= neuron->incoming_edges_count) {
+        CHECKPOINT_SAVE(neuron, RECEIVED_ALL);
+    }
+#else
     neuron->rank = global_params->damping_sum
                  + global_params->damping_factor * neuron->curr_rank_acc;
     neuron->curr_rank_acc = 0;
     neuron->curr_rank_count = 0;
     CHECKPOINT_RESET(neuron);
+#endif
+
+    union payloadSerializer delta = {
+        neuron->rank > prev_rank ? neuron->rank - prev_rank : prev_rank - neuron->rank };
+    return delta.asReal;
 }
 
 void neuron_model_print_state_variables(restrict neuron_pointer_t neuron) {
     log_debug("rank            = %k", K(neuron->rank));
+#ifdef PAGE_RANK_ACC
+    for (uint32_t slot = 0; slot < N_ACC_SLOTS; slot++) {
+        log_debug("curr_rank_acc   [%u] = %k", slot, K(neuron->curr_rank_acc[slot]));
+        log_debug("curr_rank_count [%u] = %d", slot, neuron->curr_rank_count[slot]);
+    }
+#else
     log_debug("curr_rank_acc   = %k", K(neuron->curr_rank_acc));
     log_debug("curr_rank_count = %d", neuron->curr_rank_count);
+#endif
     log_debug("iter_state      = 0x%04x", neuron->iter_state);
 }
 
 void neuron_model_print_parameters(restrict neuron_pointer_t neuron) {
     log_debug("incoming_edges_count = %d", neuron->incoming_edges_count);
     log_debug("outgoing_edges_count = %d", neuron->outgoing_edges_count);
+    log_debug("outgoing_edges_reciprocal = %k", K(neuron->outgoing_edges_reciprocal));
 }
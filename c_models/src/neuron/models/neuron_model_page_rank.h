@@ -6,18 +6,35 @@
 
 #define K(n) (n >> 17)
 
+#ifdef PAGE_RANK_ACC
+// Number of iterations ranks are accumulated for, one per iteration number encoded in the lower
+//   bits of the payloads: (1 << ITER_BITS), see common/in_spikes.h
+#define N_ACC_SLOTS     8
+#define ACC_SLOT_MASK   (N_ACC_SLOTS - 1)
+#endif
+
 typedef struct neuron_t {
 
     // Number of edges inbound / leaving that neuron
     uint32_t incoming_edges_count;
     uint32_t outgoing_edges_count;
 
+    // Reciprocal of the out degree, precomputed by the host, 0 if no outgoing edges
+    UFRACT outgoing_edges_reciprocal;
+
     // The current rank of the neuron
     UFRACT rank;
 
+#ifdef PAGE_RANK_ACC
+    // Pending neuron updates: the accumulated / count of ranks received, for the iteration of
+    //   their slot (iteration number modulo N_ACC_SLOTS)
+    UFRACT curr_rank_acc[N_ACC_SLOTS];
+    uint32_t curr_rank_count[N_ACC_SLOTS];
+#else
     // Pending neuron update: the accumulated / count of ranks received.
     UFRACT curr_rank_acc;
     uint32_t curr_rank_count;
+#endif
     uint32_t iter_state;
 
 } neuron_t;
@@ -32,18 +49,49 @@ typedef struct global_neuron_params_t {
     // Time steps since beginning of simulation
     uint32_t machine_time_step;
 
+    // DTCM budget of the synaptic row cache (bytes), 0 disables it, see spike_processing.c
+    uint32_t row_cache_size;
+
+    // Whether cores move on to their next iteration as soon as they finished the current one,
+    //   rather than at the next timer tick, see neuron.c
+    uint32_t event_driven;
+
+    // Whether the iterations start over when the parameters are reloaded: set by the host, which
+    //   rewrites the parameters after a reset, and cleared when they are stored, see neuron.c
+    uint32_t restart;
+
 } global_neuron_params_t;
 
 
-void neuron_model_receive_packet(input_t key, spike_t payload, neuron_pointer_t neuron);
+//! \return whether the neuron finished its iteration with this packet
+bool neuron_model_receive_packet(input_t key, spike_t payload, neuron_pointer_t neuron);
+
+#ifdef PAGE_RANK_ACC
+//! \brief Sets the number of the iteration of the core, before its neurons finish the previous one
+void neuron_model_set_iteration_number(uint32_t iter_no);
+#endif
+
+//! \return the DTCM budget of the synaptic row cache (bytes), from the global parameters
+uint32_t neuron_model_get_row_cache_size(void);
+
+//! \return whether iterations are event driven, from the global parameters
+bool neuron_model_is_event_driven(void);
 
 REAL neuron_model_get_rank_as_real(neuron_pointer_t neuron);
 payload_t neuron_model_get_broadcast_rank(neuron_pointer_t neuron);
 
 bool neuron_model_should_send_pkt(neuron_pointer_t neuron);
-void neuron_model_will_send_pkt(neuron_pointer_t neuron);
+bool neuron_model_has_finished(neuron_pointer_t neuron);
+
+//! \return whether the neuron waits for packets to finish its iterations
+bool neuron_model_expects_packets(neuron_pointer_t neuron);
+
+//! \return whether the neuron finished its iteration by sending its packet
+bool neuron_model_will_send_pkt(neuron_pointer_t neuron);
 
-void neuron_model_iteration_did_finish(neuron_pointer_t neuron);
+//! \brief Updates the rank of the neuron with the ranks received during the iteration
+//! \return the absolute change of the rank, as a REAL holding the raw UFRACT bits
+REAL neuron_model_iteration_did_finish(neuron_pointer_t neuron);
 
 
 #endif // _NEURON_MODEL_PAGE_RANK_H_
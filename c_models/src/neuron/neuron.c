@@ -12,15 +12,20 @@
 #include <common/out_spikes.h>
 #include <common/maths-util.h>
 #include <recording.h>
+#include <bit_field.h>
 #include <debug.h>
 #include <string.h>
-#include <sark.h>
 
 // declare spin1_wfi
 void spin1_wfi();
 
 #define SPIKE_RECORDING_CHANNEL 0
 #define RANK_RECORDING_CHANNEL 1
+#define DELTA_RECORDING_CHANNEL 2  // gsyn_exc: |rank change| of the iteration finished, if any
+
+// Priority of the callback starting the next iteration in event driven mode: the one of the timer
+//   tick in sPyNNaker's c_main.c, such that neither preempts the other
+#define ITERATION_CALLBACK_PRIORITY 2
 
 //! Array of neuron states
 static neuron_pointer_t neuron_array;
@@ -38,6 +43,27 @@ static bool use_key;
 //! The number of neurons on the core
 static uint32_t n_neurons;
 
+//! Iteration barrier of the core: the neurons which finished their iteration, and the number of
+//! those which did not. Both are only updated with interrupts disabled.
+static bit_field_t finished_neurons;
+static uint32_t finished_neurons_size;
+static uint32_t n_unfinished_neurons;
+
+//! Event driven mode: the core starts its next iteration as soon as its neurons finished the
+//! current one, rather than at the next timer tick. Cores whose neurons do not wait for packets
+//! still only move on at timer ticks, not to race ahead of the others.
+static bool event_driven;
+static bool expects_packets;
+
+//! Whether the callback starting the next iteration is queued, and whether an iteration started
+//! since the rank changes were last recorded
+static bool iteration_queued = false;
+static bool iteration_started = false;
+
+//! Number of the current iteration, and time step of the last timer tick
+static uint32_t iteration_number = 0;
+static timer_t current_time = 0;
+
 //! The recording flags
 static uint32_t recording_flags;
 
@@ -48,6 +74,14 @@ static synapse_param_t *neuron_synapse_shaping_params;
 static timed_state_t *ranks;
 uint32_t ranks_size;
 
+//! storage for the rank changes of the iteration which finished during the time step, whose sum
+//! over the neurons is the L1 norm used as convergence criterion by the host
+static timed_state_t *deltas;
+
+//! Rank change recorded when the core finished no iteration during the time step, which no
+//! iteration gives: all the bits of the UFRACT set
+#define NO_ITERATION_DELTA 0xFFFFFFFF
+
 //! The number of clock ticks to back off before starting the timer, in an attempt to avoid
 //!   overloading the network
 static uint32_t random_back_off;
@@ -98,6 +132,169 @@ static inline void _print_neuron_parameters() {
 #endif // LOG_LEVEL >= LOG_DEBUG
 }
 
+//! \brief Resets the iteration barrier from the state of the neurons
+static void _reset_barrier() {
+    clear_bit_field(finished_neurons, finished_neurons_size);
+    n_unfinished_neurons = n_neurons;
+    expects_packets = false;
+
+    for (index_t n = 0; n < n_neurons; n++) {
+        if (neuron_model_has_finished(&neuron_array[n])) {
+            bit_field_set(finished_neurons, n);
+            n_unfinished_neurons--;
+        }
+        expects_packets |= neuron_model_expects_packets(&neuron_array[n]);
+    }
+}
+
+static void _iteration_callback(uint unused0, uint unused1);
+
+//! \brief Marks a neuron as having finished its iteration, and in event driven mode, queues the
+//!   start of the next iteration once all the neurons did
+//! \param[in] neuron_index: the index of the neuron
+static inline void _neuron_did_finish(index_t neuron_index) {
+    uint cpsr = spin1_int_disable();
+    if (!bit_field_test(finished_neurons, neuron_index)) {
+        bit_field_set(finished_neurons, neuron_index);
+        n_unfinished_neurons--;
+
+        if (n_unfinished_neurons == 0 && event_driven && expects_packets && !iteration_queued) {
+            iteration_queued = spin1_schedule_callback(
+                _iteration_callback, 0, 0, ITERATION_CALLBACK_PRIORITY);
+        }
+    }
+    spin1_mode_restore(cpsr);
+}
+
+//! \brief Moves the neurons on to their next iteration, once they all finished the current one.
+//!   To be called with interrupts disabled.
+static void _start_iteration() {
+    // Buffer for incoming packets
+    iteration_number = spike_processing_increment_iteration_number();
+#ifdef PAGE_RANK_ACC
+    neuron_model_set_iteration_number(iteration_number);
+#endif
+
+    log_info("=> Iteration #%u will start.", iteration_number);
+
+    // Neuron model
+    for (index_t neuron_index = 0; neuron_index < n_neurons; neuron_index++) {
+        neuron_pointer_t neuron = &neuron_array[neuron_index];
+        deltas->states[neuron_index] = neuron_model_iteration_did_finish(neuron);
+    }
+
+    clear_bit_field(finished_neurons, finished_neurons_size);
+    n_unfinished_neurons = n_neurons;
+    iteration_started = true;
+
+    _print_neurons();
+}
+
+//! \brief Broadcasts the ranks of the neurons which did not send them yet in this iteration, and
+//!   keeps the ranks for recording
+//! \param[in] time: the time step of the last timer tick
+//! \param[in] back_off: whether to wait for the random back off of the core first, rather than
+//!   sending straight away; packets are spaced by time_between_spikes either way
+static void _send_ranks(timer_t time, bool back_off) {
+    if (back_off) {
+        // Wait a random number of clock cycles
+        uint32_t random_back_off_time = tc[T1_COUNT] - random_back_off;
+        while (tc[T1_COUNT] > random_back_off_time) {
+            // Do Nothing
+        }
+    }
+
+    // Set the next expected time to wait for between spike sending
+    expected_time = tc[T1_COUNT] - time_between_spikes;
+
+    // Reset the out spikes before starting
+    out_spikes_reset();
+
+    // update each neuron individually
+    for (index_t neuron_index = 0; neuron_index < n_neurons; neuron_index++) {
+        // Get the parameters for this neuron
+        neuron_pointer_t neuron = &neuron_array[neuron_index];
+
+        // Record the rank at the beginning of the iteration
+        ranks->states[neuron_index] = neuron_model_get_rank_as_real(neuron);
+
+        if (neuron_model_should_send_pkt(neuron)) {
+            // Tell the neuron model
+            if (neuron_model_will_send_pkt(neuron)) {
+                _neuron_did_finish(neuron_index);
+            }
+
+            // Get new rank
+            payload_t broadcast_rank = neuron_model_get_broadcast_rank(neuron);
+
+            // Do any required synapse processing
+            synapse_dynamics_process_post_synaptic_event(time, neuron_index);
+
+            // Record the spike
+            out_spikes_set_spike(neuron_index);
+
+            if (use_key) {
+
+                // Wait until the expected time to send
+                while (tc[T1_COUNT] > expected_time) {
+                    // Do Nothing
+                }
+                expected_time -= time_between_spikes;
+
+                // Send the spike
+                key_t k = key | neuron_index;
+                payload_t p = spike_processing_payload_format(broadcast_rank);
+                log_debug("%16s[t=%04u|#%03d] Sending pkt  0x%08x=%k,0x%08x[sent=%k,0x%08x]",
+                         "", time, neuron_index, k, K(broadcast_rank), broadcast_rank, K(p), p);
+                while (!spin1_send_mc_packet(k, p, WITH_PAYLOAD)) {
+                    log_warning("%16s[t=%04u|#%03d] Sending error...", "", time, neuron_index);
+                    spin1_delay_us(1);
+                }
+            }
+        } else {
+            log_debug("%16s[t=%04u|#%03d] No spike required.", "", time, neuron_index);
+        }
+    }
+}
+
+//! \brief Starts the next iteration in event driven mode, queued by _neuron_did_finish, unless a
+//!   timer tick started it meanwhile
+static void _iteration_callback(uint unused0, uint unused1) {
+    use(unused0);
+    use(unused1);
+
+    // The rank changes may still be being recorded
+    while (n_recordings_outstanding > 0) {
+        spin1_wfi();
+    }
+
+    uint cpsr = spin1_int_disable();
+    iteration_queued = false;
+    bool start = n_unfinished_neurons == 0;
+    if (start) {
+        _start_iteration();
+    }
+    spin1_mode_restore(cpsr);
+
+    if (start) {
+        _send_ranks(current_time, false);
+    }
+}
+
+//! \brief Starts the iterations over, once the host rewrote the state of the neurons after a
+//!   reset: the counters and the packets buffered belong to the previous run
+static void _restart_iterations() {
+    uint cpsr = spin1_int_disable();
+    iteration_number = 0;
+    spike_processing_reset_iteration_number();
+#ifdef PAGE_RANK_ACC
+    neuron_model_set_iteration_number(iteration_number);
+#endif
+    iteration_queued = false;
+    iteration_started = false;
+    spin1_mode_restore(cpsr);
+}
+
 //! \brief does the memory copy for the neuron parameters
 //! \param[in] address: the address where the neuron parameters are stored
 //! in SDRAM
@@ -113,6 +310,10 @@ bool _neuron_load_neuron_parameters(address_t address){
     memcpy(neuron_array, &address[next], n_neurons * sizeof(neuron_t));
 
     neuron_model_set_global_neuron_params(global_parameters);
+    event_driven = neuron_model_is_event_driven();
+
+    // The state of the neurons may have been reset
+    _reset_barrier();
 
     return true;
 }
@@ -127,6 +328,11 @@ bool neuron_reload_neuron_parameters(address_t address) {
         return false;
     }
 
+    if (global_parameters->restart) {
+        log_info("restarting from iteration #0");
+        _restart_iterations();
+    }
+
     // for debug purposes, print the neuron parameters
     _print_neuron_parameters();
     return true;
@@ -189,6 +395,14 @@ bool neuron_initialise(address_t address, uint32_t recording_flags_param,
         }
     }
 
+    // Allocate DTCM for the iteration barrier
+    finished_neurons_size = get_bit_field_size(n_neurons);
+    finished_neurons = (bit_field_t) spin1_malloc(finished_neurons_size * sizeof(uint32_t));
+    if (finished_neurons == NULL) {
+        log_error("Unable to allocate iteration barrier - Out of DTCM");
+        return false;
+    }
+
     // Load the data into the allocated DTCM spaces.
     if (!_neuron_load_neuron_parameters(address)){
         return false;
@@ -203,6 +417,11 @@ bool neuron_initialise(address_t address, uint32_t recording_flags_param,
 
     ranks_size = sizeof(uint32_t) + sizeof(state_t) * n_neurons;
     ranks = (timed_state_t *) spin1_malloc(ranks_size);
+    deltas = (timed_state_t *) spin1_malloc(ranks_size);
+    if (ranks == NULL || deltas == NULL) {
+        log_error("Unable to allocate recording buffers - Out of DTCM");
+        return false;
+    }
 
     _print_neuron_parameters();
 
@@ -216,12 +435,20 @@ void neuron_store_neuron_parameters(address_t address){
 
     uint32_t next = START_OF_GLOBAL_PARAMETERS;
 
+    // Resuming without a reset carries on the iterations
+    global_parameters->restart = 0;
+
     log_info("writing neuron global parameters");
     memcpy(&address[next], global_parameters, sizeof(global_neuron_params_t));
     next += sizeof(global_neuron_params_t) / 4;
 
     log_info("writing neuron local parameters");
     memcpy(&address[next], neuron_array, n_neurons * sizeof(neuron_t));
+
+    // sPyNNaker's provenance region has no room for them: reported with the rest of the IOBUF
+    log_info("row cache: %u hits, %u misses", spike_processing_get_row_cache_hits(),
+        spike_processing_get_row_cache_misses());
+    log_info("iterations: %u in %u time steps", iteration_number, current_time);
 }
 
 //! \setter for the internal input buffers
@@ -240,91 +467,41 @@ void neuron_do_timestep_update(timer_t time) {
 
     log_info("\n\n===== TIME STEP = %u =====", time);
 
+    // Wait until recordings have completed, to ensure the recording space can be re-written
+    while (n_recordings_outstanding > 0) {
+        spin1_wfi();
+    }
+
     // Disable interrupts to avoid possible concurrent access
     uint cpsr = spin1_int_disable();
+    current_time = time;
 
-    // Check if all neurons have completed their iteration
+    // Check if all neurons have completed their iteration: in event driven mode, _iteration_callback
+    // usually started it already, but on cores whose neurons do not wait for packets
     // Note: important to skip first iteration otherwise ranks will be erased
-    if (0 < time && sark_app_sema() == 0) {
-        // Buffer for incoming packets
-        uint32_t iter_no = spike_processing_increment_iteration_number();
-
-        log_info("=> Iteration #%u will start.", iter_no);
-
-        // Neuron model
-        for (index_t neuron_index = 0; neuron_index < n_neurons; neuron_index++) {
-            neuron_pointer_t neuron = &neuron_array[neuron_index];
-            neuron_model_iteration_did_finish(neuron);
-        }
-
-        _print_neurons();
+    if (0 < time && n_unfinished_neurons == 0) {
+        _start_iteration();
     } else {
-        log_info("=> Iteration ongoing (%d).", sark_app_sema());
+        log_info("=> Iteration ongoing (%u).", n_unfinished_neurons);
+
+        // Keep the changes of the iterations started since the last time step, in event driven mode,
+        // otherwise tell the host the core did not iterate, so that it does not take a stall for
+        // the convergence
+        if (!iteration_started) {
+            union {
+                uint32_t asBits;
+                REAL asReal;
+            } no_iteration = { .asBits = NO_ITERATION_DELTA };
+            for (index_t neuron_index = 0; neuron_index < n_neurons; neuron_index++) {
+                deltas->states[neuron_index] = no_iteration.asReal;
+            }
+        }
     }
 
     // Re-enable interrupts
     spin1_mode_restore(cpsr);
 
-    // Wait a random number of clock cycles
-    uint32_t random_back_off_time = tc[T1_COUNT] - random_back_off;
-    while (tc[T1_COUNT] > random_back_off_time) {
-        // Do Nothing
-    }
-
-    // Set the next expected time to wait for between spike sending
-    expected_time = tc[T1_COUNT] - time_between_spikes;
-
-    // Wait until recordings have completed, to ensure the recording space can be re-written
-    while (n_recordings_outstanding > 0) {
-        spin1_wfi();
-    }
-
-    // Reset the out spikes before starting
-    out_spikes_reset();
-
-    // update each neuron individually
-    for (index_t neuron_index = 0; neuron_index < n_neurons; neuron_index++) {
-        // Get the parameters for this neuron
-        neuron_pointer_t neuron = &neuron_array[neuron_index];
-
-        // Record the rank at the beginning of the iteration
-        ranks->states[neuron_index] = neuron_model_get_rank_as_real(neuron);
-
-        if (neuron_model_should_send_pkt(neuron)) {
-            // Tell the neuron model
-            neuron_model_will_send_pkt(neuron);
-
-            // Get new rank
-            payload_t broadcast_rank = neuron_model_get_broadcast_rank(neuron);
-
-            // Do any required synapse processing
-            synapse_dynamics_process_post_synaptic_event(time, neuron_index);
-
-            // Record the spike
-            out_spikes_set_spike(neuron_index);
-
-            if (use_key) {
-
-                // Wait until the expected time to send
-                while (tc[T1_COUNT] > expected_time) {
-                    // Do Nothing
-                }
-                expected_time -= time_between_spikes;
-
-                // Send the spike
-                key_t k = key | neuron_index;
-                payload_t p = spike_processing_payload_format(broadcast_rank);
-                log_debug("%16s[t=%04u|#%03d] Sending pkt  0x%08x=%k,0x%08x[sent=%k,0x%08x]",
-                         "", time, neuron_index, k, K(broadcast_rank), broadcast_rank, K(p), p);
-                while (!spin1_send_mc_packet(k, p, WITH_PAYLOAD)) {
-                    log_warning("%16s[t=%04u|#%03d] Sending error...", "", time, neuron_index);
-                    spin1_delay_us(1);
-                }
-            }
-        } else {
-            log_debug("%16s[t=%04u|#%03d] No spike required.", "", time, neuron_index);
-        }
-    }
+    _send_ranks(time, true);
 
     // Disable interrupts to avoid possible concurrent access
     cpsr = spin1_int_disable();
@@ -336,6 +513,13 @@ void neuron_do_timestep_update(timer_t time) {
         recording_record_and_notify(
             RANK_RECORDING_CHANNEL, ranks, ranks_size, recording_done_callback);
     }
+    if (recording_is_channel_enabled(recording_flags, DELTA_RECORDING_CHANNEL)) {
+        n_recordings_outstanding += 1;
+        deltas->time = time;
+        recording_record_and_notify(
+            DELTA_RECORDING_CHANNEL, deltas, ranks_size, recording_done_callback);
+    }
+    iteration_started = false;
 
     // do logging stuff if required
     out_spikes_print();
@@ -354,5 +538,7 @@ void neuron_do_timestep_update(timer_t time) {
 
 void update_neuron_payload(uint32_t neuron_index, spike_t payload) {
     neuron_pointer_t neuron = &neuron_array[neuron_index];
-    neuron_model_receive_packet(neuron_index, payload, neuron);
+    if (neuron_model_receive_packet(neuron_index, payload, neuron)) {
+        _neuron_did_finish(neuron_index);
+    }
 }
\ No newline at end of file
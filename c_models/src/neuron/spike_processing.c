@@ -48,6 +48,24 @@ static spike_t spike_pkt_payload;
 
 static uint32_t single_fixed_synapse[4];
 
+// Cache of the synaptic rows pinned by the host (see MyConnector): a row is copied to DTCM the
+//   first time it is fetched from SDRAM, then processed without a DMA. Every source sends once per
+//   iteration, in no particular order: a cache evicting rows (e.g. LRU) smaller than the rows of
+//   all sources would evict each row before its next use, so pinned rows are never evicted.
+// Note: a spike key is expected to lead to a single row, as with the single projection of Page Rank
+typedef struct row_cache_entry {
+    spike_t key;
+    uint32_t *row;
+} row_cache_entry;
+
+// Entries sorted by key, from the start of the cache, and rows from its end down, NULL if disabled
+static row_cache_entry *row_cache_entries;
+static uint32_t row_cache_n_entries;
+static uint32_t *row_cache_rows;
+
+static uint32_t row_cache_hits;
+static uint32_t row_cache_misses;
+
 /* PRIVATE FUNCTIONS - static for inlining */
 
 static inline bool _add_key_payload(uint key, uint payload) {
@@ -68,6 +86,73 @@ static inline bool _get_key_payload() {
     return true;
 }
 
+//! \return the index of the first entry of the row cache whose key is not less than key
+static inline uint32_t _row_cache_search(spike_t key) {
+    uint32_t lo = 0;
+    uint32_t hi = row_cache_n_entries;
+    while (lo < hi) {
+        uint32_t mid = (lo + hi) >> 1;
+        if (row_cache_entries[mid].key < key) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo;
+}
+
+//! \return the cached row of the spike key, or NULL if not cached
+static inline uint32_t *_row_cache_lookup(spike_t key) {
+    if (row_cache_entries == NULL) {
+        return NULL;
+    }
+
+    uint32_t i = _row_cache_search(key);
+    if (i < row_cache_n_entries && row_cache_entries[i].key == key) {
+        row_cache_hits++;
+        return row_cache_entries[i].row;
+    }
+    row_cache_misses++;
+    return NULL;
+}
+
+//! \brief Copies a row fetched from SDRAM to the cache, if pinned by the host and if it fits
+static inline void _row_cache_insert(spike_t key, synaptic_row_t row) {
+    if (row_cache_entries == NULL) {
+        return;
+    }
+
+    // The host pins rows by giving their synapses a non-zero weight, which Page Rank ignores
+    address_t fixed_region = synapse_row_fixed_region(row);
+    uint32_t *synaptic_words = synapse_row_fixed_weight_controls(fixed_region);
+    uint32_t n_synapses = synapse_row_num_fixed_synapses(fixed_region);
+    if (n_synapses == 0 || synapse_row_sparse_weight(synaptic_words[0]) == 0) {
+        return;
+    }
+
+    // Only the words used by the row, rows being padded to the longest of their matrix
+    uint32_t n_words = (synaptic_words + n_synapses) - row;
+    uint32_t *cached_row = row_cache_rows - n_words;
+    if ((uint32_t *) &row_cache_entries[row_cache_n_entries + 1] > cached_row) {
+        return;
+    }
+
+    // Fetched twice before being cached, e.g. by both DMA buffers
+    uint32_t i = _row_cache_search(key);
+    if (i < row_cache_n_entries && row_cache_entries[i].key == key) {
+        return;
+    }
+
+    for (uint32_t j = row_cache_n_entries; j > i; j--) {
+        row_cache_entries[j] = row_cache_entries[j - 1];
+    }
+    spin1_memcpy(cached_row, row, n_words * sizeof(uint32_t));
+    row_cache_entries[i].key = key;
+    row_cache_entries[i].row = cached_row;
+    row_cache_n_entries++;
+    row_cache_rows = cached_row;
+}
+
 static inline void _do_dma_read(address_t row_address, size_t n_bytes_to_transfer) {
     log_debug("_do_dma_read: row_address[0]=%u | n_bytes_to_transfer=%u",
         ((uint32_t) row_address[0]), n_bytes_to_transfer);
@@ -124,8 +209,13 @@ static inline void _setup_synaptic_dma_read() {
             log_debug("Checking for row for spike %08x=%3.3k", spike_pkt_key,
                 (UFRACT) spike_pkt_payload);
 
+            // The row is in DTCM already
+            uint32_t *cached_row = _row_cache_lookup(spike_pkt_key);
+            if (cached_row != NULL) {
+                synapses_process_synaptic_row_page_rank(cached_row, spike_pkt_payload);
+
             // Decode spike to get address of destination synaptic row
-            if (population_table_get_first_address(
+            } else if (population_table_get_first_address(
                     spike_pkt_key, &row_address, &n_bytes_to_transfer)) {
 
                 // This is a direct row to process
@@ -203,6 +293,9 @@ void _dma_complete_callback(uint unused, uint tag) {
     uint32_t current_buffer_index = buffer_being_read;
     dma_buffer *current_buffer = &dma_buffers[current_buffer_index];
 
+    // Cache the row first, for the next spikes of the same key
+    _row_cache_insert(current_buffer->originating_spike_key, current_buffer->row);
+
     // Start the next DMA transfer, so it is complete when we are finished
     _setup_synaptic_dma_read();
 
@@ -259,6 +352,23 @@ bool spike_processing_initialise(
     buffer_being_read = N_DMA_BUFFERS;
     max_n_words = row_max_n_words;
 
+    // Allocate the row cache, whose size is a global neuron parameter: the neurons are initialised
+    // first, see c_main.c
+    uint32_t row_cache_size = neuron_model_get_row_cache_size() & ~0x3;
+    row_cache_entries = NULL;
+    row_cache_n_entries = 0;
+    row_cache_hits = 0;
+    row_cache_misses = 0;
+    if (row_cache_size > 0) {
+        row_cache_entries = (row_cache_entry *) spin1_malloc(row_cache_size);
+        if (row_cache_entries == NULL) {
+            log_error("Could not allocate the row cache of %u bytes", row_cache_size);
+            return false;
+        }
+        row_cache_rows = (uint32_t *) row_cache_entries + (row_cache_size >> 2);
+        log_info("Row cache of %u bytes allocated at 0x%08x", row_cache_size, row_cache_entries);
+    }
+
     // Allocate incoming spike buffer
     // TODO: re-compute this
     if (!in_spikes_initialize_spike_buffer(incoming_spike_buffer_size)) {
@@ -284,6 +394,16 @@ uint32_t spike_processing_get_buffer_overflows() {
     return in_spikes_get_n_buffer_overflows();
 }
 
+//! \return the number of spikes whose row was found in the row cache
+uint32_t spike_processing_get_row_cache_hits() {
+    return row_cache_hits;
+}
+
+//! \return the number of spikes whose row was not found in the row cache, if enabled
+uint32_t spike_processing_get_row_cache_misses() {
+    return row_cache_misses;
+}
+
 // Use state from spike_processing, don't inline nor static
 
 //! \brief forwards increment to in_spike
@@ -296,4 +416,9 @@ uint32_t spike_processing_increment_iteration_number(void) {
     return in_spikes_increment_iteration_number();
 }
 
+//! \brief forwards reset to in_spike
+void spike_processing_reset_iteration_number(void) {
+    in_spikes_reset_iteration_number();
+}
+
 
@@ -13,7 +13,16 @@ void spike_processing_finish_write(uint32_t process_id);
 //! \return the number of times the input buffer has overflowed
 uint32_t spike_processing_get_buffer_overflows();
 
+//! \return the number of spikes whose row was found in the row cache
+uint32_t spike_processing_get_row_cache_hits();
+
+//! \return the number of spikes whose row was not found in the row cache, if enabled
+uint32_t spike_processing_get_row_cache_misses();
+
 payload_t spike_processing_payload_format(payload_t payload);
 uint32_t spike_processing_increment_iteration_number(void);
 
+//! \brief Drops the packets buffered, and starts over from the first iteration
+void spike_processing_reset_iteration_number(void);
+
 #endif // _SPIKE_PROCESSING_H_
@@ -1,5 +1,6 @@
 #include "synapses.h"
 #include "neuron.h"
+#include "edge_list.h"
 #include <neuron/synapse_types/synapse_types.h>
 #include <neuron/plasticity/synapse_dynamics.h>
 #include <debug.h>
@@ -67,6 +68,13 @@ bool synapses_initialise(
 
     n_neurons = n_neurons_value;
 
+    // The host ships the rows of MyConnector projections as compressed edge lists: generate them
+    // before the population table looks them up
+    if ((synaptic_matrix_address[0] & EDGE_LIST_COMPRESSED_MATRIX) &&
+            !edge_list_expand_matrix(synaptic_matrix_address)) {
+        return false;
+    }
+
     // Work out the positions of the direct and indirect synaptic matrices and copy the direct
     // matrix to DTCM
 //    uint32_t direct_matrix_offset = (synaptic_matrix_address[0] >> 2) + 1;
@@ -0,0 +1,103 @@
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import sys
+
+import numpy as np
+import tqdm
+
+from examples.page_rank import BACKENDS, PowerIterationFailedConvergence
+from examples.robustness_test import DISTRIBUTIONS, timestep, _mk_sim_run
+
+N_ITER = 50
+FIELDS = [
+    # Sweep point
+    'date', 'backend', 'node_count', 'edge_count', 'distribution', 'damping', 'time_scale_factor',
+    'run',
+    # Measures
+    'graph_time', 'build_time', 'load_time', 'run_time', 'extraction_time', 'iterations',
+    'converged', 'dropped_packets', 'iterations_per_second', 'correct',
+]
+
+
+def _mk_benchmark_run(backend, node_count, edge_count, distribution, damping, time_scale_factor,
+                      run_time, run):
+    result = {
+        'date': datetime.datetime.now().isoformat(),
+        'backend': backend,
+        'node_count': node_count,
+        'edge_count': edge_count,
+        'distribution': distribution,
+        'damping': damping,
+        'time_scale_factor': time_scale_factor,
+        'run': run,
+    }
+    try:
+        is_correct, stats = _mk_sim_run(
+            node_count, edge_count, verify=True, backend=backend, distribution=distribution,
+            damping=damping, run_time=run_time, parameters={'time_scale_factor': time_scale_factor},
+            return_stats=True)
+        result.update(stats)
+        result['correct'] = is_correct
+    except PowerIterationFailedConvergence:
+        # Python Page Rank did not converge, correctness cannot be checked
+        result['correct'] = None
+    return result
+
+
+def _write_results(results, output):
+    with open(output + '.json', 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    with open(output + '.csv', 'w') as f:
+        writer = csv.DictWriter(f, FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def run(node_counts=None, degrees=None, distributions=None, dampings=None, time_scale_factors=None,
+        runs=None, iterations=None, backend=None, output=None):
+    sweep = [
+        (node_count, int(node_count * degree), distribution, damping, time_scale_factor)
+        for node_count, degree, distribution, damping, time_scale_factor in itertools.product(
+            node_counts, degrees, distributions, dampings, time_scale_factors)
+        if node_count <= int(node_count * degree) <= node_count**2
+    ]
+
+    results = []
+    for point, run_no in tqdm.tqdm(list(itertools.product(sweep, range(runs))), desc='Benchmark'):
+        results.append(_mk_benchmark_run(backend, *point, run_time=iterations * timestep,
+                                         run=run_no))
+        # Saved after each run, so that partial sweeps are kept
+        _write_results(results, output)
+
+    errors = sum(1 for r in results if r['correct'] is False)
+    print('Finished benchmark with %d/%d error(s), results in %s.{json,csv}.' %
+          (errors, len(results), output))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark Page Rank simulations against graph sizes and time scale factors')
+    parser.add_argument('-n', '--node-counts', type=int, nargs='+', default=[400, 800, 1600, 3200],
+                        help='# nodes per graph. Default is 400 800 1600 3200.')
+    parser.add_argument('-e', '--degrees', type=float, nargs='+', default=[1.5],
+                        help='# edges per node, |E|/|V|. Default is 1.5.')
+    parser.add_argument('-d', '--distributions', choices=DISTRIBUTIONS, nargs='+',
+                        default=['uniform'], help='Distributions of the in-degrees.')
+    parser.add_argument('-a', '--dampings', type=float, nargs='+', default=[.85],
+                        help='Damping factors. Default is .85.')
+    parser.add_argument('-t', '--time-scale-factors', type=int, nargs='+',
+                        default=[40, 150, 1000, 20000], help='Time scale factors.')
+    parser.add_argument('-r', '--runs', type=int, default=1, help='# runs per point. Default is 1.')
+    parser.add_argument('-i', '--iterations', type=int, default=N_ITER,
+                        help='# time steps simulated. Default is %d.' % N_ITER)
+    parser.add_argument('-b', '--backend', choices=BACKENDS, default='spinnaker',
+                        help='Run on a SpiNNaker board, or on the host emulator (multi-process).')
+    parser.add_argument('-o', '--output', default='benchmark',
+                        help='Results file name, without extension. Default is benchmark.')
+
+    np.random.seed(42)
+    sys.exit(run(**vars(parser.parse_args())))
@@ -0,0 +1,908 @@
+"""Host-side emulator of the Page Rank SpiNNaker model.
+
+Reproduces the semantics of `c_models/src/neuron' on a plain host, with NumPy, to run simulations
+without a SpiNNaker board:
+
+ * `neuron_do_timestep_update': iteration roll-over behind the iteration barrier of the core, rank
+   recording, then broadcast of the ranks, one multicast packet per (neuron, target core);
+ * `neuron_model_receive_packet' / `neuron_model_iteration_did_finish': U0.32 accumulation of the
+   received contributions and rank update, with the truncating arithmetic of the C code;
+ * `common/in_spikes.h': packets are tagged with the iteration number on ITER_BITS bits and queued
+   in one of the N_ITER_BUFFERS circular buffers, which may overflow;
+ * the page_rank_acc build (accumulators=True): packets are queued in a single buffer and processed
+   as they arrive, the neurons accumulating the ranks received in a slot per iteration number;
+ * the row cache of `spike_processing.c' (row_cache_size > 0): the rows of the highest out-degree
+   sources of a core which fit in its budget are pinned, see MyConnector, and processed without a
+   DMA once fetched;
+ * the event driven mode of `neuron.c' (event_driven=True): a core whose neurons wait for packets
+   starts its next iteration as soon as it finished the current one, possibly several times per
+   time step, without waiting for its random back-off.
+
+Neurons are split in slices of MAX_ATOMS_PER_CORE atoms, as many as fit in DTCM, one per core, and
+cores are grouped by CORES_PER_CHIP on chips. Each core moves on to the next iteration once all its
+neurons finished the current one, and processes its incoming packets in order, within a cycle
+budget derived from the time step and the time scale factor: the cycle costs below are estimates,
+hence a cycle-approximate emulation.
+
+The ranks recorded and their changes are returned in the same format as the `v' and `gsyn_exc'
+signals read back from the board.
+PageRankEmulatorMP spreads the cores over several worker processes.
+"""
+import ctypes
+import logging
+import multiprocessing
+
+import numpy as np
+
+from python_models8.neuron.builds import dtcm
+from python_models8.neuron.builds.dtcm import (
+    INCOMING_SPIKE_BUFFER_SIZE, MAX_NEURON_SIZE, N_ROW_HEADER_WORDS)
+from python_models8.neuron.neuron_models.u032 import U032_MAX, get_reciprocals, to_u032
+
+ITER_BITS = 3  # see c_models/src/common/in_spikes.h
+N_ITER_BUFFERS = 1 << ITER_BITS
+ITER_MASK = N_ITER_BUFFERS - 1
+CORES_PER_CHIP = 16
+CPU_CLOCK_MHZ = 200
+
+# Sizes of the `global_neuron_params_t' and `neuron_t' of the C code (bytes), and of the other
+# slots of the `neuron_t' of the page_rank_acc build, see NeuronModelPageRank
+GLOBAL_PARAMETERS_BYTES = 6 * 4
+NEURON_BYTES = 7 * 4
+ACC_SLOTS_BYTES = 2 * 4 * (N_ITER_BUFFERS - 1)
+NO_ITERATION_DELTA = U032_MAX  # rank change of a core which finished no iteration, see neuron.c
+ROW_CACHE_ENTRY_BYTES = 8  # key and address of a cached row, see MyConnector
+
+# Estimated cost (in CPU cycles) of receiving a packet, DMA-ing its synaptic row and processing
+# each of its synapses, of sending a packet and of routing it to its destination.
+PACKET_CYCLES = 300
+ROW_DMA_CYCLES = 100  # part of PACKET_CYCLES saved when the row is cached
+SYNAPSE_CYCLES = 30
+SEND_CYCLES = 100
+ROUTER_CYCLES = 50
+
+_TIME_KEY = 2**44  # Groups absolute cycle counts by core (or buffer) in sorted keys
+
+logger = logging.getLogger(__name__)
+
+
+def get_buffer_capacity(incoming_spike_buffer_size=INCOMING_SPIKE_BUFFER_SIZE):
+    """Capacity of each iteration buffer of a core, in packets: a circular buffer holds one less
+    word than its size, and 2 words per packet.
+
+    :return: int
+    """
+    return (dtcm.get_buffer_words(incoming_spike_buffer_size) - 1) // 2
+
+
+def get_max_atoms_per_core(incoming_spike_buffer_size=INCOMING_SPIKE_BUFFER_SIZE,
+                           accumulators=False, row_cache_size=0, n_neurons=None):
+    """Number of neurons which fit in the DTCM of a core, along with the N_ITER_BUFFERS incoming
+    spike buffers, or the single one of the page_rank_acc build, the row cache and, if n_neurons
+    is given, the master population table of the slices of the population, see
+    PageRankBase.get_max_atoms_per_core.
+
+    :return: int
+    """
+    if accumulators:
+        return dtcm.get_max_atoms_per_core(
+            GLOBAL_PARAMETERS_BYTES, NEURON_BYTES + ACC_SLOTS_BYTES, 1,
+            incoming_spike_buffer_size, row_cache_size, n_neurons)
+    return dtcm.get_max_atoms_per_core(
+        GLOBAL_PARAMETERS_BYTES, NEURON_BYTES, N_ITER_BUFFERS, incoming_spike_buffer_size,
+        row_cache_size, n_neurons)
+
+
+MAX_ATOMS_PER_CORE = get_max_atoms_per_core()
+
+
+def _ranges(starts, lengths):
+    """Concatenates the ranges [starts[i], starts[i] + lengths[i]).
+
+    :return: np.array of int64 indices
+    """
+    ends = np.cumsum(lengths)
+    return np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def _group_starts(groups):
+    """Index of the first element of the group of each element, for sorted `groups'.
+
+    :return: np.array of int64 indices
+    """
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(groups) else groups
+    return np.repeat(starts, np.diff(np.r_[starts, len(groups)]))
+
+
+class _Packets(object):
+    """Multicast packets in flight or waiting in the buffers of the cores, one array per field."""
+
+    __slots__ = (
+        'core',     # Destination core
+        'slot',     # Iteration number modulo N_ITER_BUFFERS, from the bits of the payload
+        'row',      # Synaptic row, i.e. (source neuron, destination core) pair
+        'payload',  # Payload without the iteration bits, a U0.32 rank
+        'arrival',  # Time the packet was received, in cycles since the start
+        'ready',    # Time the packet can be processed from, -1 until triggered
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            default = np.zeros(0, dtype=np.uint64 if name == 'payload' else np.int64)
+            setattr(self, name, fields.get(name, default))
+
+    def __len__(self):
+        return len(self.core)
+
+    def __getitem__(self, idx):
+        return _Packets(**dict((name, getattr(self, name)[idx]) for name in self.__slots__))
+
+    def __add__(self, other):
+        return _Packets(**dict(
+            (name, np.concatenate((getattr(self, name), getattr(other, name))))
+            for name in self.__slots__))
+
+
+class PageRankEmulator(object):
+    """Emulates a population of Page Rank neurons connected by the given edges.
+
+    :param n_neurons: number of vertices
+    :param sources: np.array, source vertex of each edge
+    :param targets: np.array, target vertex of each edge
+    :param damping_factor: float, d
+    :param damping_sum: float, (1 - d) / N
+    :param rank_init: float or np.array, initial rank of the vertices, default is 1/N
+    :param timestep: time step of the simulation (ms)
+    :param time_scale_factor: slow down factor of the simulation
+    :param incoming_spike_buffer_size: size of the buffers of incoming packets (words)
+    :param max_atoms_per_core: number of neurons per core, default is as many as fit in DTCM
+    :param accumulators: whether to emulate the page_rank_acc build
+    :param row_cache_size: DTCM budget of the row cache of each core (bytes), 0 for no cache
+    :param event_driven: whether cores start their next iteration as soon as they finished the
+                         current one, rather than at the next time step
+    :param cores_per_chip: number of cores per chip
+    :param seed: seed for the random back-off of the cores
+    """
+
+    def __init__(self, n_neurons, sources, targets, damping_factor, damping_sum, rank_init=None,
+                 timestep=.1, time_scale_factor=10,
+                 incoming_spike_buffer_size=INCOMING_SPIKE_BUFFER_SIZE,
+                 max_atoms_per_core=None, cores_per_chip=CORES_PER_CHIP, seed=None,
+                 accumulators=False, row_cache_size=0, event_driven=False):
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        max_atoms_per_core = max_atoms_per_core or get_max_atoms_per_core(
+            incoming_spike_buffer_size, accumulators, row_cache_size, n_neurons)
+        if max_atoms_per_core <= 0:
+            raise ValueError("No neuron fits in DTCM next to the buffers, row cache and master "
+                             "population table of a core, for %d neurons." % n_neurons)
+        if max_atoms_per_core > MAX_NEURON_SIZE:
+            raise ValueError("Synaptic words index at most %d neurons per core, not %d." %
+                             (MAX_NEURON_SIZE, max_atoms_per_core))
+
+        # Global parameters
+        self._n_neurons = n_neurons
+        self._timestep = timestep
+        self._damping_factor = to_u032(damping_factor)
+        self._damping_sum = to_u032(damping_sum)
+        tick_us = timestep * 1000. * time_scale_factor
+        self._tick_cycles = int(tick_us * CPU_CLOCK_MHZ)
+
+        # Placement: one core per slice of neurons, cores grouped on chips
+        self._core_of = np.arange(n_neurons, dtype=np.int64) // max_atoms_per_core
+        n_cores = int(self._core_of[-1]) + 1 if n_neurons else 0
+        self._n_chips = (n_cores + cores_per_chip - 1) // cores_per_chip
+
+        # Spreads the packets sent by a core over the first half of the time step (see sPyNNaker's
+        # AbstractPopulationVertex), after a small random back-off
+        n_atoms = np.bincount(self._core_of, minlength=n_cores)
+        time_between_spikes = (tick_us / (2. * n_atoms)).astype(np.int64) * CPU_CLOCK_MHZ
+        self._time_between_spikes = np.maximum(time_between_spikes, SEND_CYCLES)
+        self._back_off = np.random.RandomState(seed).randint(0, n_cores + 1, size=n_cores)
+
+        # Incoming buffers of a core, and accumulator slots of a neuron, see common/in_spikes.h
+        self._accumulators = accumulators
+        self._n_buffers = 1 if accumulators else N_ITER_BUFFERS
+        self._n_slots = N_ITER_BUFFERS if accumulators else 1
+        self._buffer_capacity = get_buffer_capacity(incoming_spike_buffer_size)
+
+        # Synaptic rows: one per (source neuron, target core) pair, sorted by source neuron
+        order = np.lexsort((targets, self._core_of[targets], sources))
+        sources, targets = sources[order], targets[order]
+        row_keys = sources * n_cores + self._core_of[targets]
+        row_starts = np.flatnonzero(np.r_[True, row_keys[1:] != row_keys[:-1]]) \
+            if len(row_keys) else np.zeros(0, dtype=np.int64)
+        self._row_targets = targets
+        self._row_starts = row_starts
+        self._row_lengths = np.diff(np.r_[row_starts, len(targets)])
+        self._row_core = self._core_of[targets[row_starts]]
+        self._row_cycles = PACKET_CYCLES + SYNAPSE_CYCLES * self._row_lengths
+        self._rows_of = np.searchsorted(sources[row_starts], np.arange(n_neurons + 1))
+
+        # Row cache of the cores: pinned rows, cached once fetched, see spike_processing.c
+        self._row_cache_size = row_cache_size
+        self._row_pinned = self._get_pinned_rows(
+            sources[row_starts], np.bincount(sources, minlength=n_neurons))
+        self._row_cached = np.zeros(len(row_starts), dtype=bool)
+
+        # Neurons state, see `neuron_t' in c_models/src/neuron/models/neuron_model_page_rank.h
+        self._incoming = np.bincount(targets, minlength=n_neurons)
+        self._reciprocal = get_reciprocals(np.bincount(sources, minlength=n_neurons))
+        if rank_init is None:
+            rank_init = 1. / n_neurons
+        self._rank = to_u032(np.broadcast_to(rank_init, (n_neurons,))).copy()
+        self._delta = np.zeros(n_neurons, dtype=np.uint64)
+        self._acc = np.zeros((self._n_slots, n_neurons), dtype=np.uint64)
+        self._count = np.zeros((self._n_slots, n_neurons), dtype=np.int64)
+        self._sent = np.zeros(n_neurons, dtype=bool)
+        self._received = np.zeros(n_neurons, dtype=bool)
+        self._finished = np.zeros(n_neurons, dtype=bool)
+
+        # Cores state
+        self._curr_iter = np.zeros(n_cores, dtype=np.int64)
+        self._iterated = np.zeros(n_cores, dtype=bool)  # since the last time step
+        self._free_at = np.zeros(n_cores, dtype=np.int64)
+        self._sent_until = np.zeros(n_cores, dtype=np.int64)
+        self._busy_cycles = np.zeros(n_cores, dtype=np.int64)
+        self._pending = _Packets()
+
+        # Event driven mode, only for the cores whose neurons wait for packets, see neuron.c
+        self._event_driven = event_driven
+        self._expects_packets = np.bincount(
+            self._core_of, weights=self._incoming > 0, minlength=n_cores) > 0
+
+        # Simulation state
+        self._time = 0
+        self._recorded = []
+        self._recorded_deltas = []
+        self._stats = dict.fromkeys(
+            ['packets_sent', 'packets_processed', 'packets_dropped', 'packets_unconsumed',
+             'row_cache_hits', 'row_cache_misses'], 0)
+        self._localize(0, n_cores)
+
+    def _localize(self, first_core, last_core):
+        """Restricts the emulation to a range of cores, the others being emulated elsewhere.
+
+        :return: None
+        """
+        self._cores = slice(first_core, last_core)
+        self._neurons = slice(*np.searchsorted(self._core_of, [first_core, last_core]))
+        self._is_local = np.zeros(len(self._curr_iter), dtype=bool)
+        self._is_local[self._cores] = True
+
+    def _get_pinned_rows(self, row_sources, out_degrees):
+        """Pins the rows of the highest out-degree sources of each core, as long as they fit in
+        its row cache, see MyConnector.
+
+        :return: np.array of bool, whether each row is pinned
+        """
+        pinned = np.zeros(len(row_sources), dtype=bool)
+        if self._row_cache_size <= 0 or len(row_sources) == 0:
+            return pinned
+        order = np.lexsort((row_sources, -out_degrees[row_sources], self._row_core))
+        row_bytes = ROW_CACHE_ENTRY_BYTES + (N_ROW_HEADER_WORDS + self._row_lengths[order]) * 4
+        used = np.cumsum(row_bytes)
+        used -= (used - row_bytes)[_group_starts(self._row_core[order])]
+        pinned[order[used <= self._row_cache_size]] = True
+        return pinned
+
+    #
+    # Private functions, one per phase of a time step
+    #
+
+    def _start_iteration(self, cores, start):
+        """Moves the cores to their next iteration, see `_start_iteration' in neuron.c and
+        `in_spikes_increment_iteration_number'.
+
+        :param start: np.array, time each core starts its iteration
+        :return: None
+        """
+        neurons = np.flatnonzero(cores[self._core_of])
+        slots = self._get_slots(neurons)
+        if not self._accumulators:
+            self._start_buffer(cores, start)
+        self._curr_iter[cores] += 1
+        self._iterated[cores] = True
+
+        # Neuron model, see neuron_model_iteration_did_finish
+        acc = self._acc[slots, neurons]
+        prev_rank = self._rank[neurons].astype(np.int64)
+        self._rank[neurons] = (self._damping_sum + ((self._damping_factor * acc) >> 32)) & U032_MAX
+        self._delta[neurons] = np.abs(self._rank[neurons].astype(np.int64) - prev_rank)
+        self._acc[slots, neurons] = 0
+        self._count[slots, neurons] = 0
+        self._sent[neurons] = False
+        self._received[neurons] = False
+        self._finished[neurons] = False
+
+        # All the ranks of the new iteration may have been received already
+        if self._accumulators:
+            self._received[neurons] = self._has_received_all()[neurons]
+
+    def _start_buffer(self, cores, start):
+        """Moves the cores on to the buffer of their next iteration, see
+        `in_spikes_increment_iteration_number'.
+
+        :return: None
+        """
+        pending = self._pending
+        on_cores = cores[pending.core]
+        curr = on_cores & (pending.slot == (self._curr_iter[pending.core] & ITER_MASK))
+
+        # Purge the buffer of the iteration that finished, should already be empty; the synaptic
+        # processing pipeline keeps on going if it was processing these packets
+        busy = np.zeros(len(cores), dtype=bool)
+        busy[pending.core[curr & (pending.ready >= 0)]] = True
+        if curr.any():
+            logger.debug("Dropping #%d packets which were not consumed.", curr.sum())
+            self._stats['packets_unconsumed'] += int(curr.sum())
+        pending = pending[~curr]
+
+        # Packets received early become processable, once triggered by a new packet if idle
+        nxt = cores[pending.core] & \
+            (pending.slot == ((self._curr_iter[pending.core] + 1) & ITER_MASK))
+        pending.ready[nxt] = np.where(busy[pending.core[nxt]], start[pending.core[nxt]], -1)
+        self._pending = pending
+
+    def _get_slots(self, neurons):
+        """:return: np.array, accumulator slot of the current iteration of the neurons"""
+        return self._curr_iter[self._core_of[neurons]] & (self._n_slots - 1)
+
+    def _has_received_all(self):
+        """:return: np.array of bool, whether each neuron received all the ranks of its current
+                    iteration"""
+        if self._n_slots == 1:
+            count = self._count[0]
+        else:
+            neurons = np.arange(self._n_neurons)
+            count = self._count[self._get_slots(neurons), neurons]
+        return (count >= self._incoming) & (count > 0)
+
+    def _is_processable(self, packets):
+        """Packets processed by their core: those of its current iteration, or all of them with
+        accumulators.
+
+        :return: np.array of bool
+        """
+        if self._accumulators:
+            return np.ones(len(packets), dtype=bool)
+        return packets.slot == (self._curr_iter[packets.core] & ITER_MASK)
+
+    def _send(self, start, back_off=True):
+        """Broadcasts the ranks of the neurons which did not send them yet for this iteration.
+
+        :param start: np.array, time each core starts sending
+        :param back_off: whether the cores wait for their random back-off first
+        :return: _Packets, the packets sent, in order of arrival at each core
+        """
+        neurons = self._neurons
+        senders = np.flatnonzero(~self._finished[neurons] & ~self._sent[neurons]) + neurons.start
+        if len(senders) == 0:
+            return _Packets()
+
+        # Neuron model, see neuron_model_will_send_pkt
+        has_incoming = self._incoming[senders] > 0
+        self._sent[senders[has_incoming]] = True
+        self._finished[senders] |= ~has_incoming | self._received[senders]
+
+        # Rank times the reciprocal of the out degree, with the iteration number in the lower bits,
+        # see neuron_model_get_broadcast_rank
+        rank = (self._rank[senders] * self._reciprocal[senders]) >> np.uint64(32)
+        payload = rank & np.uint64(U032_MAX & ~ITER_MASK)
+        core = self._core_of[senders]
+        slot = self._curr_iter[core] & ITER_MASK
+        k = np.arange(len(senders)) - _group_starts(core)
+        sent_at = start[core] + (k + 1) * self._time_between_spikes[core]
+        if back_off:
+            sent_at += self._back_off[core]
+        np.maximum.at(self._sent_until, core, sent_at)
+
+        # One packet per synaptic row, i.e. per core targeted
+        n_rows = self._rows_of[senders + 1] - self._rows_of[senders]
+        rows = _ranges(self._rows_of[senders], n_rows)
+        packets = _Packets(
+            core=self._row_core[rows],
+            slot=np.repeat(slot, n_rows),
+            row=rows,
+            payload=np.repeat(payload, n_rows),
+            arrival=np.repeat(sent_at, n_rows) + ROUTER_CYCLES,
+            ready=np.full(len(rows), -1, dtype=np.int64))
+        self._stats['packets_sent'] += len(senders)
+
+        return packets[np.argsort(packets.core * _TIME_KEY + packets.arrival)]
+
+    def _schedule(self, core, row, ready):
+        """Computes when the packets are done processing, in order, on each core.
+
+        :param core: np.array, destination core of the packets, sorted, in processing order
+        :param row: np.array, synaptic row of the packets
+        :param ready: np.array, time each packet can be processed from
+        :return: np.array of int64, time each packet is done processing
+        """
+        if len(core) == 0:
+            return np.zeros(0, dtype=np.int64)
+        cycles = self._row_cycles[row]
+        first = _group_starts(core)
+        done = np.cumsum(cycles)
+        done -= (done - cycles)[first]  # cycles spent since the first packet of the core
+        # A packet starts once ready and the packet before it is done: cumulative maximum per core
+        offset = np.cumsum(np.r_[0, core[1:] != core[:-1]]) * (4 * _TIME_KEY)
+        latest = np.maximum.accumulate(ready - (done - cycles) + offset) - offset
+        return done + np.maximum(latest, self._free_at[core])
+
+    def _receive(self, packets, start, end):
+        """Queues the packets received and processes those of the current iteration, in order and
+        within the time step, see spike_processing.c and `neuron_model_receive_packet'.
+
+        :return: None
+        """
+        # Packets received trigger the processing of early packets, see _mcpl_pkt_received_callback
+        triggered = np.full(len(self._curr_iter), -1, dtype=np.int64)
+        core = packets.core
+        first = np.flatnonzero(np.r_[True, core[1:] != core[:-1]]) if len(core) else []
+        triggered[core[first]] = packets.arrival[first]
+        waiting = self._pending.ready < 0
+        self._pending.ready[waiting] = triggered[self._pending.core[waiting]]
+
+        curr = self._is_processable(packets)
+        packets.ready[curr] = packets.arrival[curr]
+
+        # Drop packets overflowing their buffer: packets waiting in the buffer of a core when it
+        # arrives, less those of the current iteration which started processing since
+        pool = self._pending + packets
+        is_new = np.r_[np.zeros(len(self._pending), dtype=bool), np.ones(len(packets), dtype=bool)]
+        queue_idx, done = self._process_order(pool, np.ones(len(pool), dtype=bool))
+        dropped = is_new & self._overflows(pool, queue_idx, done)
+        if dropped.any():
+            # Packets dropped are not processed, which delays the ones after them
+            queue_idx, done = self._process_order(pool, ~dropped)
+
+        # Apply the packets processed within the time step
+        n_dropped = int(dropped.sum())
+        if n_dropped > 0:
+            logger.debug("Dropped #%d packets, buffers full.", n_dropped)
+            self._stats['packets_dropped'] += n_dropped
+        processed_idx = queue_idx[done <= end]
+        processed = pool[processed_idx]
+        if len(processed_idx) > 0:
+            self._deliver(processed)
+            last = np.flatnonzero(np.r_[processed.core[1:] != processed.core[:-1], True])
+            self._free_at[processed.core[last]] = done[done <= end][last]
+            np.add.at(self._busy_cycles, processed.core, self._row_cycles[processed.row])
+            self._stats['packets_processed'] += len(processed_idx)
+            if self._row_cache_size > 0:
+                self._cache_rows(processed.row)
+
+        kept = ~dropped
+        kept[processed_idx] = False
+        self._pending = pool[kept]
+
+    def _process_order(self, pool, accepted):
+        """Orders the processable packets of the current iteration of each core, first in first out.
+
+        :return: (<np.array> indices in pool, <np.array> time each packet is done processing)
+        """
+        curr = accepted & (pool.ready >= 0) & self._is_processable(pool)
+        queue_idx = np.flatnonzero(curr)
+        key = pool.core[queue_idx] * _TIME_KEY + pool.arrival[queue_idx]
+        queue_idx = queue_idx[np.argsort(key, kind='stable')]
+        return queue_idx, self._schedule(
+            pool.core[queue_idx], pool.row[queue_idx], pool.ready[queue_idx])
+
+    def _overflows(self, pool, queue_idx, done):
+        """Finds packets arriving when their buffer is full, counting the packets taken out of the
+        buffer by the time they arrive.
+
+        :return: np.array of bool, whether each packet of the pool overflows its buffer
+        """
+        buffer = pool.core * self._n_buffers + pool.slot % self._n_buffers
+        order = np.argsort(buffer * _TIME_KEY + pool.arrival, kind='stable')
+        core, arrival = pool.core[order], pool.arrival[order]
+        occupancy = np.arange(len(order)) - _group_starts(buffer[order])
+
+        # Packets taken out of the buffer of the current iteration once they start processing,
+        # start times are sorted by core as packets are processed in order
+        started = pool.core[queue_idx] * _TIME_KEY + done - self._row_cycles[pool.row[queue_idx]]
+        curr = self._is_processable(pool)[order]
+        key = core[curr] * _TIME_KEY
+        occupancy[curr] -= np.searchsorted(started, key + arrival[curr], side='left') - \
+            np.searchsorted(started, key, side='left')
+
+        overflows = np.zeros(len(pool), dtype=bool)
+        overflows[order] = occupancy >= self._buffer_capacity
+        return overflows
+
+    def _cache_rows(self, rows):
+        """Counts the row cache hits / misses of the rows processed, and caches the pinned rows
+        fetched, whose packets no longer pay for a DMA, see `_row_cache_insert'.
+
+        :return: None
+        """
+        hits = int(self._row_cached[rows].sum())
+        self._stats['row_cache_hits'] += hits
+        self._stats['row_cache_misses'] += len(rows) - hits
+        fetched = np.unique(rows[self._row_pinned[rows] & ~self._row_cached[rows]])
+        self._row_cached[fetched] = True
+        self._row_cycles[fetched] -= ROW_DMA_CYCLES
+
+    def _deliver(self, packets):
+        """Accumulates the ranks received by the neurons, see `neuron_model_receive_packet'.
+
+        :return: None
+        """
+        rows = packets.row
+        synapses = _ranges(self._row_starts[rows], self._row_lengths[rows])
+        targets = self._row_targets[synapses]
+        slots = np.repeat(packets.slot % self._n_slots, self._row_lengths[rows])
+        flat = slots * self._n_neurons + targets
+        acc, count = self._acc.reshape(-1), self._count.reshape(-1)
+        np.add.at(acc, flat, np.repeat(packets.payload, self._row_lengths[rows]))
+        acc &= U032_MAX
+        count += np.bincount(flat, minlength=len(count))
+
+        received = self._has_received_all()
+        self._received |= received
+        self._finished |= received & self._sent
+
+    def _get_unfinished(self):
+        """Counts the neurons which did not finish their iteration, per core.
+
+        :return: np.array, the value of `n_unfinished_neurons' on each core
+        """
+        unfinished = np.flatnonzero(~self._finished[self._neurons]) + self._neurons.start
+        return np.bincount(self._core_of[unfinished], minlength=len(self._curr_iter))
+
+    def _begin_timestep(self):
+        """First half of a time step on the cores: moves on to the next iteration if possible,
+        records the ranks and broadcasts them, see `neuron_do_timestep_update'.
+
+        :return: _Packets, the packets sent
+        """
+        start = np.full(len(self._curr_iter), self._time * self._tick_cycles, dtype=np.int64)
+
+        # Check if all neurons of a core have completed their iteration
+        # Note: important to skip first iteration otherwise ranks will be erased
+        if self._time > 0:
+            cores = (self._get_unfinished() == 0) & self._is_local
+            if cores.any():
+                self._start_iteration(cores, start)
+
+        # Record the rank at the beginning of the iteration, and the change of the last iteration
+        # started since the last time step, if any
+        delta = self._delta[self._neurons]
+        delta[~self._iterated[self._core_of[self._neurons]]] = NO_ITERATION_DELTA
+        self._iterated[self._cores] = False
+        self._recorded.append(self._rank[self._neurons].astype(np.uint32))
+        self._recorded_deltas.append(delta.astype(np.uint32))
+
+        return self._send(start)
+
+    def _start_event_iterations(self):
+        """Event driven mode: moves the cores which finished their iteration before the end of the
+        time step on to the next one straight away, and broadcasts their ranks, see
+        `_iteration_callback'. The other cores wait for the next time step.
+
+        :return: _Packets, the packets sent
+        """
+        if not self._event_driven:
+            return _Packets()
+        end = (self._time + 1) * self._tick_cycles
+        finished_at = np.maximum(self._free_at, self._sent_until)
+        cores = (self._get_unfinished() == 0) & self._is_local & self._expects_packets & \
+            (finished_at < end)
+        if not cores.any():
+            return _Packets()
+        self._start_iteration(cores, finished_at)
+        return self._send(finished_at, back_off=False)
+
+    def _receive_timestep(self, packets):
+        """Processes the packets the cores received during the time step.
+
+        :param packets: _Packets, sent to these cores, sorted by core and time of arrival
+        :return: None
+        """
+        start = self._time * self._tick_cycles
+        self._receive(packets, start, start + self._tick_cycles)
+
+    def _end_timestep(self, packets):
+        """Second half of a time step on the cores: processes the packets they received, and in
+        event driven mode, those of the iterations they started meanwhile.
+
+        :param packets: _Packets, sent to these cores, sorted by core and time of arrival
+        :return: None
+        """
+        self._receive_timestep(packets)
+        packets = self._start_event_iterations()
+        while len(packets) > 0:
+            self._receive_timestep(packets)
+            packets = self._start_event_iterations()
+        self._time += 1
+
+    def _do_timestep_update(self):
+        """Emulates a time step on all cores, see `neuron_do_timestep_update'.
+
+        :return: None
+        """
+        self._end_timestep(self._begin_timestep())
+
+    #
+    # Exposed functions
+    #
+
+    def run(self, run_time):
+        """Runs the emulation for some more time.
+
+        :param run_time: duration to run for (ms), as for `p.run'
+        :return: None
+        """
+        n_dropped = self._stats['packets_dropped']
+        for _ in range(int(round(run_time / self._timestep))):
+            self._do_timestep_update()
+
+        n_dropped = self._stats['packets_dropped'] - n_dropped
+        if n_dropped > 0:
+            logger.warning("%d packets were dropped as incoming buffers were full: try increasing "
+                           "the time scale factor.", n_dropped)
+
+    def get_ranks(self):
+        """Ranks recorded at every time step, as read back from the board: the raw U0.32 ranks
+        interpreted as S16.15 numbers.
+
+        :return: np.array, (timesteps x neurons)
+        """
+        return self._get_recorded(self._recorded)
+
+    def get_deltas(self):
+        """Absolute rank changes of the iteration which finished at every time step, in the same
+        format as the ranks, as the `gsyn_exc' signal read back from the board: NO_ITERATION_DELTA
+        for the neurons of the cores which finished none.
+
+        :return: np.array, (timesteps x neurons)
+        """
+        return self._get_recorded(self._recorded_deltas)
+
+    def _get_recorded(self, recorded):
+        if not recorded:
+            return np.zeros((0, self._neurons.stop - self._neurons.start))
+        return np.vstack(recorded).view(np.int32) / float(2**15)
+
+    def get_provenance(self):
+        """Summarises the emulation, as the provenance data gathered from the cores.
+
+        :return: dict of counters
+        """
+        curr_iter, busy_cycles = self._curr_iter[self._cores], self._busy_cycles[self._cores]
+        run_seconds = self._time * self._tick_cycles / (CPU_CLOCK_MHZ * 1e6)
+        provenance = dict(self._stats)
+        provenance.update({
+            'time_steps': self._time,
+            'cores': len(curr_iter),
+            'chips': self._n_chips,
+            'iterations_min': int(curr_iter.min()) if len(curr_iter) else 0,
+            'iterations_max': int(curr_iter.max()) if len(curr_iter) else 0,
+            'iterations_per_second': float(curr_iter.min()) / run_seconds
+            if len(curr_iter) and run_seconds > 0 else 0.,
+            'core_usage_max': float(busy_cycles.max()) / max(1, self._time * self._tick_cycles)
+            if len(busy_cycles) else 0.,
+        })
+        return provenance
+
+    def end(self):
+        """Releases the resources of the emulation, as `p.end'.
+
+        :return: None
+        """
+        pass
+
+
+#
+# Multi-process emulation
+#
+
+class _RingBuffer(object):
+    """Ring buffer of multicast packets in shared memory, written by one worker and read by another.
+
+    Packets are stored as (key, payload, time of arrival) triplets, where the key is the synaptic
+    row targeted and the payload holds the iteration number in its lower ITER_BITS bits.
+    """
+
+    def __init__(self, capacity):
+        self._capacity = max(1, int(capacity))
+        self._data = multiprocessing.RawArray(ctypes.c_int64, 3 * self._capacity)
+        self._head = multiprocessing.RawValue(ctypes.c_int64, 0)
+        self._tail = multiprocessing.RawValue(ctypes.c_int64, 0)
+
+    def _view(self):
+        return np.frombuffer(self._data, dtype=np.int64).reshape(3, self._capacity)
+
+    def write(self, packets):
+        n = len(packets)
+        if self._head.value + n - self._tail.value > self._capacity:
+            raise RuntimeError("Ring buffer overflow, %d packets do not fit." % n)
+        idx = (self._head.value + np.arange(n)) % self._capacity
+        data = self._view()
+        data[0, idx] = packets.row
+        data[1, idx] = packets.payload | packets.slot.astype(np.uint64)
+        data[2, idx] = packets.arrival
+        self._head.value += n
+
+    def read(self, row_core):
+        idx = np.arange(self._tail.value, self._head.value) % self._capacity
+        key, payload, arrival = self._view()[:, idx]
+        self._tail.value = self._head.value
+        payload = payload.astype(np.uint64)
+        return _Packets(
+            core=row_core[key],
+            slot=(payload & np.uint64(ITER_MASK)).astype(np.int64),
+            row=key,
+            payload=payload & np.uint64(U032_MAX & ~ITER_MASK),
+            arrival=arrival,
+            ready=np.full(len(key), -1, dtype=np.int64))
+
+
+def _emulate_cores(emulator, worker, worker_of_core, rings, conn):
+    """Worker process emulating a range of cores, driven time step by time step by the parent.
+
+    In event driven mode, the packets of the iterations started during a time step are exchanged
+    in rounds of `receive' then `send' commands, until no core starts any more iterations.
+
+    :return: None
+    """
+    n_workers = len(rings)
+    cores = np.flatnonzero(worker_of_core == worker)
+    emulator._localize(cores[0], cores[-1] + 1)
+    local, sent = None, None
+
+    def _send(packets):
+        dest = worker_of_core[packets.core]
+        for other in range(n_workers):
+            if other != worker:
+                rings[worker][other].write(packets[dest == other])
+        return packets[dest == worker]
+
+    while True:
+        command, arg = conn.recv()
+        if command == 'begin':
+            local = _send(emulator._begin_timestep())
+            conn.send(None)
+        elif command == 'receive':
+            for other in range(n_workers):
+                if other != worker:
+                    local += rings[other][worker].read(emulator._row_core)
+            local = local[np.argsort(local.core * _TIME_KEY + local.arrival, kind='stable')]
+            emulator._receive_timestep(local)
+            sent = emulator._start_event_iterations()
+            conn.send(len(sent))
+        elif command == 'send':
+            local = _send(sent)
+            conn.send(None)
+        elif command == 'end':
+            emulator._time += 1
+            conn.send(None)
+        elif command == 'ranks':
+            conn.send(emulator.get_ranks())
+        elif command == 'deltas':
+            conn.send(emulator.get_deltas())
+        elif command == 'provenance':
+            conn.send(emulator.get_provenance())
+        else:
+            conn.close()
+            return
+
+
+class PageRankEmulatorMP(object):
+    """Emulates a population of Page Rank neurons over several worker processes.
+
+    Each worker emulates a contiguous range of the cores (i.e. of slices of atoms), and packets sent
+    between workers go through shared-memory ring buffers, the parent process driving the workers
+    time step by time step. Same parameters as PageRankEmulator, and:
+
+    :param n_workers: number of worker processes, default is the number of host CPUs
+    """
+
+    def __init__(self, n_neurons, sources, targets, damping_factor, damping_sum, n_workers=None,
+                 **kwargs):
+        emulator = PageRankEmulator(
+            n_neurons, sources, targets, damping_factor, damping_sum, **kwargs)
+        self._timestep = emulator._timestep
+        self._n_cores = len(emulator._curr_iter)
+        self._n_chips = emulator._n_chips
+
+        # Balance the synapses processed by each worker
+        n_workers = min(n_workers or multiprocessing.cpu_count(), max(1, self._n_cores))
+        synapses = np.bincount(emulator._row_core, weights=emulator._row_lengths,
+                               minlength=self._n_cores)
+        load = np.cumsum(synapses + 1)
+        worker_of_core = np.minimum(
+            (n_workers * (load - synapses - 1)) // load[-1], n_workers - 1).astype(np.int64) \
+            if self._n_cores else np.zeros(0, dtype=np.int64)
+        n_workers = len(np.unique(worker_of_core))
+        worker_of_core = np.unique(worker_of_core, return_inverse=True)[1]
+
+        # Ring buffers large enough for all rows between two workers, as each neuron sends at most
+        # one packet per row and round, and buffers are emptied at every round
+        row_source = np.repeat(np.arange(n_neurons), np.diff(emulator._rows_of))
+        from_worker = worker_of_core[emulator._core_of[row_source]]
+        to_worker = worker_of_core[emulator._row_core]
+        capacity = np.bincount(from_worker * n_workers + to_worker, minlength=n_workers**2)
+        rings = [[_RingBuffer(capacity[i * n_workers + j]) for j in range(n_workers)]
+                 for i in range(n_workers)]
+
+        self._conns, self._workers = [], []
+        for worker in range(n_workers):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_emulate_cores, args=(emulator, worker, worker_of_core, rings, child_conn))
+            process.daemon = True
+            process.start()
+            self._conns.append(parent_conn)
+            self._workers.append(process)
+
+    def _broadcast(self, command, arg=None):
+        for conn in self._conns:
+            conn.send((command, arg))
+        return [conn.recv() for conn in self._conns]
+
+    #
+    # Exposed functions
+    #
+
+    def run(self, run_time):
+        """Runs the emulation for some more time.
+
+        :param run_time: duration to run for (ms), as for `p.run'
+        :return: None
+        """
+        n_dropped = self.get_provenance()['packets_dropped']
+        for _ in range(int(round(run_time / self._timestep))):
+            self._broadcast('begin')
+            while sum(self._broadcast('receive')) > 0:
+                self._broadcast('send')
+            self._broadcast('end')
+
+        n_dropped = self.get_provenance()['packets_dropped'] - n_dropped
+        if n_dropped > 0:
+            logger.warning("%d packets were dropped as incoming buffers were full: try increasing "
+                           "the time scale factor.", n_dropped)
+
+    def get_ranks(self):
+        """Ranks recorded at every time step, see PageRankEmulator.get_ranks.
+
+        :return: np.array, (timesteps x neurons)
+        """
+        return np.hstack(self._broadcast('ranks'))
+
+    def get_deltas(self):
+        """Rank changes recorded at every time step, see PageRankEmulator.get_deltas.
+
+        :return: np.array, (timesteps x neurons)
+        """
+        return np.hstack(self._broadcast('deltas'))
+
+    def get_provenance(self):
+        """Summarises the emulation, as the provenance data gathered from the cores.
+
+        :return: dict of counters
+        """
+        workers = self._broadcast('provenance')
+        provenance = dict((key, sum(p[key] for p in workers)) for key in workers[0])
+        provenance.update({
+            'time_steps': workers[0]['time_steps'],
+            'chips': self._n_chips,
+            'iterations_min': min(p['iterations_min'] for p in workers),
+            'iterations_max': max(p['iterations_max'] for p in workers),
+            'iterations_per_second': min(p['iterations_per_second'] for p in workers),
+            'core_usage_max': max(p['core_usage_max'] for p in workers),
+        })
+        return provenance
+
+    def end(self):
+        """Stops the worker processes, as `p.end'.
+
+        :return: None
+        """
+        for conn in self._conns:
+            conn.send(('stop', None))
+        for process in self._workers:
+            process.join()
+        self._conns, self._workers = [], []
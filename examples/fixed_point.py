@@ -78,9 +78,21 @@ Note:
     in their outputs. This is a fact of life with any approximation to
     real arithmetic using finite-precision quantities.
 
+The FXarray class extends this to NumPy vectors of fixed-point numbers
+sharing a single FXfamily, applying the FXnum arithmetic elementwise:
+
+>>> fam = FXfamily(32)
+>>> v = FXarray([0.5, 0.25, 3], fam)
+>>> print(v / 3)
+[0.1666666665 0.0833333332 1]
+>>> print((v * v).sum())
+9.3125
+
 SPFPM is provided as-is, with no warranty of any form.
 """
 
+import numpy
+
 
 SPFPM_VERSION = '1.4.4'
 
@@ -283,6 +295,17 @@ class FXbrokenError(FXexception):
 
 
 
+def _defersToArrays(method):
+    """Let FXarray implement binary operations between FXnum and FXarray"""
+    def wrapper(self, other):
+        if isinstance(other, FXarray):
+            return NotImplemented
+        return method(self, other)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
 class FXnum(object):
     """Representation of a binary fixed-point real number."""
 
@@ -356,31 +379,37 @@ class FXnum(object):
         return self
 
     # Arithmetic comparison tests:
+    @_defersToArrays
     def __eq__(self, other):
         """Equality test"""
         other = self._CastOrFail_(other)
         return self.scaledval == other.scaledval and self.family == other.family
 
+    @_defersToArrays
     def __ne__(self, other):
         """Inequality test"""
         other = self._CastOrFail_(other)
         return self.scaledval != other.scaledval
 
+    @_defersToArrays
     def __ge__(self, other):
         """Greater-or-equal test"""
         other = self._CastOrFail_(other)
         return self.scaledval >= other.scaledval
 
+    @_defersToArrays
     def __gt__(self, other):
         """Greater-than test"""
         other = self._CastOrFail_(other)
         return self.scaledval > other.scaledval
 
+    @_defersToArrays
     def __le__(self, other):
         """Less-or-equal test"""
         other = self._CastOrFail_(other)
         return self.scaledval <= other.scaledval
 
+    @_defersToArrays
     def __lt__(self, other):
         """Greater-than test"""
         other = self._CastOrFail_(other)
@@ -395,6 +424,7 @@ class FXnum(object):
         return (self.scaledval != 0)
 
     # Arithmetic combinations:
+    @_defersToArrays
     def __add__(self, other):
         """Add another number"""
         other = self._CastOrFail_(other)
@@ -404,6 +434,7 @@ class FXnum(object):
     def __radd__(self, other):
         return FXnum(other, self.family) + self
 
+    @_defersToArrays
     def __sub__(self, other):
         """Subtract another number"""
         other = self._CastOrFail_(other)
@@ -413,6 +444,7 @@ class FXnum(object):
     def __rsub__(self, other):
         return FXnum(other, self.family) - self
 
+    @_defersToArrays
     def __mul__(self, other):
         """Multiply by another number"""
         other = self._CastOrFail_(other)
@@ -432,6 +464,7 @@ class FXnum(object):
         return FXnum._rawbuild(self.family,
                                (self.scaledval >> shift))
 
+    @_defersToArrays
     def __truediv__(self, other):
         """Divide by another number (without truncation)"""
         other = self._CastOrFail_(other)
@@ -837,4 +870,322 @@ class FXnum(object):
 # ^^^ class FXnum ^^^
 
 
-# vim: set ts=4 sw=4 et:
\ No newline at end of file
+class FXarray(object):
+    """Array of binary fixed-point real numbers within a single FXfamily.
+
+    Scaled values are held in a NumPy int64 buffer, and arithmetic operations
+    apply elementwise with the same rounding and overflow checks as FXnum.
+    Operands may be FXarray or FXnum objects of the same family,
+    or plain numbers and arrays, which are automatically cast into the family.
+    Intermediate results which would not fit within 64 bits are computed
+    in several steps, or with Python integers as a last resort,
+    so results always match those of FXnum;
+    values which cannot be stored in the int64 buffer raise FXoverflowError.
+    """
+
+    __slots__ = ('family', 'scaledval')
+
+    # Stop NumPy from broadcasting its own operators over FXarray objects:
+    __array_priority__ = 1000
+    __array_ufunc__ = None
+    __hash__ = None
+
+    def __init__(self, val=0, family=_defaultFamily, **kwargs):
+        self.family = family
+        try:
+            # Assume that val is similar to FXarray or FXnum:
+            self.scaledval = FXarray._convert(family, val.family,
+                                              numpy.asarray(val.scaledval))
+        except AttributeError:
+            if 'scaled_value' in kwargs:
+                self.scaledval = FXarray._toStorage(kwargs['scaled_value'])
+            else:
+                self.scaledval = FXarray._scale(family, val)
+        FXarray._validate(family, self.scaledval)
+
+    @classmethod
+    def _rawbuild(cls, fam, sv):
+        """Shortcut for creating new FXarray instance, for internal use only."""
+        arr = object.__new__(cls)
+        arr.scaledval = FXarray._toStorage(sv)
+        FXarray._validate(fam, arr.scaledval)
+        arr.family = fam
+        return arr
+
+    @staticmethod
+    def _validate(fam, sv):
+        """Apply the family range checks to the extreme values of sv"""
+        if sv.size:
+            fam.validate(int(sv.max()))
+            fam.validate(int(sv.min()))
+
+    @staticmethod
+    def _toStorage(sv):
+        """Turn array of scaled values into int64, or fail with an overflow"""
+        sv = numpy.asarray(sv)
+        if sv.dtype == numpy.int64:
+            return sv
+        if sv.size and (sv.dtype == object or sv.dtype == numpy.uint64):
+            if max(int(sv.max()), -int(sv.min()) - 1) >= (1 << 63):
+                raise FXoverflowError
+        return sv.astype(numpy.int64)
+
+    @staticmethod
+    def _bits(sv):
+        """Number of bits needed by the largest magnitude within sv"""
+        if isinstance(sv, numpy.ndarray):
+            if not sv.size:
+                return 0
+            return max(int(sv.max()).bit_length(), int(sv.min()).bit_length())
+        return int(sv).bit_length()
+
+    @staticmethod
+    def _scale(fam, val):
+        """Convert plain numbers into scaled values within given family"""
+        val = numpy.asarray(val)
+        if val.dtype.kind in 'iu':
+            if FXarray._bits(val) + fam.fraction_bits >= 63:
+                return FXarray._toStorage(val.astype(object) * fam.scale)
+            return val.astype(numpy.int64) << fam.fraction_bits
+        if val.dtype.kind == 'f':
+            scaled = numpy.trunc(val.astype(numpy.float64) * fam.scale)
+            if scaled.size and numpy.abs(scaled).max() >= 2.0 ** 63:
+                raise FXoverflowError
+            return scaled.astype(numpy.int64)
+        # Anything else, e.g. FXnum objects, is cast one element at a time:
+        return FXarray._toStorage(numpy.vectorize(
+            lambda v: FXnum(v, fam).scaledval, otypes=[object])(val))
+
+    @staticmethod
+    def _convert(fam, other, other_val):
+        """Convert scaled values from different number of fraction-bits"""
+        bit_inc = fam.fraction_bits - other.fraction_bits
+        if bit_inc == 0:
+            return FXarray._toStorage(other_val)
+        elif bit_inc > 0:
+            if FXarray._bits(other_val) + bit_inc >= 63:
+                raise FXoverflowError
+            new_val = other_val.astype(numpy.int64) << bit_inc
+            return new_val | numpy.where(other_val > 0, 1 << (bit_inc - 1),
+                                         (1 << (bit_inc - 1)) - 1)
+        else:
+            return FXarray._toStorage(other_val) >> -bit_inc
+
+    def _CastOrFail_(self, other):
+        """Turn number into scaled values of same family, or check family"""
+        try:
+            # Binary operations must involve members of same family
+            if self.family != other.family:
+                raise FXfamilyError(1)
+            return other.scaledval
+        except AttributeError:
+            # Automatic casting from types other than FXnum/FXarray is allowed:
+            if numpy.ndim(other) == 0:
+                return FXnum(other, self.family).scaledval
+            return FXarray(other, self.family).scaledval
+
+    # Array protocol:
+    def __len__(self):
+        return len(self.scaledval)
+
+    @property
+    def shape(self):
+        return self.scaledval.shape
+
+    @property
+    def size(self):
+        return self.scaledval.size
+
+    def __getitem__(self, idx):
+        sv = self.scaledval[idx]
+        if isinstance(sv, numpy.ndarray):
+            return FXarray._rawbuild(self.family, sv)
+        return FXnum._rawbuild(self.family, int(sv))
+
+    def __setitem__(self, idx, val):
+        sv = self._CastOrFail_(val)
+        FXarray._validate(self.family, numpy.asarray(sv))
+        self.scaledval[idx] = sv
+
+    def __iter__(self):
+        for sv in self.scaledval.flat:
+            yield FXnum._rawbuild(self.family, int(sv))
+
+    def copy(self):
+        return FXarray._rawbuild(self.family, self.scaledval.copy())
+
+    def __repr__(self):
+        """Create unambiguous string representation of self"""
+        return 'FXarray(family={}, scaled_value={})'.format(
+            self.family, self.scaledval.tolist())
+
+    def __str__(self):
+        """Convert numbers (as decimal) into string"""
+        return '[' + ' '.join(str(num) for num in self) + ']'
+
+    def toFloat(self):
+        """Cast to NumPy array of floating-point values"""
+        return self.scaledval / float(self.family.scale)
+
+    # Unary arithmetic operations:
+    def __abs__(self):
+        """Modulus"""
+        return FXarray._rawbuild(self.family, numpy.abs(self.scaledval))
+
+    def __neg__(self):
+        """Change sign"""
+        return FXarray._rawbuild(self.family, -self.scaledval)
+
+    def __pos__(self):
+        """Identity operation"""
+        return self
+
+    # Arithmetic comparison tests, returning arrays of booleans:
+    def __eq__(self, other):
+        """Equality test"""
+        return self.scaledval == self._CastOrFail_(other)
+
+    def __ne__(self, other):
+        """Inequality test"""
+        return self.scaledval != self._CastOrFail_(other)
+
+    def __ge__(self, other):
+        """Greater-or-equal test"""
+        return self.scaledval >= self._CastOrFail_(other)
+
+    def __gt__(self, other):
+        """Greater-than test"""
+        return self.scaledval > self._CastOrFail_(other)
+
+    def __le__(self, other):
+        """Less-or-equal test"""
+        return self.scaledval <= self._CastOrFail_(other)
+
+    def __lt__(self, other):
+        """Less-than test"""
+        return self.scaledval < self._CastOrFail_(other)
+
+    # Arithmetic combinations:
+    def __add__(self, other):
+        """Add another number"""
+        other = self._CastOrFail_(other)
+        if max(FXarray._bits(self.scaledval), FXarray._bits(other)) >= 62:
+            return FXarray._rawbuild(self.family, self.scaledval.astype(object)
+                                     + numpy.asarray(other, dtype=object))
+        return FXarray._rawbuild(self.family, self.scaledval + other)
+
+    def __radd__(self, other):
+        return self + other
+
+    def __sub__(self, other):
+        """Subtract another number"""
+        other = self._CastOrFail_(other)
+        if max(FXarray._bits(self.scaledval), FXarray._bits(other)) >= 62:
+            return FXarray._rawbuild(self.family, self.scaledval.astype(object)
+                                     - numpy.asarray(other, dtype=object))
+        return FXarray._rawbuild(self.family, self.scaledval - other)
+
+    def __rsub__(self, other):
+        return -(self - other)
+
+    def __mul__(self, other):
+        """Multiply by another number"""
+        other = self._CastOrFail_(other)
+        return FXarray._rawbuild(self.family, FXarray._mulScaled(
+            self.scaledval, other, self.family))
+
+    def __rmul__(self, other):
+        return self * other
+
+    @staticmethod
+    def _mulScaled(a, b, fam):
+        """Compute (a * b + roundup) // scale, avoiding int64 overflows"""
+        nbits = fam.fraction_bits
+        abits, bbits = FXarray._bits(a), FXarray._bits(b)
+        if abits + bbits < 62:
+            return (a * b + fam._roundup) >> nbits
+
+        # Split a = ahi * 2^shift + alo, such that partial products fit:
+        shift = abits + bbits - 61
+        if shift <= min(nbits, 61 - bbits):
+            ahi, alo = a >> shift, a & ((1 << shift) - 1)
+            return ((ahi * b + ((alo * b + fam._roundup) >> shift))
+                    >> (nbits - shift))
+
+        return (numpy.asarray(a, dtype=object) * numpy.asarray(b, dtype=object)
+                + fam._roundup) // fam.scale
+
+    def __lshift__(self, shift):
+        if FXarray._bits(self.scaledval) + shift >= 63:
+            raise FXoverflowError
+        return FXarray._rawbuild(self.family, self.scaledval << shift)
+
+    def __rshift__(self, shift):
+        return FXarray._rawbuild(self.family, self.scaledval >> shift)
+
+    def __truediv__(self, other):
+        """Divide by another number (without truncation)"""
+        other = self._CastOrFail_(other)
+        if numpy.any(numpy.asarray(other) == 0):
+            raise ZeroDivisionError('FXarray division by zero')
+        return FXarray._rawbuild(self.family, FXarray._divScaled(
+            self.scaledval, other, self.family))
+    __div__ = __truediv__
+
+    def __rtruediv__(self, other):
+        return FXarray(other, self.family) / self
+    __rdiv__ = __rtruediv__
+
+    @staticmethod
+    def _divScaled(a, b, fam):
+        """Compute (a * scale + roundup) // b, avoiding int64 overflows"""
+        nbits = fam.fraction_bits
+        abits, bbits = FXarray._bits(a), FXarray._bits(b)
+        if abits + nbits < 62:
+            return ((a << nbits) + fam._roundup) // b
+
+        # Long division of the scaled numerator, a few bits at a time:
+        quot, rmdr = a // b, a % b
+        if bbits < 61 and FXarray._bits(quot) + nbits < 62:
+            step = 61 - bbits
+            frac = numpy.zeros(numpy.shape(rmdr), dtype=numpy.int64)
+            remaining = nbits
+            while remaining > 0:
+                nb = min(step, remaining)
+                remaining -= nb
+                # Bring down the next bits of the rounding term:
+                rmdr = ((rmdr << nb)
+                        + ((fam._roundup >> remaining) & ((1 << nb) - 1)))
+                digit = rmdr // b
+                rmdr = rmdr - digit * b
+                frac = (frac << nb) + digit
+            return (quot << nbits) + frac
+
+        return ((numpy.asarray(a, dtype=object) * fam.scale
+                 + fam._roundup) // numpy.asarray(b, dtype=object))
+
+    # Reductions:
+    def sum(self):
+        """Sum of all elements, as FXnum"""
+        sv = self.scaledval
+        if FXarray._bits(sv) + max(sv.size, 1).bit_length() < 63:
+            total = int(sv.sum())
+        else:
+            total = sum(int(v) for v in sv.flat)
+        return FXnum._rawbuild(self.family, total)
+
+    def min(self):
+        """Smallest element, as FXnum"""
+        return FXnum._rawbuild(self.family, int(self.scaledval.min()))
+
+    def max(self):
+        """Largest element, as FXnum"""
+        return FXnum._rawbuild(self.family, int(self.scaledval.max()))
+
+    def mean(self):
+        """Average of all elements, as FXnum"""
+        return self.sum() / self.size
+# ^^^ class FXarray ^^^
+
+
+# vim: set ts=4 sw=4 et:
@@ -0,0 +1,129 @@
+"""Persistent on-disk cache of preprocessed Page Rank graphs.
+
+A graph is keyed by a hash of its edge set, and stored in its own directory as `.npy' files which
+are memory-mapped on load:
+  * edges.npy: (#edges, 2) array of (source, target) vertex ids, sorted by source then target
+  * indptr.npy: CSR row pointers of the edges, by source
+  * matrix_indptr.npy, matrix_indices.npy: CSR arrays of the transition matrix, rows by target
+  * in_degrees.npy, out_degrees.npy: degrees of the vertices
+  * labels.npy: labels of the vertices by id, if not the ids themselves
+  * ranks/<damping>.npy: verified reference ranks, with their iterations in ranks/<damping>.json
+
+    cache = GraphCache()
+    key = sim.cache_graph(cache)  # once
+    sim = PageRankSimulation.from_cache(run_time, cache, key, damping=.9)  # then, warm start
+"""
+import collections
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'page_rank_graphs')
+
+CachedGraph = collections.namedtuple('CachedGraph', [
+    'edges', 'n_vertices', 'indptr', 'matrix_indptr', 'matrix_indices', 'in_degrees',
+    'out_degrees', 'labels'])
+
+
+def _sorted_keys(src, tgt, n_vertices):
+    return np.unique(np.asarray(src, dtype=np.int64) * n_vertices + tgt)
+
+
+class GraphCache(object):
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self._cache_dir = cache_dir
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _path(self, key, *names):
+        return os.path.join(self._cache_dir, key, *names)
+
+    @staticmethod
+    def _damping_name(damping):
+        return repr(float(damping))
+
+    @staticmethod
+    def get_key(src, tgt, n_vertices):
+        """:return: str, hash of the edge set, whatever the order of the edges"""
+        return GraphCache._hash_keys(_sorted_keys(src, tgt, n_vertices), n_vertices)
+
+    @staticmethod
+    def _hash_keys(keys, n_vertices):
+        digest = hashlib.sha1(str(n_vertices).encode('utf-8'))
+        digest.update(np.ascontiguousarray(keys, dtype='<i8').tobytes())
+        return digest.hexdigest()
+
+    def __contains__(self, key):
+        return os.path.isdir(self._path(key))
+
+    def store(self, src, tgt, n_vertices, labels=None):
+        """Preprocesses and stores a graph, unless already cached.
+
+        :param labels: labels of the vertices by id, default is the ids
+        :return: str, key of the graph
+        """
+        keys = _sorted_keys(src, tgt, n_vertices)
+        key = self._hash_keys(keys, n_vertices)
+        if key in self:
+            return key
+
+        src, tgt = keys // n_vertices, keys % n_vertices
+        matrix_order = np.lexsort((src, tgt))
+        arrays = {
+            'edges': np.column_stack((src, tgt)),
+            'indptr': np.searchsorted(src, np.arange(n_vertices + 1)),
+            'matrix_indptr': np.searchsorted(tgt[matrix_order], np.arange(n_vertices + 1)),
+            'matrix_indices': src[matrix_order],
+            'in_degrees': np.bincount(tgt, minlength=n_vertices),
+            'out_degrees': np.bincount(src, minlength=n_vertices),
+        }
+        if labels is not None and not np.array_equal(np.asarray(labels), np.arange(n_vertices)):
+            arrays['labels'] = np.asarray(labels)
+
+        # Written aside then moved, so that concurrent runs never see partial graphs
+        tmp_dir = tempfile.mkdtemp(dir=self._cache_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, name + '.npy'), array)
+        os.makedirs(os.path.join(tmp_dir, 'ranks'))
+        try:
+            os.rename(tmp_dir, self._path(key))
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)  # stored meanwhile
+        return key
+
+    def load(self, key):
+        """:return: CachedGraph, with memory-mapped arrays"""
+        if key not in self:
+            raise KeyError("Graph '%s' not in cache %s." % (key, self._cache_dir))
+
+        def _load(name):
+            path = self._path(key, name + '.npy')
+            return np.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+        n_vertices = len(_load('in_degrees'))
+        labels = _load('labels')
+        return CachedGraph(
+            _load('edges'), n_vertices, _load('indptr'), _load('matrix_indptr'),
+            _load('matrix_indices'), _load('in_degrees'), _load('out_degrees'),
+            range(n_vertices) if labels is None else labels)
+
+    def get_ranks(self, key, damping):
+        """:return: (<np.array> ranks, <int> iterations) verified for damping, or None"""
+        name = self._damping_name(damping)
+        if not os.path.exists(self._path(key, 'ranks', name + '.json')):
+            return None
+        with open(self._path(key, 'ranks', name + '.json')) as f:
+            iterations = json.load(f)['iterations']
+        return np.load(self._path(key, 'ranks', name + '.npy')), iterations
+
+    def store_ranks(self, key, damping, ranks, iterations):
+        name = self._damping_name(damping)
+        np.save(self._path(key, 'ranks', name + '.npy'), ranks)
+        # Written last, as it marks the ranks as stored
+        with open(self._path(key, 'ranks', name + '.json'), 'w') as f:
+            json.dump({'damping': damping, 'iterations': iterations}, f)
@@ -0,0 +1,309 @@
+"""Out-of-core loaders of graphs stored as edge lists.
+
+Supported formats, optionally gzip'ed:
+  * 'edgelist': whitespace separated `source target [...]' lines, as SNAP or KONECT graphs, with
+    `#' or `%' comment lines
+  * 'mtx': Matrix Market coordinate matrices, entry (i, j) being an edge from vertex i to vertex j
+
+Files are read in chunks of bytes which a pool of threads parses, while vertex labels are interned
+to consecutive ids in file order. Edges can be written to disk as they are loaded, so that only
+the labels table and the degree counts are kept in memory.
+
+    graph = load_graph('web-Google.txt.gz')
+    with PageRankSimulation.from_arrays(run_time, graph.src, graph.tgt, graph.n_vertices,
+                                        labels=graph.labels) as sim:
+        ...
+"""
+import argparse
+import collections
+import gzip
+import os
+import shelve
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+FORMATS = ('edgelist', 'mtx')
+COMMENTS = {'edgelist': '#%', 'mtx': '%'}
+CHUNK_BYTES = 2**24
+MAX_LABELS_IN_MEMORY = 10**7  # string labels, past which the table spills to disk
+
+LoadedGraph = collections.namedtuple(
+    'LoadedGraph', ['src', 'tgt', 'n_vertices', 'in_degrees', 'out_degrees', 'labels'])
+
+
+class LabelInterner(object):
+    """Maps vertex labels to consecutive ids, in order of first appearance.
+
+    Integer labels are kept in sorted arrays. String labels are kept in a hash table which spills
+    to a `shelve' file on disk once it holds more than max_in_memory labels, while the labels are
+    appended by id to a temporary file.
+    """
+
+    def __init__(self, max_in_memory=MAX_LABELS_IN_MEMORY, spill_dir=None):
+        self._max_in_memory = max_in_memory
+        self._n_labels = 0
+
+        # Integer labels, sorted, and their ids
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._ids = np.zeros(0, dtype=np.int64)
+
+        # String labels
+        self._table = {}
+        self._tmp_dir = tempfile.mkdtemp(dir=spill_dir)
+        self._spilled = None
+        self._labels_file = None
+
+    def __len__(self):
+        return self._n_labels
+
+    def _spill(self):
+        if self._spilled is None:
+            self._spilled = shelve.open(os.path.join(self._tmp_dir, 'labels'))
+        self._spilled.update(self._table)
+        self._table = {}
+
+    def _intern_numeric(self, labels):
+        keys, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        pos = np.searchsorted(self._keys, keys).clip(0, max(0, len(self._keys) - 1))
+        is_new = np.ones(len(keys), bool) if len(self._keys) == 0 else self._keys[pos] != keys
+
+        # New labels get ids in order of first appearance
+        ids = np.empty(len(keys), dtype=np.int64)
+        ids[~is_new] = self._ids[pos[~is_new]]
+        new = np.flatnonzero(is_new)[np.argsort(first[is_new])]
+        ids[new] = self._n_labels + np.arange(len(new))
+        self._n_labels += len(new)
+
+        order = np.argsort(np.concatenate((self._keys, keys[new])), kind='mergesort')
+        self._keys = np.concatenate((self._keys, keys[new]))[order]
+        self._ids = np.concatenate((self._ids, ids[new]))[order]
+        return ids[inverse.ravel()]
+
+    def _intern_strings(self, labels):
+        keys, first, inverse = np.unique(labels.astype(str), return_index=True,
+                                         return_inverse=True)
+        ids = np.empty(len(keys), dtype=np.int64)
+        new_labels = []
+        for i in np.argsort(first):
+            key = str(keys[i])
+            label_id = self._table.get(key)
+            if label_id is None and self._spilled is not None:
+                label_id = self._spilled.get(key)
+            if label_id is None:
+                label_id = self._n_labels
+                self._n_labels += 1
+                self._table[key] = label_id
+                new_labels.append(key)
+            ids[i] = label_id
+
+        if self._labels_file is None:
+            self._labels_file = open(os.path.join(self._tmp_dir, 'labels.txt'), 'w+')
+        self._labels_file.write(''.join('%s\n' % label for label in new_labels))
+        if len(self._table) > self._max_in_memory:
+            self._spill()
+        return ids[inverse.ravel()]
+
+    def intern(self, labels):
+        """:return: <np.array> ids of the labels, either integers or strings"""
+        labels = np.asarray(labels)
+        if labels.dtype.kind in 'iu':
+            return self._intern_numeric(labels.astype(np.int64))
+        return self._intern_strings(labels)
+
+    def get_labels(self):
+        """:return: labels by id, as a <np.array> of integers or a list of strings"""
+        if self._labels_file is None:
+            labels = np.empty(self._n_labels, dtype=np.int64)
+            labels[self._ids] = self._keys
+            return labels
+        self._labels_file.seek(0)
+        return self._labels_file.read().splitlines()
+
+    def close(self):
+        if self._spilled is not None:
+            self._spilled.close()
+        if self._labels_file is not None:
+            self._labels_file.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+#
+# Parsing
+#
+
+def _open(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+def _guess_format(path):
+    name = path[:-len('.gz')] if path.endswith('.gz') else path
+    return 'mtx' if name.endswith('.mtx') else 'edgelist'
+
+
+def _read_chunks(f, chunk_bytes):
+    """:return: generator of chunks of whole lines"""
+    rest = b''
+    while True:
+        data = f.read(chunk_bytes)
+        if not data:
+            break
+        data = rest + data
+        cut = data.rfind(b'\n') + 1
+        rest = data[cut:]
+        if cut > 0:
+            yield data[:cut]
+    if rest:
+        yield rest
+
+
+def _read_mtx_header(f):
+    """Reads the banner, comments and size line of a Matrix Market file.
+
+    :return: bool, whether the matrix is symmetric
+    """
+    banner = f.readline().decode('utf-8').lower().split()
+    if banner[:3] != ['%%matrixmarket', 'matrix', 'coordinate']:
+        raise ValueError("Unsupported Matrix Market banner '%s'." % ' '.join(banner))
+    line = f.readline()
+    while line.startswith(b'%') or not line.strip():
+        line = f.readline()
+    # `line' is the size line: #rows #columns #entries
+    return len(banner) > 4 and banner[4] in ('symmetric', 'skew-symmetric', 'hermitian')
+
+
+def _parse_chunk(args):
+    """Parses the first 2 columns of the data lines of a chunk.
+
+    :return: (<np.array> sources, <np.array> targets), of integer ids or string labels
+    """
+    chunk, comments, numeric = args
+    text = chunk.decode('utf-8')
+    lines = [line for line in text.splitlines() if line.strip() and line.lstrip()[0] not in comments]
+
+    # Fast path: as many numbers per line, parsed at once
+    if numeric and lines:
+        values = np.fromstring('\n'.join(lines), dtype=np.float64, sep=' ')
+        n_columns = len(lines[0].split())
+        if len(values) == len(lines) * n_columns:
+            values = values.reshape(len(lines), n_columns).astype(np.int64)
+            return values[:, 0], values[:, 1]
+
+    lines = [line.split()[:2] for line in lines]
+    if not lines:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    tokens = np.array(lines, dtype=np.int64 if numeric else object)
+    return tokens[:, 0], tokens[:, 1]
+
+
+def _is_numeric(path, comments):
+    with _open(path) as f:
+        for line in f:
+            line = line.decode('utf-8')
+            if line.strip() and line.lstrip()[0] not in comments:
+                return all(token.lstrip('-').isdigit() for token in line.split()[:2])
+    return True
+
+
+def _add_counts(counts, ids, n_vertices):
+    """:return: <np.array> counts, extended to n_vertices, plus the number of occurrences of ids"""
+    new_counts = np.bincount(ids, minlength=n_vertices)
+    new_counts[:len(counts)] += counts
+    return new_counts
+
+
+def load_graph(path, fmt=None, chunk_bytes=CHUNK_BYTES, n_threads=None, out_dir=None,
+               dedup=True, max_labels_in_memory=MAX_LABELS_IN_MEMORY, spill_dir=None):
+    """Loads a graph from a (gzip'ed) edge list or Matrix Market file, in bounded memory.
+
+    :param fmt: one of FORMATS, default is guessed from the file extension
+    :param n_threads: number of parsing threads, default is the number of CPUs
+    :param out_dir: directory to write edges to, as memory-mapped `src.bin' and `tgt.bin' int64
+                    arrays, default is to keep them in memory
+    :param dedup: whether to remove duplicate edges, which needs them in memory
+    :param max_labels_in_memory: number of string labels past which the table spills to disk
+    :param spill_dir: directory for the spilled labels table, default is the system's
+    :return: LoadedGraph, with source / target ids, in / out degrees and labels by id
+    """
+    fmt = fmt or _guess_format(path)
+    if fmt not in FORMATS:
+        raise ValueError("Unknown graph format '%s', expected one of %s." % (fmt, FORMATS))
+    comments = COMMENTS[fmt]
+    numeric = fmt == 'mtx' or _is_numeric(path, comments)
+
+    interner = LabelInterner(max_labels_in_memory, spill_dir)
+    in_degrees, out_degrees = np.zeros(0, np.int64), np.zeros(0, np.int64)
+    if out_dir is None:
+        src_chunks, tgt_chunks = [np.zeros(0, np.int64)], [np.zeros(0, np.int64)]
+    else:
+        src_file = open(os.path.join(out_dir, 'src.bin'), 'wb')
+        tgt_file = open(os.path.join(out_dir, 'tgt.bin'), 'wb')
+
+    pool = ThreadPool(n_threads)
+    try:
+        with _open(path) as f:
+            symmetric = _read_mtx_header(f) if fmt == 'mtx' else False
+            chunks = ((chunk, comments, numeric) for chunk in _read_chunks(f, chunk_bytes))
+            for src, tgt in pool.imap(_parse_chunk, chunks):
+                if symmetric:
+                    not_diagonal = src != tgt
+                    src, tgt = np.concatenate((src, tgt[not_diagonal])), \
+                        np.concatenate((tgt, src[not_diagonal]))
+
+                # Interleaved, so that ids follow the order of appearance in the file
+                ids = interner.intern(np.column_stack((src, tgt)).ravel())
+                src, tgt = ids[0::2], ids[1::2]
+
+                out_degrees = _add_counts(out_degrees, src, len(interner))
+                in_degrees = _add_counts(in_degrees, tgt, len(interner))
+                if out_dir is None:
+                    src_chunks.append(src)
+                    tgt_chunks.append(tgt)
+                else:
+                    src.tofile(src_file)
+                    tgt.tofile(tgt_file)
+        labels = interner.get_labels()
+    finally:
+        pool.close()
+        interner.close()
+
+    if out_dir is None:
+        src, tgt = np.concatenate(src_chunks), np.concatenate(tgt_chunks)
+    else:
+        src_file.close()
+        tgt_file.close()
+        src = np.memmap(src_file.name, dtype=np.int64, mode='r')
+        tgt = np.memmap(tgt_file.name, dtype=np.int64, mode='r')
+
+    n_vertices = len(labels)
+    if dedup:
+        keys = np.unique(np.asarray(src) * n_vertices + tgt)
+        if len(keys) < len(src):
+            src, tgt = keys // n_vertices, keys % n_vertices
+            out_degrees = np.bincount(src, minlength=n_vertices)
+            in_degrees = np.bincount(tgt, minlength=n_vertices)
+
+    return LoadedGraph(src, tgt, n_vertices, in_degrees, out_degrees, labels)
+
+
+def run(path=None, fmt=None, out_dir=None, threads=None):
+    start = time.time()
+    graph = load_graph(path, fmt, n_threads=threads, out_dir=out_dir)
+    print('Loaded |V|=%d |E|=%d in %.1fs, max in-degree %d, max out-degree %d.' % (
+        graph.n_vertices, len(graph.src), time.time() - start, graph.in_degrees.max(),
+        graph.out_degrees.max()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load a graph from an edge list file')
+    parser.add_argument('path', metavar='PATH', help='Edge list or Matrix Market file, or .gz')
+    parser.add_argument('-f', '--format', dest='fmt', choices=FORMATS,
+                        help='File format. Default is guessed from the extension.')
+    parser.add_argument('-o', '--out-dir', help='Write edges to disk, in this directory')
+    parser.add_argument('-t', '--threads', type=int, help='# parsing threads. Default is #CPUs.')
+
+    sys.exit(run(**vars(parser.parse_args())))
@@ -1,25 +1,36 @@
+import collections
 import logging
 import os
 import sys
+import time
 from contextlib import contextmanager
 
 import matplotlib.pyplot as plt
-import networkx as nx
 import numpy as np
-import spynnaker8 as p
 from prettytable import PrettyTable
+from scipy import sparse
 
-from python_models8.model_data_holders.page_rank_data_holder import PageRankDataHolder as Page_Rank
-from python_models8.synapse_dynamics.synapse_dynamics_noop import SynapseDynamicsNoOp
-from examples.fixed_point import FXfamily
+from examples import emulator, partitioning, rendering
+from examples.emulator import PageRankEmulator, PageRankEmulatorMP
+from examples.fixed_point import FXarray, FXfamily
+from python_models8.neuron.neuron_models.u032 import get_reciprocals
 
 LOG_LEVEL_PAGE_RANK_INFO = logging.INFO + 1
 RANK = 'v'
+DELTA = 'gsyn_exc'  # |rank change| of each neuron at every time step, see neuron.c
 NX_NODE_SIZE = 350
 ITER_BITS = 3  # see c_models/src/common/in_spikes.h
 FLOAT_PRECISION = 5
+EXTRACT_WINDOW = 1024  # time steps (or neurons) decoded at once when extracting ranks
+EARLY_STOP_WINDOW = 10  # time steps run at once when stopping early
+# Rank change recorded by the neurons of a core which finished no iteration in a time step, all the
+# bits set, as decoded by _decode_ranks, see emulator.NO_ITERATION_DELTA
+NO_ITERATION_DELTA = -2.**-32
 TOL = 10**(-FLOAT_PRECISION)
 ANNOTATION = 'Simulated with SpiNNaker_under_version(1!4.0.0-Riptalon)'
+BACKENDS = ('spinnaker', 'emulator', 'emulator-mp')
+MAX_TIME_SCALE_FACTOR = 10**6
+AUTOTUNE_PRECISION = .05  # relative precision of the time scale factor found
 DEFAULT_SPYNNAKER_PARAMS = {
     'timestep': .1,
     'time_scale_factor': 10,
@@ -30,6 +41,10 @@ DEFAULT_SPYNNAKER_PARAMS = {
 
 logger = logging.getLogger(__name__)
 
+# Results of PageRankSimulation.run_batch, per damping factor
+BatchResult = collections.namedtuple(
+    'BatchResult', ['damping', 'is_correct', 'ranks', 'iterations', 'run_stats'])
+
 
 #
 # Utility functions
@@ -39,6 +54,15 @@ def _log_info(*args, **kwargs):
     logging.log(LOG_LEVEL_PAGE_RANK_INFO, *args, **kwargs)
 
 
+class PowerIterationFailedConvergence(Exception):
+    """Raised when the reference Page Rank does not converge, as networkx does."""
+
+    def __init__(self, max_iter):
+        super(PowerIterationFailedConvergence, self).__init__(
+            'power iteration failed to converge within %d iterations' % max_iter)
+        self.max_iter = max_iter
+
+
 def check_sim_ran(func):
     """Raises an error is the simulation was not ran.
 
@@ -60,25 +84,99 @@ def check_sim_ran(func):
 class PageRankSimulation:
 
     def __init__(self, run_time, edges, labels=None, parameters=None, damping=.85,
-                 log_level=logging.INFO, pause=False):
+                 log_level=logging.INFO, pause=False, ranks_file=None, backend='spinnaker',
+                 partition=False, accumulators=False, row_cache_size=0, event_driven=False):
         self._validate_graph_structure(edges, labels, damping)
+        labels = labels or self._gen_labels(edges)
+        self._setup(run_time, self._gen_sim_edges(edges, labels), labels, parameters, damping,
+                    log_level, pause, ranks_file, backend, partition, accumulators,
+                    row_cache_size, event_driven)
+
+    @classmethod
+    def from_arrays(cls, run_time, src, tgt, n_vertices, labels=None, parameters=None, damping=.85,
+                    log_level=logging.INFO, pause=False, ranks_file=None, backend='spinnaker',
+                    partition=False, accumulators=False, row_cache_size=0, event_driven=False):
+        """Creates a simulation from the edges given as arrays of vertex ids.
+
+        Unlike the constructor, edges are neither labelled nor looked up one by one: they are
+        validated with vectorized operations and kept as an array down to the connector.
+
+        :param src: array of the source vertex ids of the edges, in [0, n_vertices)
+        :param tgt: array of the target vertex ids of the edges, in [0, n_vertices)
+        :param n_vertices: number of vertices
+        :param labels: labels of the vertices, by id, default is the ids
+        :param accumulators: whether to run the page_rank_acc build, whose neurons accumulate the
+                             ranks received early rather than buffering them as packets
+        :param row_cache_size: DTCM budget of the synaptic row cache of each core (bytes), which
+                               holds the rows of the highest out-degree sources, 0 for no cache
+        :param event_driven: whether cores start their next iteration as soon as they finished the
+                             current one, rather than at the next time step
+        :return: PageRankSimulation
+        """
+        sim_edges = np.column_stack((src, tgt)).astype(np.int64)
+        cls._validate_graph_arrays(sim_edges, n_vertices, labels, damping)
+
+        sim = cls.__new__(cls)
+        sim._setup(run_time, sim_edges, range(n_vertices) if labels is None else labels,
+                   parameters, damping, log_level, pause, ranks_file, backend, partition,
+                   accumulators, row_cache_size, event_driven)
+        return sim
+
+    @classmethod
+    def from_cache(cls, run_time, graph_cache, key, parameters=None, damping=.85,
+                   log_level=logging.INFO, pause=False, ranks_file=None, backend='spinnaker',
+                   partition=False, accumulators=False, row_cache_size=0, event_driven=False):
+        """Creates a simulation from a graph preprocessed in a cache, see examples/graph_cache.py.
+
+        The graph was validated when cached, and its arrays are memory-mapped rather than loaded.
+
+        :param graph_cache: GraphCache
+        :param key: key of the graph in the cache, as returned by cache_graph
+        :return: PageRankSimulation
+        """
+        cls._validate_damping(damping)
+        graph = graph_cache.load(key)
+
+        sim = cls.__new__(cls)
+        sim._setup(run_time, graph.edges, graph.labels, parameters, damping, log_level, pause,
+                   ranks_file, backend, partition, accumulators, row_cache_size, event_driven)
+        sim._graph_cache, sim._graph_key = graph_cache, key
+        sim._transition_matrix = sparse.csr_matrix(
+            (np.ones(len(graph.matrix_indices), dtype=np.int64), graph.matrix_indices,
+             graph.matrix_indptr), shape=(graph.n_vertices, graph.n_vertices))
+        return sim
+
+    def _setup(self, run_time, sim_edges, labels, parameters, damping, log_level, pause,
+               ranks_file, backend, partition, accumulators, row_cache_size, event_driven):
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend '%s', expected one of %s." % (backend, BACKENDS))
 
         # Simulation parameters
         self._run_time     = run_time
-        self._edges        = edges
-        self._labels       = labels or self._gen_labels(self._edges)
-        self._sim_vertices = self._gen_sim_vertices(self._labels)
-        self._sim_edges    = self._gen_sim_edges(self._edges, self._labels, self._sim_vertices)
-        self._parameters   = DEFAULT_SPYNNAKER_PARAMS
+        self._labels       = labels
+        self._n_vertices   = len(labels)
+        self._sim_edges    = sim_edges  # (#edges, 2) array of (source, target) vertex ids
+        self._parameters   = dict(DEFAULT_SPYNNAKER_PARAMS)
         self._parameters.update(parameters or {})
         self._damping      = damping
         self._pause        = pause
+        self._ranks_file   = ranks_file
+        self._backend      = backend
+        self._accumulators = accumulators
+        self._row_cache_size = row_cache_size
+        self._event_driven = event_driven
 
         # Simulation state variables
         self._model = None
         self._sim_ranks = None
         self._sim_convergence = None
+        self._run_stats = {}
         self._input_graph = None
+        self._transition_matrix = None
+        self._graph_cache = None
+        self._graph_key = None
+        self._rank_init = None  # initial rank of each vertex, if warm started
+        self._time_scale_factors = {}  # minimal safe ones found by autotune, by graph shape
 
         # Numpy printing with some precision and no scientific notation
         np.set_printoptions(suppress=True, precision=FLOAT_PRECISION)
@@ -88,6 +186,17 @@ class PageRankSimulation:
             format='%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
         logger.setLevel(log_level)
 
+        # Model id of each vertex, see examples/partitioning.py
+        self._model_ids = None
+        if partition is True:
+            src, tgt = self._get_sim_edges_arrays()
+            self._model_ids, before, after = partitioning.partition(
+                src, tgt, self._n_vertices, self._get_atoms_per_core())
+            _log_info("Partitioned vertices, traffic per iteration went from %s to %s." %
+                      (before, after))
+        elif partition is not False and partition is not None:
+            self._model_ids = np.asarray(partition, dtype=np.int64)
+
     def __enter__(self):
         return self
 
@@ -95,10 +204,20 @@ class PageRankSimulation:
         if self._pause:
             raw_input('Press any key to finish...')
 
-        if exc_type is None:
-            p.end()  # fails on sPyNNaker runtime error
+        if self._backend != 'spinnaker' or exc_type is None:
+            self._end_model()  # fails on sPyNNaker runtime error
         # else, exception is cascaded if there is one...
 
+    def _end_model(self):
+        if self._model is None:
+            return
+        if self._backend != 'spinnaker':
+            self._model.end()
+        else:
+            import spynnaker8 as p
+            p.end()
+        self._model = None
+
     #
     # Private functions, internal helpers
     #
@@ -114,6 +233,31 @@ class PageRankSimulation:
             if size_diff != 0:
                 raise ValueError("#labels don't match #edges by %d labels." % size_diff)
 
+        PageRankSimulation._validate_damping(damping)
+
+    @staticmethod
+    def _validate_graph_arrays(sim_edges, n_vertices, labels, damping):
+        # Ensure vertex ids are in range
+        if len(sim_edges) > 0 and (sim_edges.min() < 0 or sim_edges.max() >= n_vertices):
+            raise ValueError("graph structure error - vertex ids not in range [0,%d)." % n_vertices)
+
+        # Ensure no duplicate edges
+        size_diff = len(sim_edges) - len(np.unique(sim_edges[:, 0] * n_vertices + sim_edges[:, 1]))
+        if size_diff != 0:
+            raise ValueError("graph structure error - %d duplicate(s) found." % size_diff)
+
+        # Ensure all nodes connected (no dangling nodes)
+        size_diff = np.count_nonzero(np.bincount(sim_edges.ravel(), minlength=n_vertices) == 0)
+        if size_diff != 0:
+            raise ValueError("graph structure error - %d vertices without edges." % size_diff)
+        if labels is not None and len(labels) != n_vertices:
+            raise ValueError("#labels don't match #vertices by %d labels." %
+                             (len(labels) - n_vertices))
+
+        PageRankSimulation._validate_damping(damping)
+
+    @staticmethod
+    def _validate_damping(damping):
         # Ensure damping factor has a valid range
         if not (0 <= damping < 1):
             raise ValueError("Damping factor '%.02f' not in valid range [0,1)." % damping)
@@ -123,13 +267,10 @@ class PageRankSimulation:
         return map(str, set([s for s, _ in edges] + [t for _, t in edges]))
 
     @staticmethod
-    def _gen_sim_vertices(labels):
-        return list(range(len(labels)))
-
-    @staticmethod
-    def _gen_sim_edges(edges, labels, sim_vertices):
-        labels_to_ids = dict(zip(labels, sim_vertices))
-        return [(labels_to_ids[src], labels_to_ids[tgt]) for src, tgt in edges]
+    def _gen_sim_edges(edges, labels):
+        labels_to_ids = dict(zip(labels, range(len(labels))))
+        sim_edges = [labels_to_ids[v] for edge in edges for v in edge]
+        return np.array(sim_edges, dtype=np.int64).reshape(-1, 2)
 
     @staticmethod
     def _node_formatter(name):
@@ -169,13 +310,21 @@ class PageRankSimulation:
 
         :return: p.Population, the neural model to compute Page Rank
         """
+        import spynnaker8 as p
+        if self._accumulators:
+            from python_models8.model_data_holders.page_rank_acc_data_holder import \
+                PageRankAccDataHolder as Page_Rank
+        else:
+            from python_models8.model_data_holders.page_rank_data_holder import \
+                PageRankDataHolder as Page_Rank
+        from python_models8.connectors.my_connector import MyConnector
+        from python_models8.synapse_dynamics.synapse_dynamics_noop import SynapseDynamicsNoOp
+
         # Pre-processing, compute inbound / outbound edges for each node
-        n_neurons = len(self._sim_vertices)
-        outgoing_edges_count = [0] * n_neurons
-        incoming_edges_count = [0] * n_neurons
-        for src, tgt in self._sim_edges:
-            outgoing_edges_count[src] += 1
-            incoming_edges_count[tgt] += 1
+        n_neurons = self._n_vertices
+        src, tgt = self._get_model_edges_arrays()
+        outgoing_edges_count = np.bincount(src, minlength=n_neurons)
+        incoming_edges_count = np.bincount(tgt, minlength=n_neurons)
 
         # Vertices
         pop = p.Population(
@@ -183,7 +332,9 @@ class PageRankSimulation:
             Page_Rank(
                 damping_factor=self._get_damping_factor(),
                 damping_sum=self._get_damping_sum(),
-                rank_init=1./n_neurons,
+                row_cache_size=self._row_cache_size,
+                event_driven=self._event_driven,
+                rank_init=self._get_model_rank_init(),
                 incoming_edges_count=incoming_edges_count,
                 outgoing_edges_count=outgoing_edges_count
             ), label="page_rank"
@@ -192,37 +343,146 @@ class PageRankSimulation:
         # Edges
         p.Projection(
             pop, pop,
-            p.FromListConnector(self._sim_edges),
+            MyConnector(src, tgt, row_cache_size=self._row_cache_size),
             synapse_type=SynapseDynamicsNoOp()
         )
 
         return pop
 
+    def _reset_page_rank_model(self):
+        """Resets the state variables of the loaded model, and sets its damping parameters.
+
+        Only the neuron parameters region is rewritten, which the model reloads when resumed,
+        starting its iterations over (see neuron_reload_neuron_parameters in
+        c_models/src/neuron/neuron.c): the synaptic matrices stay on the machine.
+        """
+        self._model.set(damping_factor=self._get_damping_factor(),
+                        damping_sum=self._get_damping_sum())
+        self._model.initialize(rank=self._get_model_rank_init(), curr_rank_acc=0,
+                               curr_rank_count=0, iter_state=0)
+
+    def _get_model_rank_init(self):
+        """:return: initial rank of each neuron, by model id, or the rank of all of them"""
+        if self._rank_init is None:
+            return 1. / self._n_vertices
+        if self._model_ids is None:
+            return self._rank_init
+        rank_init = np.empty(self._n_vertices, dtype=np.float64)
+        rank_init[self._model_ids] = self._rank_init
+        return rank_init
+
+    def _create_page_rank_emulator(self):
+        """Maps the graph to the host emulator of the SpiNNaker model.
+
+        :return: PageRankEmulator(MP), the emulated neural model to compute Page Rank
+        """
+        src, tgt = self._get_model_edges_arrays()
+        emulator = PageRankEmulatorMP if self._backend == 'emulator-mp' else PageRankEmulator
+        return emulator(
+            self._n_vertices, src, tgt,
+            damping_factor=self._get_damping_factor(),
+            damping_sum=self._get_damping_sum(),
+            rank_init=self._get_model_rank_init(),
+            timestep=self._parameters['timestep'],
+            time_scale_factor=self._parameters['time_scale_factor'],
+            accumulators=self._accumulators,
+            row_cache_size=self._row_cache_size,
+            event_driven=self._event_driven
+        )
+
+    def _get_raw_ranks(self):
+        """Fetches the ranks recorded during the simulation, as encoded by the SpiNNaker model.
+
+        :return: Neo signal, a (timesteps x neurons) array of raw ranks
+        """
+        if self._backend != 'spinnaker':
+            return self._model.get_ranks()
+        return self._model.get_data(RANK).segments[-1].filter(name=RANK)[0]  # of the last run
+
+    def _get_raw_deltas(self):
+        """Fetches the rank changes recorded during the simulation, encoded as the ranks.
+
+        :return: Neo signal, a (timesteps x neurons) array of raw rank changes
+        """
+        if self._backend != 'spinnaker':
+            return self._model.get_deltas()
+        return self._model.get_data(DELTA).segments[-1].filter(name=DELTA)[0]
+
+    def _get_convergence(self):
+        """Finds when the simulation converged, from the rank changes recorded by the model: their
+        sum over the neurons is the l1 norm between the ranks of consecutive time steps. Time
+        steps in which a core finished no iteration, e.g. stalled by dropped packets, are skipped.
+
+        :return: int, first time step whose l1 norm is below N * TOL, or None if none is
+        """
+        raw_deltas = self._get_raw_deltas()
+        N = raw_deltas.shape[1]
+        for rows, window in self._decode_ranks(raw_deltas, EXTRACT_WINDOW):
+            # Errors begin at row #1
+            iterated = ~(window == NO_ITERATION_DELTA).any(axis=1)
+            converged = np.flatnonzero(iterated & (window.sum(axis=1) < N * TOL))
+            converged = converged[converged + rows.start >= 1]
+            if len(converged) > 0:
+                return rows.start + int(converged[0])
+        return None
+
+    @staticmethod
+    def _decode_ranks(raw_ranks, window, by_neuron=False, columns=None):
+        """Decodes raw ranks as floats, one window of the (timesteps x neurons) array at a time.
+
+        :param columns: <np.array> column of each vertex in raw_ranks, default is the identity
+        :return: generator of (<slice> time steps or neurons, <np.array> ranks of the window)
+        """
+        n_rows, n_cols = raw_ranks.shape
+        for lo in range(0, n_cols if by_neuron else n_rows, window):
+            if by_neuron:
+                idx = slice(lo, min(lo + window, n_cols))
+                cols = idx if columns is None else columns[idx]
+                yield idx, np.asarray(raw_ranks[:, cols]) / float(2**17)
+            else:
+                idx = slice(lo, min(lo + window, n_rows))
+                ranks = np.asarray(raw_ranks[idx])
+                if columns is not None:
+                    ranks = ranks[:, columns]
+                yield idx, ranks / float(2**17)
+
     @check_sim_ran
     def _extract_sim_ranks(self):
         """Extracts the rank computed during the simulation.
 
+        Ranks are decoded one time-window at a time up to the convergence, and written either in
+        memory or, if `ranks_file' was given, to a memory-mapped `.npy' file.
+
+        In event driven mode, the ranks of all time steps are kept, see _matches_reference.
+
         :return: (<np.array> ranks, <int> number of iterations to convergence)
         """
         if self._sim_ranks is None:
-            raw_ranks = self._model.get_data(RANK).segments[0].filter(name=RANK)[0]
-            ranks = np.array([[np.float64(cell/2**17) for cell in row] for row in raw_ranks])
-
-            # Compute convergence
-            xlast = ranks[0]
-            N = len(xlast)
-            convergence = len(ranks)
-
-            for it, x in enumerate(ranks[1:]):
-                err = sum([abs(x_i - xlast_i) for x_i, xlast_i in zip(x, xlast)])
-                if err < N * TOL:
-                    convergence = it+1  # since we began at index #1
+            raw_ranks = self._get_raw_ranks()
+            shape = raw_ranks.shape
+            if self._ranks_file is None:
+                ranks = np.empty(shape, dtype=np.float64)
+            else:
+                ranks = np.lib.format.open_memmap(
+                    self._ranks_file, mode='w+', dtype=np.float64, shape=shape)
+
+            convergence = self._get_convergence()
+            if convergence is None:
+                convergence = len(ranks)
+            last = len(ranks) if self._event_driven else convergence
+
+            for rows, window in self._decode_ranks(raw_ranks, EXTRACT_WINDOW,
+                                                   columns=self._model_ids):
+                ranks[rows] = window
+                if rows.stop > last:
                     break
-                xlast = x
 
             # Copy first convergence row to all remaining
-            for i in range(convergence + 1, len(ranks)):
-                ranks[i, :] = ranks[convergence, :]
+            for lo in range(last + 1, len(ranks), EXTRACT_WINDOW):
+                ranks[lo:lo + EXTRACT_WINDOW] = ranks[last]
+
+            if self._ranks_file is not None:
+                ranks.flush()
 
             self._sim_ranks, self._sim_convergence = ranks, convergence
         return self._sim_ranks, self._sim_convergence
@@ -241,78 +501,209 @@ class PageRankSimulation:
 
     def _get_damping_sum(self):
         # Ensures float is can be losslessly encoded in fixed-point
-        return float(self._to_fp((1. - self._damping) / len(self._labels)))
+        return float(self._to_fp((1. - self._damping) / self._n_vertices))
+
+    def _get_sim_edges_arrays(self):
+        """:return: (<np.array> sources, <np.array> targets) of the simulated edges"""
+        return self._sim_edges[:, 0], self._sim_edges[:, 1]
+
+    def _get_model_edges_arrays(self):
+        """:return: (<np.array> sources, <np.array> targets) of the edges, as model neuron ids"""
+        src, tgt = self._get_sim_edges_arrays()
+        if self._model_ids is None:
+            return src, tgt
+        return self._model_ids[src], self._model_ids[tgt]
+
+    def _get_atoms_per_core(self):
+        """:return: int, number of neurons per core, for the build and the row cache of the model"""
+        return emulator.get_max_atoms_per_core(accumulators=self._accumulators,
+                                               row_cache_size=self._row_cache_size,
+                                               n_neurons=self._n_vertices)
+
+    def _get_graph_shape(self):
+        """Summarises the load the graph puts on the cores, from its degrees statistics.
+
+        :return: dict, with the number of vertices / edges, the maximum in / out degrees, and the
+                 maximum number of packets / synapses processed by a core per iteration
+        """
+        src, tgt = self._get_model_edges_arrays()
+        n_neurons = self._n_vertices
+        atoms_per_core = self._get_atoms_per_core()
+        if atoms_per_core <= 0:
+            raise ValueError("No neuron fits on a core, for %d neurons." % n_neurons)
+        core = tgt // atoms_per_core
+        n_cores = -(-n_neurons // atoms_per_core)
+
+        # One packet per (source vertex, target core) pair
+        packets = np.bincount(np.unique(src * n_cores + core) % n_cores, minlength=n_cores)
+        synapses = np.bincount(core, minlength=n_cores)
+        return {
+            'vertices': n_neurons,
+            'edges': len(src),
+            'max_in_degree': int(np.bincount(tgt, minlength=n_neurons).max()),
+            'max_out_degree': int(np.bincount(src, minlength=n_neurons).max()),
+            'max_core_packets': int(packets.max()),
+            'max_core_synapses': int(synapses.max()),
+        }
+
+    def _predict_time_scale_factor(self, shape):
+        """Predicts the time scale factor which lets the busiest core process an iteration within a
+        time step, without its buffers overflowing while packets arrive in the first half of it.
+
+        :param shape: dict, see _get_graph_shape
+        :return: int, time scale factor
+        """
+        packets, synapses = shape['max_core_packets'], shape['max_core_synapses']
+        cycles = packets * emulator.PACKET_CYCLES + synapses * emulator.SYNAPSE_CYCLES
+        overflow = max(0, packets - emulator.get_buffer_capacity())
+        cycles = max(cycles, 2 * overflow * cycles / max(1, packets))
+
+        tick_cycles = self._parameters['timestep'] * 1000. * emulator.CPU_CLOCK_MHZ
+        return max(1, int(np.ceil(cycles / tick_cycles)))
+
+    def _try_time_scale_factor(self, time_scale_factor, backend, run_time, expected_ranks):
+        """Runs the simulation with a time scale factor.
 
-    def _compute_page_rank(self, max_iter=100):
+        :return: bool, whether no packets were dropped and the ranks computed are correct
+        """
+        parameters = dict(self._parameters, time_scale_factor=time_scale_factor)
+        src, tgt = self._get_sim_edges_arrays()
+        with PageRankSimulation.from_arrays(run_time, src, tgt, self._n_vertices, self._labels,
+                                            parameters, self._damping, log_level=logger.level,
+                                            backend=backend, partition=self._model_ids,
+                                            accumulators=self._accumulators,
+                                            row_cache_size=self._row_cache_size,
+                                            event_driven=self._event_driven) as sim:
+            sim.run()
+            computed_ranks, _ = sim._extract_sim_ranks()
+            dropped_packets = sim.get_run_stats()['dropped_packets']
+
+        is_safe = not dropped_packets and sim._matches_reference(computed_ranks[-1], expected_ranks)
+        _log_info("time_scale_factor=%d: %s (%s dropped packets)" %
+                  (time_scale_factor, 'safe' if is_safe else 'unsafe', dropped_packets))
+        return is_safe
+
+    def _get_transition_matrix(self):
+        """Builds the sparse matrix used to exchange ranks between vertices.
+
+        Row `tgt' holds a 1 for every edge `src -> tgt', such that its product with the vector of
+        broadcast ranks sums up the contributions received by each vertex.
+
+        :return: scipy.sparse.csr_matrix of shape (|V|, |V|)
+        """
+        if self._transition_matrix is None:
+            n_neurons = self._n_vertices
+            src, tgt = self._get_sim_edges_arrays()
+            self._transition_matrix = sparse.csr_matrix(
+                (np.ones(len(src), dtype=np.int64), (tgt, src)), shape=(n_neurons, n_neurons))
+        return self._transition_matrix
+
+    def _compute_page_rank(self, max_iter=100, warm_start=True):
+        """Return the PageRank of the nodes in the graph, from the graph cache if it has them.
+
+        :param warm_start: whether to start from the ranks given to warm_start, if any
+        :return: (<np.array> ranks, <int> number of iterations to convergence)
+        """
+        if warm_start and self._rank_init is not None:
+            return self._power_iterate(max_iter, self._rank_init)
+
+        if self._graph_cache is not None:
+            cached = self._graph_cache.get_ranks(self._graph_key, self._damping)
+            if cached is not None:
+                return cached
+
+        ranks, it = self._power_iterate(max_iter)
+        if self._graph_cache is not None:
+            self._graph_cache.store_ranks(self._graph_key, self._damping, ranks, it)
+        return ranks, it
+
+    def _power_iterate(self, max_iter, rank_init=None):
         """Return the PageRank of the nodes in the graph.
 
-        Adapted to return the number of iterations necessary to compute the Page Rank
+        Power iteration on U0.32 fixed-point vectors (see FXarray), mimicking the payload truncation
+        of the SpiNNaker model. Ranks are exchanged through a sparse matrix-vector product.
 
         Source
         ------
         github.com/networkx/networkx/blob/master/networkx/algorithms/link_analysis/pagerank_alg.py
 
+        :param rank_init: <np.array> initial rank of each vertex, default is 1/N
+        :return: (<np.array> ranks, <int> number of iterations to convergence)
         """
-        # Init graph structure
-        if self._input_graph is None:
-            # Compute input graph if not defined
-            self.draw_input_graph(show_graph=False)
+        tol = self._to_fp(TOL)
+        N = self._to_fp(self._n_vertices)
+        for iter, (x, err) in zip(range(max_iter), self._iter_power(rank_init)):
+            logger.debug('[t=%04d] l1 error = %f' % (iter, err))
+            if err < N * tol:
+                return x.toFloat(), iter + 1  # iter t+1 happens at the end of time t
+        raise PowerIterationFailedConvergence(max_iter)
+
+    def _iter_power(self, rank_init=None):
+        """Iterates the fixed-point power iteration of _power_iterate, without end.
 
-        W = nx.stochastic_graph(self._input_graph, weight=None)
-        N = W.number_of_nodes()
+        :param rank_init: <np.array> initial rank of each vertex, default is 1/N
+        :return: generator of (<FXarray> ranks, <FXnum> l1 norm of their change), per iteration
+        """
+        A = self._get_transition_matrix()
+        out_degrees = np.asarray(A.sum(axis=0), dtype=np.int64).ravel()
+        reciprocals = get_reciprocals(out_degrees)
 
         # Init fixed-point constants
         d = self._to_fp(self._get_damping_factor())
-        tol = self._to_fp(TOL)
-        ZERO = self._to_fp(0)
         ONE = self._to_fp(1.)
-        N = self._to_fp(N)
+        N = self._to_fp(A.shape[0])
         damping_sum = self._to_fp(self._get_damping_sum())
 
-        # Iterate up to max_iter iterations
-        x = dict.fromkeys(W, ONE / N)
-        for iter in range(max_iter):
-            logger.debug('\n===== TIME STEP = {} ====='.format(iter))
+        if rank_init is None:
+            x = FXarray(family=ONE.family, scaled_value=np.full(A.shape[0], (ONE / N).scaledval))
+        else:
+            x = FXarray(rank_init, ONE.family)
+        while True:
             xlast = x
-            x = dict.fromkeys(xlast.keys(), ZERO)
-
-            for node in x:
-                pkt = xlast[node] / self._to_fp(len(W[node]))
-                logger.debug('[t=%04d|#%3s] Sending pkt %f[%s]' % (
-                    iter, node, pkt, self._to_hex(pkt)))
-
-                # Exchange ranks
-                for conn_node in W[node]:  # edge: node -> conn_node
-                    prev = x[conn_node]
-                    # Simulates payload-lossy encoding of the iteration
-                    # See c_models/src/common/in_spikes.h:in_spikes_payload_format
-                    x[conn_node] += ((pkt >> ITER_BITS) << ITER_BITS)
-                    logger.debug("[idx=%3s] %f[%s] + %f[%s] = %f[%s]" % (
-                        conn_node, prev, self._to_hex(prev), pkt, self._to_hex(pkt), x[conn_node],
-                        self._to_hex(x[conn_node])))
+
+            # Rank sent by each node, times the reciprocal of its out degree with the truncation of
+            # c_models/src/neuron/models/neuron_model_page_rank.c:neuron_model_get_broadcast_rank
+            pkt = (np.asarray(xlast.scaledval).astype(np.uint64) * reciprocals) >> np.uint64(32)
+            pkt = FXarray(family=ONE.family, scaled_value=pkt.astype(np.int64))
+            # Simulates payload-lossy encoding of the iteration
+            # See c_models/src/common/in_spikes.h:in_spikes_payload_format
+            pkt = (pkt >> ITER_BITS) << ITER_BITS
+
+            # Exchange ranks
+            x = FXarray(family=ONE.family, scaled_value=A.dot(pkt.scaledval))
 
             # Compute dangling factor
             if d != ONE:
-                for node in x:
-                    prev = x[node]
-                    x[node] = damping_sum + d * x[node]
-                    logger.debug("[idx=%3s] %f[%s] * %f[%s] + %f[%s] = %f[%s]" % (
-                        node, d, self._to_hex(d), prev, self._to_hex(prev), damping_sum,
-                        self._to_hex(damping_sum), x[node], self._to_hex(x[node])))
-
-            # Check convergence, l1 norm
-            err = sum([abs(x[node] - xlast[node]) for node in x])
-            if err < N * tol:
-                if self._labels:
-                    x = np.array([np.float64(x[v]) for v in self._labels])
-                return x, iter + 1  # iter t+1 happens at the end of time t
-        raise nx.PowerIterationFailedConvergence(max_iter)
+                x = damping_sum + d * x
+
+            # l1 norm of the change
+            yield x, abs(x - xlast).sum()
+
+    def _matches_reference(self, computed_ranks, expected_ranks, max_iter=100):
+        """Compares the final ranks of the simulation to those of the Python implementation, at TOL.
+
+        In event driven mode, cores go on iterating past the convergence until the end of the run,
+        as fast as their packets arrive, and their last recorded ranks are those of whichever
+        iteration they reached. Each rank is then compared to the reference ranks of its vertex at
+        every iteration from the convergence on, up to max_iter more, or until they stop changing.
+
+        :param computed_ranks: <np.array> ranks recorded at the end of the simulation
+        :param expected_ranks: <np.array> reference ranks, at their convergence
+        :return: bool, whether every rank matches the reference rank of some iteration
+        """
+        is_close = np.isclose(computed_ranks, expected_ranks, atol=TOL)
+        if self._event_driven:
+            for it, (x, err) in enumerate(self._iter_power(expected_ranks)):
+                if is_close.all() or err == 0 or it >= max_iter:
+                    break
+                is_close |= np.isclose(computed_ranks, x.toFloat(), atol=TOL)
+        return bool(is_close.all())
 
     def _verify_sim(self, verify, diff_only=False):
         """Verifies simulation results correctness.
 
         Checks the ranks results from the simulation match those given by a Python implementation of
-        Page Rank in networkx.
+        Page Rank on the edge arrays (see _compute_page_rank).
 
         :return: bool, whether the results match
         """
@@ -320,9 +711,11 @@ class PageRankSimulation:
 
         # Get last row of the ranks computed in the simulation
         _log_info("Extracting computed ranks...")
-        computed_ranks, it = self._extract_sim_ranks()
+        start = time.time()
+        computed_ranks, sim_it = self._extract_sim_ranks()
         computed_ranks = computed_ranks[-1]
-        msg += "[SpiNNaker] Convergence < 10e-%d in #%d iterations.\n" % (FLOAT_PRECISION, it)
+        self._run_stats['extraction_time'] = time.time() - start
+        msg += "[SpiNNaker] Convergence < 10e-%d in #%d iterations.\n" % (FLOAT_PRECISION, sim_it)
 
         if not verify:
             return True, msg + "Correctness unchecked."
@@ -331,9 +724,13 @@ class PageRankSimulation:
         _log_info("Computing Page Rank...")
         expected_ranks, it = self._compute_page_rank()
         msg += "[Python PR] Convergence < 10e-%d in #%d iterations.\n" % (FLOAT_PRECISION, it)
+        if self._rank_init is not None:
+            _, cold_it = self._compute_page_rank(warm_start=False)
+            msg += "[Warm start] #%d iterations saved, out of #%d from a cold start.\n" % (
+                cold_it - sim_it, cold_it)
 
         # Compare at defined precision
-        is_correct = np.allclose(computed_ranks, expected_ranks, atol=TOL)
+        is_correct = self._matches_reference(computed_ranks, expected_ranks)
 
         if is_correct:
             msg += "CORRECT Page Rank results.\n"
@@ -354,92 +751,401 @@ class PageRankSimulation:
     # Exposed functions
     #
 
-    def run(self, verify=False, **kwargs):
+    def _run_model(self, run, early_stop):
+        """Runs the model for the run time or, if early_stop, until it converged.
+
+        :param run: function running the model for some duration (ms), as `p.run'
+        :param early_stop: whether to run EARLY_STOP_WINDOW time steps at a time, until the rank
+                           changes recorded show convergence
+        :return: None
+        """
+        timestep = self._parameters['timestep']
+        n_steps = int(round(self._run_time / timestep))
+        if not early_stop:
+            run(self._run_time)
+        else:
+            for lo in range(0, n_steps, EARLY_STOP_WINDOW):
+                run(min(EARLY_STOP_WINDOW, n_steps - lo) * timestep)
+                if self._get_convergence() is not None:
+                    n_steps = min(lo + EARLY_STOP_WINDOW, n_steps)
+                    break
+        self._run_stats['simulated_time'] = n_steps * timestep
+
+    def _run_spinnaker_model(self, early_stop):
+        """Loads the model on the machine then runs it, timing both on the host: `p.run' maps and
+        loads the model, or reloads its parameters after a reset, before running it, so it first
+        runs for no time step.
+
+        :param early_stop: see _run_model
+        :return: None
+        """
+        import spynnaker8 as p
+        start = time.time()
+        p.run(0)
+        self._run_stats['load_time'] = time.time() - start
+
+        start = time.time()
+        self._run_model(p.run, early_stop)
+        self._run_stats['run_time'] = time.time() - start
+
+    def run(self, verify=False, early_stop=False, **kwargs):
         """Runs the simulation.
 
+        Running again reuses the graph loaded on the machine, only resetting the model.
+
         :param verify: check the results with a Page Rank python implementation.
+        :param early_stop: stop as soon as the ranks converged, rather than after the run time
         :param silence_output: remove output
         :return: bool, correctness of the simulation results
         """
+        self._sim_ranks = None
+        self._sim_convergence = None
+        self._run_stats = {}
+
         # Setup simulation
         @ConditionalSilencer(not logger.isEnabledFor(logging.INFO))
         def _run():
-            p.setup(**self._parameters)
-
-            self._model = self._create_page_rank_model()
-            self._model.record([RANK])
-
-            p.run(self._run_time)
+            start = time.time()
+            if self._backend != 'spinnaker':
+                if self._model is not None:
+                    self._model.end()
+                self._model = self._create_page_rank_emulator()
+                self._run_stats['build_time'] = time.time() - start
+
+                start = time.time()
+                self._run_model(self._model.run, early_stop)
+                self._run_stats['run_time'] = time.time() - start
+                self._run_stats['load_time'] = 0.
+            elif self._model is not None:
+                import spynnaker8 as p
+                p.reset()
+                self._reset_page_rank_model()
+                self._run_stats['build_time'] = time.time() - start
+                self._run_spinnaker_model(early_stop)
+            else:
+                import spynnaker8 as p
+                p.setup(**self._parameters)
+
+                self._model = self._create_page_rank_model()
+                self._model.record([RANK, DELTA])
+                self._run_stats['build_time'] = time.time() - start
+                self._run_spinnaker_model(early_stop)
             return self._verify_sim(verify, **kwargs)
 
         is_correct, msg = _run()
         _log_info(msg)
         return is_correct
 
-    def draw_input_graph(self, show_graph=False):
+    def run_batch(self, dampings, verify=False):
+        """Runs the simulation once per damping factor, loading the graph only once.
+
+        Between runs, only the damping parameters of the model are rewritten and its state
+        variables reset, see run.
+
+        :param dampings: list of damping factors
+        :param verify: check the results with a Page Rank python implementation.
+        :return: list of BatchResult, per damping factor
+        """
+        for damping in dampings:
+            self._validate_damping(damping)
+
+        results = []
+        for damping in dampings:
+            self._damping = damping
+            is_correct = self.run(verify)
+            ranks, it = self._extract_sim_ranks()
+            results.append(BatchResult(damping, is_correct, np.array(ranks[-1]), it,
+                                       self.get_run_stats()))
+        return results
+
+    def autotune(self, backend='emulator', run_time=None, precision=AUTOTUNE_PRECISION):
+        """Finds the minimal time scale factor with which the simulation computes correct ranks
+        without dropping packets, and uses it for the next runs.
+
+        Starts from a guess based on the load of the busiest core, then bisects on short runs,
+        assuming a factor is safe if a smaller one is. The factor found is kept by the simulation,
+        per graph shape.
+
+        :param backend: backend to run the short runs with, default is the host emulator
+        :param run_time: duration of the short runs, default is the run time of the simulation
+        :param precision: relative precision of the factor found
+        :return: int, the minimal safe time scale factor found
+        """
+        run_time = run_time or self._run_time
+        shape = self._get_graph_shape()
+        key = tuple(sorted(shape.items())) + (
+            ('backend', backend), ('damping', self._damping), ('run_time', run_time),
+            ('timestep', self._parameters['timestep']), ('accumulators', self._accumulators),
+            ('row_cache_size', self._row_cache_size), ('event_driven', self._event_driven))
+
+        if key not in self._time_scale_factors:
+            expected_ranks, _ = self._compute_page_rank()
+            guess = self._predict_time_scale_factor(shape)
+            _log_info("Tuning time_scale_factor from %d for %s" % (guess, shape))
+
+            def is_safe(factor):
+                return self._try_time_scale_factor(factor, backend, run_time, expected_ranks)
+
+            # Bracket the minimal safe factor: unsafe < minimal <= safe
+            safe, unsafe = None, 0
+            factor = guess
+            while safe is None:
+                if is_safe(factor):
+                    safe = factor
+                elif factor >= MAX_TIME_SCALE_FACTOR:
+                    raise RuntimeError("No safe time_scale_factor found up to %d." % factor)
+                else:
+                    unsafe, factor = factor, min(2 * factor, MAX_TIME_SCALE_FACTOR)
+            while unsafe == 0 and safe > 1:
+                factor = safe // 2
+                if is_safe(factor):
+                    safe = factor
+                else:
+                    unsafe = factor
+
+            # Bisect
+            while safe - unsafe > max(1, precision * safe):
+                factor = (safe + unsafe) // 2
+                if is_safe(factor):
+                    safe = factor
+                else:
+                    unsafe = factor
+            self._time_scale_factors[key] = safe
+
+        self._parameters['time_scale_factor'] = self._time_scale_factors[key]
+        _log_info("Using time_scale_factor=%d" % self._time_scale_factors[key])
+        return self._time_scale_factors[key]
+
+    def warm_start(self, ranks=None):
+        """Starts the next runs from previous ranks rather than uniform ones, which converges in
+        fewer iterations when the graph barely changed since (see apply_edge_delta).
+
+        :param ranks: <np.array> previous rank of each vertex, e.g. from GraphCache.get_ranks,
+                      default is the final ranks of the last run. Vertices without a previous rank
+                      start from 1/N.
+        :return: None
+        """
+        if ranks is None:
+            if self._model is None:
+                raise RuntimeError('You first need to .start(...) the simulation.')
+            ranks = self._extract_sim_ranks()[0][-1]
+        ranks = np.asarray(ranks, dtype=np.float64)
+        if len(ranks) > self._n_vertices:
+            raise ValueError("%d ranks given for %d vertices." % (len(ranks), self._n_vertices))
+        if not np.all((ranks >= 0) & (ranks <= 1)):
+            raise ValueError("Ranks not in valid range [0,1].")
+        self._rank_init = np.concatenate(
+            (ranks, np.full(self._n_vertices - len(ranks), 1. / self._n_vertices)))
+
+    def apply_edge_delta(self, added=None, removed=None, labels=None):
+        """Edits the graph, keeping the ids of the vertices, and the warm start ranks if any.
+
+        The graph is reloaded by the next run. Call warm_start beforehand to start from the ranks
+        of the last run.
+
+        :param added: (#edges, 2) array-like of (source, target) vertex ids of the new edges
+        :param removed: (#edges, 2) array-like of (source, target) vertex ids of removed edges
+        :param labels: labels of the vertices, to add vertices after the current ones
+        :return: None
+        """
+        n_vertices = self._n_vertices if labels is None else len(labels)
+        if n_vertices < self._n_vertices:
+            raise ValueError("graph structure error - vertices cannot be removed.")
+        labels = self._labels if labels is None else labels
+
+        def _keys(edges):
+            edges = np.asarray(edges if edges is not None else [], dtype=np.int64).reshape(-1, 2)
+            if len(edges) > 0 and (edges.min() < 0 or edges.max() >= n_vertices):
+                raise ValueError("graph structure error - vertex ids not in range [0,%d)." %
+                                 n_vertices)
+            return edges[:, 0] * n_vertices + edges[:, 1]
+
+        src, tgt = self._get_sim_edges_arrays()
+        keys = np.asarray(src, dtype=np.int64) * n_vertices + tgt
+        removed_keys = np.unique(_keys(removed))
+        size_diff = len(removed_keys) - len(np.intersect1d(removed_keys, keys))
+        if size_diff != 0:
+            raise ValueError("graph structure error - %d removed edge(s) not found." % size_diff)
+        keys = np.concatenate((np.setdiff1d(keys, removed_keys), _keys(added)))
+        sim_edges = np.column_stack((keys // n_vertices, keys % n_vertices))
+        self._validate_graph_arrays(sim_edges, n_vertices, labels, self._damping)
+
+        # New graph, to be reloaded
+        self._end_model()
+        self._sim_ranks = None
+        self._sim_convergence = None
+        self._run_stats = {}
+        self._input_graph = None
+        self._transition_matrix = None
+        self._graph_cache = None
+        self._graph_key = None
+
+        n_added = n_vertices - self._n_vertices
+        if self._model_ids is not None:
+            self._model_ids = np.concatenate(
+                (self._model_ids, np.arange(self._n_vertices, n_vertices, dtype=np.int64)))
+        if self._rank_init is not None:
+            self._rank_init = np.concatenate((self._rank_init, np.full(n_added, 1. / n_vertices)))
+        self._labels = labels
+        self._n_vertices = n_vertices
+        self._sim_edges = sim_edges
+        _log_info("Applied edge delta: %d edges, %d vertices added, %d edges removed." % (
+            len(sim_edges) - len(src) + len(removed_keys), n_added, len(removed_keys)))
+
+    def cache_graph(self, graph_cache):
+        """Stores the preprocessed graph in a cache, as well as the reference ranks computed from
+        now on, so that later simulations of the same graph can start from it (see from_cache).
+
+        :param graph_cache: GraphCache
+        :return: str, key of the graph in the cache
+        """
+        src, tgt = self._get_sim_edges_arrays()
+        self._graph_key = graph_cache.store(src, tgt, self._n_vertices, self._labels)
+        self._graph_cache = graph_cache
+        return self._graph_key
+
+    @check_sim_ran
+    def get_run_stats(self):
+        """Statistics on the last run of the simulation.
+
+        Times are in seconds. Dropped packets, row cache hits / misses and iterations per second
+        are only counted by the emulator backends: the board reports the latter two in the IOBUF
+        of the cores. Iterations per second are those all cores completed, per second of the run
+        on the board, i.e. of simulated time times the time scale factor. In event driven mode,
+        iterations to convergence are counted in time steps, as the ranks are recorded once per
+        time step.
+
+        :return: dict, with build / load / run / extraction times, iterations to convergence,
+                 number of dropped packets, of row cache hits / misses and of iterations per
+                 second
+        """
+        _, it = self._extract_sim_ranks()
+        stats = dict(self._run_stats)
+        stats.update({
+            'iterations': it,
+            'converged': it < len(self._sim_ranks),
+            'dropped_packets': None,
+            'row_cache_hits': None,
+            'row_cache_misses': None,
+            'iterations_per_second': None,
+        })
+        if self._backend != 'spinnaker':
+            provenance = self._model.get_provenance()
+            stats['dropped_packets'] = provenance['packets_dropped']
+            stats['row_cache_hits'] = provenance['row_cache_hits']
+            stats['row_cache_misses'] = provenance['row_cache_misses']
+            stats['iterations_per_second'] = provenance['iterations_per_second']
+        return stats
+
+    @check_sim_ran
+    def iter_sim_ranks(self, window=EXTRACT_WINDOW, by_neuron=False):
+        """Decodes the ranks recorded during the simulation, one window at a time.
+
+        Only a window of the recorded ranks is decoded at a time, so that long simulations of
+        large graphs can be post-processed in bounded memory.
+
+        :param window: number of time steps, or neurons if by_neuron, per window
+        :param by_neuron: whether to yield neuron-slices instead of time-windows
+        :return: generator of (<slice> time steps or neurons, <np.array> ranks of the window)
+        """
+        return self._decode_ranks(self._get_raw_ranks(), window, by_neuron, self._model_ids)
+
+    @staticmethod
+    def _render(name, draw, show_graph, out_file):
+        """Draws a figure, then either saves it headlessly to out_file or displays it.
+
+        :param draw: function drawing on a matplotlib.figure.Figure
+        """
+        if out_file is not None:
+            fig = rendering.new_figure()
+            draw(fig)
+            fig.savefig(out_file)
+            _log_info("Saved %s to %s." % (name, out_file))
+        elif show_graph:
+            _log_info("Displaying %s. Check DISPLAY=%s if this hangs..." % (
+                name, os.getenv('DISPLAY')))
+            plt.clf()
+            draw(plt.gcf())
+            plt.show()
+
+    def draw_input_graph(self, show_graph=False, out_file=None,
+                         max_vertices=rendering.MAX_DRAWN_VERTICES):
         """Compute a graphical representation of the input graph.
 
+        Graphs of more than rendering.LARGE_GRAPH_VERTICES vertices are downsampled to their
+        max_vertices vertices of largest in-degree, and laid out with a fast force-directed layout.
+
         :param show_graph: whether to display the graph, default is False
+        :param out_file: file to save the graph to instead, without a display
         :return: None
         """
+        if self._n_vertices > rendering.LARGE_GRAPH_VERTICES:
+            src, tgt = self._get_sim_edges_arrays()
+            self._render('input graph', lambda fig: rendering.draw_graph(
+                fig, src, tgt, self._n_vertices, self._labels, max_vertices=max_vertices),
+                show_graph, out_file)
+        else:
+            self._render('input graph', self._draw_small_input_graph, show_graph, out_file)
+
+    def _draw_small_input_graph(self, fig):
+        """Draws every vertex of the input graph, with networkx.
+
+        networkx is only needed here, and the graph only built here: the reference Page Rank
+        works on the edge arrays.
+        """
+        import networkx as nx
 
         # Graph structure
         G = nx.Graph().to_directed()
-        G.add_edges_from(self._edges)
-
-        # Save graph for Page Rank python computations
+        G.add_edges_from((self._labels[src], self._labels[tgt]) for src, tgt in self._sim_edges)
         self._input_graph = G
 
-        if show_graph:
-            _log_info("Displaying input graph. "
-                      "Check DISPLAY={} if this hangs...".format(os.getenv('DISPLAY')))
-            # Clear plot
-            plt.clf()
+        # Graph layout
+        ax = fig.gca()
+        pos = nx.layout.spring_layout(G)
+        nx.draw_networkx_nodes(G, pos, node_size=NX_NODE_SIZE, node_color='red', ax=ax)
+        nx.draw_networkx_edges(G, pos, arrowstyle='->', ax=ax)
+        nx.draw_networkx_labels(G, pos, font_color='white', font_weight='bold', ax=ax)
+        self_loops = G.nodes_with_selfloops()
+        nx.draw_networkx_nodes(self_loops, pos, node_size=NX_NODE_SIZE, node_color='black', ax=ax)
 
-            # Graph layout
-            pos = nx.layout.spring_layout(G)
-            nx.draw_networkx_nodes(G, pos, node_size=NX_NODE_SIZE, node_color='red')
-            nx.draw_networkx_edges(G, pos, arrowstyle='->')
-            nx.draw_networkx_labels(G, pos, font_color='white', font_weight='bold')
-            self_loops = G.nodes_with_selfloops()
-            nx.draw_networkx_nodes(self_loops, pos, node_size=NX_NODE_SIZE, node_color='black')
-
-            # Show graph
-            plt.gca().set_axis_off()
-            plt.suptitle('Input graph for Page Rank')
-            plt.title('Black nodes are self-looping', fontsize=8)
-            plt.show()
+        ax.set_axis_off()
+        fig.suptitle('Input graph for Page Rank')
+        ax.set_title('Black nodes are self-looping', fontsize=8)
 
     @check_sim_ran
-    def draw_output_graph(self, show_graph=True):
+    def draw_output_graph(self, show_graph=True, out_file=None):
         """Displays the computed rank over time.
 
+        Ranks of more than rendering.LARGE_GRAPH_VERTICES vertices are summarised as quantile
+        bands, with the ranks of the top ranked vertices, and a histogram of the final ranks.
+
         Note: pausing the simulation before it ends and is unloaded from the SpiNNaker chips allows
         for inspection of the post-simulation state through `ybug'
         (see SpiNNakerManchester/spinnaker_tools)
 
         :param show_graph: whether to display the graph, default is False
+        :param out_file: file to save the graph to instead, without a display
         :return: None
         """
         ranks, _ = self._extract_sim_ranks()
 
-        if show_graph:
-            _log_info("Displaying output graph. "
-                      "Check DISPLAY={} if this hangs...".format(os.getenv('DISPLAY')))
-            plt.clf()
-
-            ranks = ranks.swapaxes(0, 1)
-            labels = self._labels or list(range(len(ranks)))
-            for lbl, r in zip(labels, ranks):
-                plt.plot(np.round(r, FLOAT_PRECISION), label=self._node_formatter(lbl))
-            plt.legend()
-            plt.xticks()
-            plt.yticks()
-            plt.xlabel('Time (ms)')
-            plt.ylabel('Rank')
-            plt.suptitle("Rank over time")
-            plt.title(ANNOTATION, fontsize=6)
-            plt.show()
+        if self._n_vertices > rendering.LARGE_GRAPH_VERTICES:
+            self._render('output graph', lambda fig: rendering.draw_rank_bands(
+                fig, ranks, self._labels, annotation=ANNOTATION), show_graph, out_file)
+        else:
+            self._render('output graph', lambda fig: self._draw_small_output_graph(fig, ranks),
+                         show_graph, out_file)
+
+    def _draw_small_output_graph(self, fig, ranks):
+        ax = fig.gca()
+        for lbl, r in zip(self._labels, np.swapaxes(ranks, 0, 1)):
+            ax.plot(np.round(r, FLOAT_PRECISION), label=self._node_formatter(lbl))
+        ax.legend()
+        ax.set_xlabel('Time (ms)')
+        ax.set_ylabel('Rank')
+        fig.suptitle("Rank over time")
+        ax.set_title(ANNOTATION, fontsize=6)
 
 #
 # Utility functions
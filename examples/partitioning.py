@@ -0,0 +1,130 @@
+"""Graph-aware reordering of the vertices of a Page Rank graph.
+
+PACMAN slices the population into contiguous blocks of as many vertices as fit on a core, and places
+consecutive slices on the cores of a chip then on the next chips. Renumbering the vertices so that
+tightly connected ones have close ids thus keeps most edges within a core, or at least a chip, and
+reduces the number of packets routed per iteration.
+
+Vertices are grouped in communities by label propagation. Communities are ordered with a reverse
+Cuthill-McKee ordering of the graph of communities, so that connected communities land on
+neighbouring cores / chips, and vertices within a community are ordered likewise.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from examples.emulator import MAX_ATOMS_PER_CORE, CORES_PER_CHIP
+
+MAX_ITER = 20  # label propagation rounds
+
+
+def _symmetric_matrix(src, tgt, n_vertices):
+    """:return: sparse.csr_matrix, undirected adjacency matrix without self loops"""
+    not_loop = src != tgt
+    rows = np.concatenate((src[not_loop], tgt[not_loop]))
+    cols = np.concatenate((tgt[not_loop], src[not_loop]))
+    A = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)),
+                          shape=(n_vertices, n_vertices))
+    A.sum_duplicates()
+    return A
+
+
+def _propagate_labels(A, max_iter=MAX_ITER, seed=0):
+    """Label propagation: each vertex repeatedly takes the label most frequent among its
+    neighbours, with half of the vertices updated per round to avoid oscillations.
+
+    :param A: sparse.csr_matrix, undirected adjacency matrix
+    :return: <np.array> community label of each vertex
+    """
+    rng = np.random.RandomState(seed)
+    n_vertices = A.shape[0]
+    A = A.tocoo()
+    rows, cols = A.row.astype(np.int64), A.col.astype(np.int64)
+    labels = np.arange(n_vertices, dtype=np.int64)
+
+    for _ in range(max_iter):
+        # Weight of each (vertex, neighbour label) pair
+        keys, weights = np.unique(rows * n_vertices + labels[cols], return_inverse=True)
+        weights = np.bincount(weights.ravel(), weights=A.data)
+        vertices, candidates = keys // n_vertices, keys % n_vertices
+
+        # Heaviest label of each vertex, ties broken at random
+        noise = rng.random_sample(len(keys))
+        order = np.lexsort((noise, -weights, vertices))
+        first = order[np.r_[True, vertices[order][1:] != vertices[order][:-1]]]
+
+        updated = rng.random_sample(len(first)) < .5
+        new_labels = labels.copy()
+        new_labels[vertices[first][updated]] = candidates[first][updated]
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    return np.unique(labels, return_inverse=True)[1].ravel()
+
+
+def _rcm_ranks(A):
+    """:return: <np.array> rank of each vertex in the reverse Cuthill-McKee ordering of A"""
+    ranks = np.empty(A.shape[0], dtype=np.int64)
+    ranks[csgraph.reverse_cuthill_mckee(A.tocsr(), symmetric_mode=True)] = np.arange(A.shape[0])
+    return ranks
+
+
+def get_traffic_stats(src, tgt, n_vertices, perm=None, atoms_per_core=MAX_ATOMS_PER_CORE,
+                      cores_per_chip=CORES_PER_CHIP):
+    """Estimates the traffic of an iteration, for the vertices placed in order of their ids.
+
+    :param perm: <np.array> new id of each vertex, default is the identity
+    :return: dict, with the number of edges crossing cores / chips, and the number of packets
+             delivered to cores / chips other than the one of their source per iteration, one per
+             (source vertex, target core) pair
+    """
+    if perm is not None:
+        src, tgt = perm[src], perm[tgt]
+    src_core, tgt_core = src // atoms_per_core, tgt // atoms_per_core
+    n_cores = n_vertices // atoms_per_core + 1
+
+    packets = np.unique(src * n_cores + tgt_core)
+    packets_src_core, packets_tgt_core = packets // n_cores // atoms_per_core, packets % n_cores
+    return {
+        'edge_cut': int(np.count_nonzero(src_core != tgt_core)),
+        'chip_edge_cut': int(np.count_nonzero(
+            src_core // cores_per_chip != tgt_core // cores_per_chip)),
+        'packets': len(packets),
+        'remote_packets': int(np.count_nonzero(packets_src_core != packets_tgt_core)),
+        'inter_chip_packets': int(np.count_nonzero(
+            packets_src_core // cores_per_chip != packets_tgt_core // cores_per_chip)),
+    }
+
+
+def partition(src, tgt, n_vertices, atoms_per_core=MAX_ATOMS_PER_CORE,
+              cores_per_chip=CORES_PER_CHIP, max_iter=MAX_ITER, seed=0):
+    """Renumbers the vertices so that tightly connected vertices share slices, and connected
+    slices are placed on neighbouring chips.
+
+    Falls back to the identity if it does not reduce the number of packets between cores.
+
+    :param src: <np.array> source vertex ids of the edges
+    :param tgt: <np.array> target vertex ids of the edges
+    :param n_vertices: number of vertices
+    :param atoms_per_core: size of the slices, which depends on the build and the row cache of the
+                           model, see emulator.get_max_atoms_per_core
+    :param cores_per_chip: number of slices per chip
+    :return: (<np.array> new id of each vertex, <dict> traffic stats before, <dict> after)
+    """
+    A = _symmetric_matrix(src, tgt, n_vertices)
+    communities = _propagate_labels(A, max_iter, seed)
+
+    # Order communities, then the vertices within them
+    n_communities = communities.max() + 1
+    edges = A.tocoo()
+    C = sparse.csr_matrix((edges.data, (communities[edges.row], communities[edges.col])),
+                          shape=(n_communities, n_communities))
+    order = np.lexsort((_rcm_ranks(A), _rcm_ranks(C)[communities]))
+    perm = np.empty(n_vertices, dtype=np.int64)
+    perm[order] = np.arange(n_vertices)
+
+    before = get_traffic_stats(src, tgt, n_vertices, None, atoms_per_core, cores_per_chip)
+    after = get_traffic_stats(src, tgt, n_vertices, perm, atoms_per_core, cores_per_chip)
+    if after['remote_packets'] >= before['remote_packets']:
+        return np.arange(n_vertices, dtype=np.int64), before, before
+    return perm, before, after
@@ -0,0 +1,158 @@
+"""Rendering of large Page Rank graphs and of their ranks over time.
+
+Drawing every vertex, with a quadratic spring layout, and a line per vertex does not scale past a
+few hundred vertices. Instead:
+  * graphs are downsampled to their top ranked vertices, and laid out with a force-directed layout
+    whose repulsive forces are approximated from the centres of mass of the cells of a grid,
+    as Barnes-Hut does with a quadtree
+  * ranks over time are summarised as quantile bands, plus the lines of the top ranked vertices,
+    and the final ranks as a histogram
+
+Figures are rendered with the Agg backend, so that they can be saved to files without a display.
+"""
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+LARGE_GRAPH_VERTICES = 100  # past which graphs are drawn as large graphs
+MAX_DRAWN_VERTICES = 1000
+MAX_LABELED_VERTICES = 20
+TOP_K_LINES = 10
+QUANTILES = (5, 25, 50, 75, 95)  # percents, symmetric around the median
+HISTOGRAM_BINS = 50
+LAYOUT_ITERATIONS = 50
+LAYOUT_GRID = 16  # cells per side of the grid approximating repulsive forces
+LAYOUT_CHUNK = 2**12  # vertices whose repulsive forces are computed at once
+
+
+def new_figure(figsize=(10, 8)):
+    """:return: matplotlib.figure.Figure, rendered headlessly"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def top_k(values, k):
+    """:return: <np.array> indices of the k largest values, largest first"""
+    k = min(k, len(values))
+    top = np.argpartition(-np.asarray(values), k - 1)[:k] if k > 0 else np.zeros(0, np.int64)
+    return top[np.argsort(-np.asarray(values)[top], kind='mergesort')]
+
+
+def force_layout(src, tgt, n_vertices, n_iter=LAYOUT_ITERATIONS, grid=LAYOUT_GRID, seed=0):
+    """Fruchterman-Reingold layout, with repulsive forces exerted by the centres of mass of the
+    cells of a grid rather than by every other vertex, in O(V * grid^2 + E) per iteration.
+
+    :param src: <np.array> source vertex ids of the edges
+    :param tgt: <np.array> target vertex ids of the edges
+    :return: <np.array> (n_vertices, 2) positions in the unit square
+    """
+    rng = np.random.RandomState(seed)
+    pos = rng.random_sample((n_vertices, 2))
+    not_loop = src != tgt
+    src, tgt = src[not_loop], tgt[not_loop]
+    k = 1. / np.sqrt(max(n_vertices, 1))  # optimal distance between vertices
+    temperature = .1
+
+    for i in range(n_iter):
+        # Centres of mass of the occupied cells
+        lo = pos.min(axis=0)
+        span = max((pos.max(axis=0) - lo).max(), 1e-9)
+        cells = np.minimum(((pos - lo) / span * grid).astype(np.int64), grid - 1)
+        cells = cells[:, 0] * grid + cells[:, 1]
+        mass = np.bincount(cells, minlength=grid * grid)
+        occupied = mass > 0
+        centres = np.column_stack([
+            np.bincount(cells, weights=pos[:, d], minlength=grid * grid)[occupied]
+            for d in range(2)]) / mass[occupied, None]
+        mass = mass[occupied]
+
+        # Repulsion, k^2 / d, softened not to blow up within a vertex's own cell
+        disp = np.empty_like(pos)
+        for lo in range(0, n_vertices, LAYOUT_CHUNK):
+            delta = pos[lo:lo + LAYOUT_CHUNK, None, :] - centres[None, :, :]
+            d2 = (delta**2).sum(axis=2) + (k / 2)**2
+            disp[lo:lo + LAYOUT_CHUNK] = (delta * (mass * k**2 / d2)[:, :, None]).sum(axis=1)
+
+        # Attraction along the edges, d^2 / k
+        delta = pos[src] - pos[tgt]
+        force = delta * np.sqrt((delta**2).sum(axis=1))[:, None] / k
+        for d in range(2):
+            disp[:, d] -= np.bincount(src, weights=force[:, d], minlength=n_vertices)
+            disp[:, d] += np.bincount(tgt, weights=force[:, d], minlength=n_vertices)
+
+        # Moves limited by the temperature, which cools down linearly
+        length = np.maximum(np.sqrt((disp**2).sum(axis=1)), 1e-9)
+        pos += disp * (np.minimum(length, temperature * (1. - float(i) / n_iter)) / length)[:, None]
+
+    lo = pos.min(axis=0)
+    return (pos - lo) / max((pos.max(axis=0) - lo).max(), 1e-9)
+
+
+def draw_graph(fig, src, tgt, n_vertices, labels, weights=None, max_vertices=MAX_DRAWN_VERTICES,
+               title='Input graph for Page Rank'):
+    """Draws the subgraph induced by the max_vertices vertices of largest weights.
+
+    :param weights: <np.array> weight of each vertex, for sampling and sizing, default is in-degree
+    :param labels: labels of the vertices by id
+    """
+    if weights is None:
+        weights = np.bincount(tgt, minlength=n_vertices)
+    weights = np.asarray(weights, dtype=np.float64)
+    drawn = top_k(weights, max_vertices)
+    ids = np.full(n_vertices, -1, dtype=np.int64)
+    ids[drawn] = np.arange(len(drawn))
+    kept = (ids[src] >= 0) & (ids[tgt] >= 0)
+    sub_src, sub_tgt = ids[src[kept]], ids[tgt[kept]]
+    pos = force_layout(sub_src, sub_tgt, len(drawn))
+
+    ax = fig.add_subplot(111)
+    ax.add_collection(LineCollection(
+        np.stack((pos[sub_src], pos[sub_tgt]), axis=1), colors='grey', linewidths=.3, alpha=.5))
+    w = weights[drawn]
+    sizes = 5 + 100 * (w - w.min()) / max(w.max() - w.min(), 1e-12)
+    points = ax.scatter(pos[:, 0], pos[:, 1], s=sizes, c=w, cmap='viridis', zorder=2)
+    fig.colorbar(points, ax=ax)
+    for i in range(min(MAX_LABELED_VERTICES, len(drawn))):
+        ax.annotate(str(labels[drawn[i]]), pos[i], fontsize=6)
+    ax.set_axis_off()
+    fig.suptitle(title)
+    ax.set_title('%d of %d vertices, %d of %d edges' % (
+        len(drawn), n_vertices, len(sub_src), len(src)), fontsize=8)
+
+
+def draw_rank_bands(fig, ranks, labels, top=TOP_K_LINES, quantiles=QUANTILES, window=1024,
+                    title='Rank over time', annotation=''):
+    """Draws quantile bands of the ranks over time with the ranks of the top vertices, and the
+    histogram of the final ranks.
+
+    :param ranks: <np.array> (timesteps x vertices) ranks, possibly memory-mapped
+    :param labels: labels of the vertices by id
+    :param window: time steps whose quantiles are computed at once
+    """
+    bands = np.concatenate([np.percentile(ranks[lo:lo + window], quantiles, axis=1).T
+                            for lo in range(0, len(ranks), window)])
+    final = np.asarray(ranks[-1])
+    time = np.arange(len(ranks))
+
+    ax = fig.add_subplot(211)
+    n_bands = len(quantiles) // 2
+    for i in range(n_bands):
+        ax.fill_between(time, bands[:, i], bands[:, -1 - i], color='C0', alpha=.15 + .15 * i,
+                        label='%d-%d%%' % (quantiles[i], quantiles[-1 - i]), linewidth=0)
+    if len(quantiles) % 2:
+        ax.plot(time, bands[:, n_bands], color='C0', label='median')
+    for v in top_k(final, top):
+        ax.plot(time, ranks[:, v], linewidth=.8, label='Node %s' % labels[v])
+    ax.set_xlabel('Time (ms)')
+    ax.set_ylabel('Rank')
+    ax.legend(fontsize=6, ncol=2)
+    ax.set_title(annotation, fontsize=6)
+
+    ax = fig.add_subplot(212)
+    ax.hist(final, bins=HISTOGRAM_BINS, log=True)
+    ax.set_xlabel('Final rank')
+    ax.set_ylabel('# vertices')
+    fig.suptitle(title)
+    fig.tight_layout(rect=(0, 0, 1, .95))
@@ -1,69 +1,152 @@
 import argparse
-import networkx as nx
-import random
+import numpy as np
 import sys
+import time
 import tqdm
 
-from examples.page_rank import PageRankSimulation, LOG_LEVEL_PAGE_RANK_INFO
+from examples.page_rank import PageRankSimulation, LOG_LEVEL_PAGE_RANK_INFO, BACKENDS, \
+    PowerIterationFailedConvergence
 
 N_ITER = 15
 timestep = .1
 RUN_TIME = N_ITER * timestep
 PARAMETERS = {
-    # Experimental results of good values
+    # Experimental results of good values, see examples/benchmark.py to measure them
     # |V|=400  |E|=600   : ts=1. tsf=40
     # |V|=800  |E|=1200  : ts=1. tsf=45
     # |V|=1600 |E|=2400  : ts=1. tsf=150
     # |V|=3200 |E|=4800  : ts=?  tsf=?
     'time_scale_factor': 20000,
 }
+DISTRIBUTIONS = ('uniform', 'powerlaw', 'rmat', 'barabasi-albert')  # of the in-degrees
+RMAT_PROBABILITIES = [.57, .19, .19, .05]  # of the (src, tgt) quadrants, top-left to bottom-right
+OVERDRAW = 1.1  # edges drawn per new edge expected, as some are duplicates
+MIN_ACCEPTANCE = .01  # ratio of new edges in a batch under which the distribution is saturated
+MAX_BATCH_SIZE = 2**23
 
 
-def _mk_label(n):
-    return '#%d' % n
+def _mk_rd_nodes(node_count, size):
+    return np.random.randint(0, node_count, size=size, dtype=np.int64)
 
 
-def _mk_rd_node(node_count):
-    return random.randint(0, node_count - 1)
+def _mk_rd_powerlaw_nodes(node_count, size):
+    # Zipf-like: low node ids are picked far more often than high ones
+    return np.minimum(np.random.pareto(1., size), node_count - 1).astype(np.int64)
 
 
-def _mk_graph(node_count, edge_count):
-    # Under these constraints we can comply with the requirements below
-    assert node_count <= edge_count <= node_count**2, \
-        "Need node_count=%d < edge_count=%d < %d " % (node_count, edge_count, node_count**2)
+def _mk_uniform_edges(node_count, size):
+    return _mk_rd_nodes(node_count, size), _mk_rd_nodes(node_count, size)
 
-    # Ensures no double edges
-    edges = set([])
 
-    # Ensures no dangling nodes
-    for i in range(node_count):
-        edges.add((i, _mk_rd_node(node_count)))
+def _mk_powerlaw_edges(node_count, size):
+    return _mk_rd_nodes(node_count, size), _mk_rd_powerlaw_nodes(node_count, size)
 
-    for _ in tqdm.tqdm(range(node_count, edge_count), desc="Generating edges",
-                       initial=node_count, total=edge_count):
-        while True:
-            l = len(edges)
-            edges.add((_mk_rd_node(node_count), _mk_rd_node(node_count)))
-            if len(edges) > l:
-                break  # Only move to next iteration if we've added a new edge
 
-    edges = [(_mk_label(src), _mk_label(tgt))
-             for src, tgt in tqdm.tqdm(edges, desc="Formatting edges")]
+def _mk_rmat_edges(node_count, size):
+    # Recursively picks a quadrant of the adjacency matrix, one bit of the ids at a time
+    src, tgt = np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64)
+    for _ in range(max(1, int(np.ceil(np.log2(node_count))))):
+        quadrants = np.random.choice(4, size=size, p=RMAT_PROBABILITIES)
+        src = (src << 1) | (quadrants >> 1)
+        tgt = (tgt << 1) | (quadrants & 1)
+    in_range = (src < node_count) & (tgt < node_count)
+    return src[in_range], tgt[in_range]
+
+
+def _mk_barabasi_albert_edges(node_count, size):
+    # Each node i > 0 links to m older nodes, picked in proportion to their degrees by picking
+    # uniformly among the endpoints of the edges of older nodes. Node 0 owns m seed endpoints.
+    m = max(1, -(-size // node_count))
+    edge_ids = np.arange(m * (node_count - 1), dtype=np.int64)
+    src = 1 + edge_ids // m
+    picks = (np.random.random_sample(len(edge_ids)) * (m + 2 * m * (src - 1))).astype(np.int64)
+
+    # Picking the target endpoint of an older edge means picking its own pick: follow them
+    tgt = np.zeros(len(edge_ids), dtype=np.int64)
+    todo = np.flatnonzero(picks >= m)
+    while len(todo) > 0:
+        endpoints = picks[todo] - m
+        is_src = endpoints % 2 == 0
+        tgt[todo[is_src]] = src[endpoints[is_src] // 2]
+        todo = todo[~is_src]
+        picks[todo] = picks[endpoints[~is_src] // 2]
+        todo = todo[picks[todo] >= m]
+    # Edges are undirected, so that the in and out degrees follow the same distribution
+    flip = np.random.random_sample(len(edge_ids)) < .5
+    return np.where(flip, tgt, src), np.where(flip, src, tgt)
+
 
-    return edges
+_EDGES_GENERATORS = {
+    'uniform': _mk_uniform_edges,
+    'powerlaw': _mk_powerlaw_edges,
+    'rmat': _mk_rmat_edges,
+    'barabasi-albert': _mk_barabasi_albert_edges,
+}
+
+
+def _mk_graph(node_count, edge_count, distribution='uniform'):
+    """Generates a random graph, without double edges nor dangling nodes.
 
+    Edges are drawn in batches until there are enough distinct ones, then edges in excess are
+    dropped at random. Batches are sized on the ratio of new edges in the previous one, and once
+    the distribution is saturated (e.g. dense graphs) the remaining edges are drawn uniformly.
 
-def _mk_sim_run(node_count=None, edge_count=None, verify=False, pause=False, show_out=False):
+    :return: (<np.array> sources, <np.array> targets) node ids
+    """
+    # Under these constraints we can comply with the requirements below
+    assert node_count <= edge_count <= node_count**2, \
+        "Need node_count=%d < edge_count=%d < %d " % (node_count, edge_count, node_count**2)
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError("Unknown degree distribution '%s', expected one of %s." %
+                         (distribution, DISTRIBUTIONS))
+    mk_edges = _EDGES_GENERATORS[distribution]
+
+    # Ensures no dangling nodes
+    nodes = np.arange(node_count, dtype=np.int64)
+    keys = np.unique(nodes * node_count + _mk_rd_nodes(node_count, node_count))
+
+    # Ensures no double edges, edges are packed in (src, tgt) keys
+    acceptance = 1.
+    while len(keys) < edge_count:
+        missing = edge_count - len(keys)
+        size = min(int(missing * OVERDRAW / acceptance) + 1, MAX_BATCH_SIZE)
+        src, tgt = mk_edges(node_count, size)
+        new_keys = np.setdiff1d(src * node_count + tgt, keys)
+
+        acceptance = max(float(len(new_keys)) / size, MIN_ACCEPTANCE)
+        if len(new_keys) < MIN_ACCEPTANCE * size:
+            mk_edges = _mk_uniform_edges
+        if len(new_keys) > missing:
+            new_keys = np.random.choice(new_keys, missing, replace=False)
+        keys = np.union1d(keys, new_keys)
+
+    return keys // node_count, keys % node_count
+
+
+def _mk_sim_run(node_count=None, edge_count=None, verify=False, pause=False, show_out=False,
+                backend='spinnaker', distribution='uniform', damping=.85, run_time=RUN_TIME,
+                parameters=None, return_stats=False, partition=False, accumulators=False,
+                row_cache_size=0, event_driven=False):
     ###############################################################################
     # Create random Page Rank graphs
-    labels = map(_mk_label, list(range(node_count)))
-    edges = _mk_graph(node_count, edge_count)
+    start = time.time()
+    src, tgt = _mk_graph(node_count, edge_count, distribution)
+    graph_time = time.time() - start
 
     ###############################################################################
     # Run simulation / report
-    with PageRankSimulation(RUN_TIME, edges, labels, PARAMETERS, log_level=0, pause=pause) as sim:
+    with PageRankSimulation.from_arrays(run_time, src, tgt, node_count,
+                                        parameters=parameters or PARAMETERS, damping=damping,
+                                        log_level=0, pause=pause, backend=backend,
+                                        partition=partition, accumulators=accumulators,
+                                        row_cache_size=row_cache_size,
+                                        event_driven=event_driven) as sim:
         is_correct = sim.run(verify=verify, diff_only=True)
         sim.draw_output_graph(show_graph=show_out)
+        if return_stats:
+            stats = sim.get_run_stats()
+            stats['graph_time'] = graph_time
+            return is_correct, stats
         return is_correct
 
 
@@ -75,8 +158,8 @@ def run(runs=None, **kwargs):
                 is_correct = _mk_sim_run(**kwargs)
                 errors += 0 if is_correct else 1
                 break
-            except nx.PowerIterationFailedConvergence:
-                print('Skipping nx.PowerIterationFailedConvergence graph...')
+            except PowerIterationFailedConvergence:
+                print('Skipping PowerIterationFailedConvergence graph...')
 
     print('Finished robustness test with %d/%d error(s).' % (errors, runs))
 
@@ -89,6 +172,20 @@ if __name__ == '__main__':
     parser.add_argument('-v', '--verify', action='store_true', help='Verify sim w/ Python PR impl')
     parser.add_argument('-p', '--pause', action='store_true', help='Pause after each runs')
     parser.add_argument('-o', '--show-out', action='store_true', help='Display ranks curves output')
-
-    random.seed(42)
+    parser.add_argument('-d', '--distribution', choices=DISTRIBUTIONS, default='uniform',
+                        help='Distribution of the in-degrees. Default is uniform.')
+    parser.add_argument('-b', '--backend', choices=BACKENDS, default='spinnaker',
+                        help='Run on a SpiNNaker board, or on the host emulator (multi-process).')
+    parser.add_argument('--partition', action='store_true',
+                        help='Reorder vertices to minimise the traffic between cores')
+    parser.add_argument('--accumulators', action='store_true',
+                        help='Accumulate the ranks received early rather than buffering packets')
+    parser.add_argument('--row-cache-size', type=int, default=0,
+                        help='DTCM budget (bytes) of the synaptic row cache of each core. Default '
+                             'is no cache.')
+    parser.add_argument('--event-driven', action='store_true',
+                        help='Start iterations as soon as the previous one finished, rather than '
+                             'at the next time step')
+
+    np.random.seed(42)
     sys.exit(run(**vars(parser.parse_args())))
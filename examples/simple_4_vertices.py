@@ -1,12 +1,12 @@
 import argparse
 import sys
 
-from examples.page_rank import PageRankSimulation
+from examples.page_rank import PageRankSimulation, BACKENDS
 
 RUN_TIME = 2.1
 
 
-def run(show_in=False, show_out=False):
+def run(show_in=False, show_out=False, backend='spinnaker'):
     ###############################################################################
     # Construct simulation graph
     # From: https://www.youtube.com/watch?v=P8Kt6Abq_rM
@@ -24,7 +24,8 @@ def run(show_in=False, show_out=False):
     ###############################################################################
     # Run simulation / report
 
-    with PageRankSimulation(RUN_TIME, edges, damping=1-10e-10, pause=not show_out) as sim:
+    with PageRankSimulation(RUN_TIME, edges, damping=1-10e-10, pause=not show_out,
+                            backend=backend) as sim:
         sim.draw_input_graph(show_graph=show_in)
         sim.run(verify=True)
         sim.draw_output_graph(show_graph=show_out)
@@ -34,5 +35,7 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Sample page rank graph with 4 vertices')
     parser.add_argument('--show-in', action='store_true', help='Display directed graph input.')
     parser.add_argument('--show-out', action='store_true', help='Display ranks curves output.')
+    parser.add_argument('--backend', choices=BACKENDS, default='spinnaker',
+                        help='Run on a SpiNNaker board, or on the host emulator (multi-process).')
 
     sys.exit(run(**vars(parser.parse_args())))
\ No newline at end of file
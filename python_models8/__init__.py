@@ -1,8 +1,16 @@
-from spynnaker.pyNN.abstract_spinnaker_common import AbstractSpiNNakerCommon
 from python_models8 import model_binaries
 
 import os
 
+try:
+    from spynnaker.pyNN.abstract_spinnaker_common \
+        import AbstractSpiNNakerCommon
+except ImportError:
+    # Without sPyNNaker, only the modules which do not need it can be used,
+    # e.g. neuron_models.u032 by the host emulator
+    AbstractSpiNNakerCommon = None
+
 # This adds the model binaries path to the paths searched by sPyNNaker
-AbstractSpiNNakerCommon.register_binary_search_path(
-    os.path.dirname(model_binaries.__file__))
+if AbstractSpiNNakerCommon is not None:
+    AbstractSpiNNakerCommon.register_binary_search_path(
+        os.path.dirname(model_binaries.__file__))
@@ -0,0 +1,207 @@
+""" Compressed edge lists, from which the cores generate their synaptic rows\
+    (see c_models/src/neuron/edge_list.h)
+
+A block holds the edges from a pre-vertex slice to a post-vertex slice, as
+little-endian 32-bit words:
+
+    [n_words][offset][n_rows][row_length][control][pinned_control]
+    [varint bytes..., zero padded to a word]
+
+with, for each neuron of the pre-vertex slice, in order: the number of
+targets of its row shifted left by one, or'ed with 1 if the row is pinned in
+the row cache, then its first target (relative to the post-vertex slice)
+and the gaps minus one between its consecutive targets. Each value is an
+unsigned LEB128 varint: 7 bits per byte, low bits first, the high bit set on
+all bytes but the last.
+
+The block expands to n_rows rows of N_ROW_HEADER_WORDS + row_length words,
+offset bytes into the indirect synaptic matrix, as sPyNNaker would write
+them: each synaptic word is the control word of its row or'ed with its
+target.
+
+A compressed synaptic matrix region is:
+
+    [indirect matrix size | COMPRESSED_MATRIX_FLAG][n_blocks][blocks...]
+
+which the core expands in place before the population table reads it.
+"""
+import numpy
+
+from python_models8.neuron.builds.dtcm import N_ROW_HEADER_WORDS
+
+N_HEADER_WORDS = 6
+N_MATRIX_HEADER_WORDS = 2
+MAX_VARINT_BYTES = 5  # for 32 bits values
+
+# Set in the first word of compressed synaptic matrix regions, never in the
+# size of the indirect matrix which it holds otherwise
+COMPRESSED_MATRIX_FLAG = 0x80000000
+
+
+def _encode_varints(values):
+    """ Encode values as a stream of varint bytes
+    """
+    values = numpy.asarray(values, dtype="uint32")
+    n_bytes = numpy.ones(len(values), dtype="int64")
+    for i in range(1, MAX_VARINT_BYTES):
+        n_bytes += values >= (1 << (7 * i))
+    starts = numpy.cumsum(n_bytes) - n_bytes
+
+    stream = numpy.zeros(n_bytes.sum(), dtype="uint8")
+    for i in range(MAX_VARINT_BYTES):
+        has_byte = n_bytes > i
+        more = numpy.where(n_bytes[has_byte] > i + 1, 0x80, 0)
+        stream[starts[has_byte] + i] = \
+            ((values[has_byte] >> (7 * i)) & 0x7f) | more
+    return stream
+
+
+def _decode_varints(stream):
+    """ Decode a stream of varint bytes, where zero padding decodes as zeros
+    """
+    stream = numpy.asarray(stream, dtype="uint8")
+    ends = numpy.flatnonzero(stream < 0x80)
+    if len(ends) == 0:
+        return numpy.zeros(0, dtype="uint32")
+    starts = numpy.concatenate(([0], ends[:-1] + 1))
+    stream = stream[:ends[-1] + 1]
+
+    # Position of each byte in its varint
+    positions = numpy.arange(len(stream)) - numpy.repeat(
+        starts, ends - starts + 1)
+    parts = (stream & 0x7f).astype("uint64") << \
+        (7 * positions).astype("uint64")
+    return numpy.add.reduceat(parts, starts).astype("uint32")
+
+
+def encode_edges(sources, targets, pinned, pre_vertex_slice,
+                 post_vertex_slice, offset=0, row_length=None,
+                 controls=(0, 0)):
+    """ Encode the edges from a pre-vertex slice to a post-vertex slice
+
+    :param sources: array of the source neuron ids of the edges
+    :param targets: array of the target neuron ids of the edges
+    :param pinned: array of whether the row of each edge is pinned in the\
+        row cache, the same for all the edges of a row
+    :param offset: where the rows go in the indirect synaptic matrix (bytes)
+    :param row_length: number of synaptic words of each row, at least the\
+        number of targets of the longest row, default is that number
+    :param controls: the bits of the synaptic words other than the target,\
+        of the unpinned and pinned rows
+    :return: uint32 array, the block of words
+    """
+    sources = numpy.asarray(sources, dtype="int64")
+    targets = numpy.asarray(targets, dtype="int64")
+    pinned = numpy.asarray(pinned, dtype="bool")
+    order = numpy.lexsort((targets, sources))
+    sources = sources[order] - pre_vertex_slice.lo_atom
+    targets = targets[order] - post_vertex_slice.lo_atom
+
+    n_rows = pre_vertex_slice.n_atoms
+    row_lengths = numpy.bincount(sources, minlength=n_rows)
+    row_starts = numpy.cumsum(row_lengths) - row_lengths
+    row_pinned = numpy.zeros(n_rows, dtype="uint32")
+    row_pinned[sources[pinned[order]]] = 1
+    max_row_length = row_lengths.max() if n_rows > 0 else 0
+    if row_length is None:
+        row_length = max_row_length
+    elif row_length < max_row_length:
+        raise ValueError(
+            "Rows of %d words cannot hold %d targets." %
+            (row_length, max_row_length))
+
+    # Gaps to the previous target of the row, or the first target
+    gaps = numpy.empty_like(targets)
+    gaps[1:] = targets[1:] - targets[:-1] - 1
+    gaps[row_starts[row_lengths > 0]] = targets[row_starts[row_lengths > 0]]
+
+    # Row lengths are interleaved before the gaps of their rows
+    values = numpy.zeros(n_rows + len(targets), dtype="uint32")
+    is_length = numpy.zeros(len(values), dtype="bool")
+    is_length[row_starts + numpy.arange(n_rows)] = True
+    values[is_length] = (row_lengths << 1) | row_pinned
+    values[~is_length] = gaps
+
+    stream = _encode_varints(values)
+    stream = numpy.concatenate(
+        (stream, numpy.zeros(-len(stream) % 4, dtype="uint8")))
+    header = [N_HEADER_WORDS + len(stream) // 4, offset, n_rows, row_length,
+              controls[0], controls[1]]
+    return numpy.concatenate((
+        numpy.array(header, dtype="uint32"), stream.view("<u4")))
+
+
+def _decode_rows(block):
+    """ Decode the rows of a block
+
+    :return: iterator of (row, targets, pinned), with targets relative to\
+        the post-vertex slice
+    """
+    block = numpy.asarray(block, dtype="<u4")
+    n_rows = int(block[2])
+    values = _decode_varints(block[N_HEADER_WORDS:].view("uint8"))
+
+    pos = 0
+    for row in range(n_rows):
+        row_length = int(values[pos]) >> 1
+        gaps = values[pos + 1:pos + 1 + row_length].astype("int64")
+        gaps[1:] += 1
+        yield row, numpy.cumsum(gaps), bool(values[pos] & 1)
+        pos += 1 + row_length
+
+
+def decode_edges(block, pre_vertex_slice, post_vertex_slice):
+    """ Decode a block of edges, as the generator on the machine does
+
+    :param block: uint32 array, the block of words
+    :return: (sources, targets, pinned), arrays of the neuron ids of the\
+        edges and of whether their rows are pinned
+    """
+    sources, targets, pinned = [numpy.zeros(0, "int64")], \
+        [numpy.zeros(0, "int64")], [numpy.zeros(0, "bool")]
+    for row, row_targets, row_pinned in _decode_rows(block):
+        sources.append(numpy.full(
+            len(row_targets), pre_vertex_slice.lo_atom + row, dtype="int64"))
+        targets.append(post_vertex_slice.lo_atom + row_targets)
+        pinned.append(numpy.full(len(row_targets), row_pinned, dtype="bool"))
+    return (numpy.concatenate(sources), numpy.concatenate(targets),
+            numpy.concatenate(pinned))
+
+
+def expand_edges(block):
+    """ Expand a block into synaptic rows, as edge_list_expand does on the\
+        machine
+
+    :param block: uint32 array, the block of words
+    :return: uint32 array, the rows
+    """
+    n_rows, row_length, controls = int(block[2]), int(block[3]), block[4:6]
+    rows = numpy.zeros(
+        (n_rows, N_ROW_HEADER_WORDS + row_length), dtype="uint32")
+    for row, targets, pinned in _decode_rows(block):
+        rows[row, 1] = len(targets)
+        rows[row, N_ROW_HEADER_WORDS:N_ROW_HEADER_WORDS + len(targets)] = \
+            controls[int(pinned)] | targets.astype("uint32")
+    return rows.ravel()
+
+
+def expand_matrix(region):
+    """ Expand a compressed synaptic matrix region, as synapses_initialise\
+        does on the machine
+
+    :param region: uint32 array, the words of the region
+    :return: uint32 array, the indirect matrix size, rows and padding (left\
+        as zeros), and the empty direct matrix
+    """
+    region = numpy.asarray(region, dtype="uint32")
+    indirect_size = int(region[0]) & ~COMPRESSED_MATRIX_FLAG
+    matrix = numpy.zeros(1 + indirect_size // 4 + 1, dtype="uint32")
+    matrix[0] = indirect_size
+    pos = N_MATRIX_HEADER_WORDS
+    for _ in range(int(region[1])):
+        block = region[pos:pos + region[pos]]
+        rows = expand_edges(block)
+        start = 1 + int(block[1]) // 4
+        matrix[start:start + len(rows)] = rows
+        pos += len(block)
+    return matrix
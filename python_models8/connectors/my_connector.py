@@ -1,64 +1,198 @@
+import numpy
+
 from spynnaker.pyNN.models.neural_projections.connectors \
     import AbstractConnector
+from python_models8.connectors.edge_list_codec import encode_edges
+
+# Row cache of a core, see c_models/src/neuron/spike_processing.c
+ROW_CACHE_ENTRY_BYTES = 8  # key and address of a cached row
+N_ROW_HEADER_WORDS = 3
+ROW_CACHE_PIN_WEIGHT = 1.0  # weight flagging the synapses of pinned rows
 
 
 class MyConnector(AbstractConnector):
     """
-    Connects two vertices with some thing
+    Connects two vertices with an explicit list of edges, given as arrays of
+    source and target neuron ids
+
+    Edges are stored sorted by target then source (CSC order), so that the
+    edges to a post-vertex slice are a contiguous range. The edges of the
+    last post-vertex slice queried are kept sorted by source (CSR order), so
+    that the edges of each pre-vertex slice to it are also a range: as
+    synaptic data is generated one post-vertex at a time, the cost is linear
+    in the number of edges rather than in the number of slice pairs.
+
+    With a row cache, the rows of the highest out-degree sources to each
+    post-vertex slice which fit in its budget are pinned in the cache of the
+    core: their synapses get a weight of ROW_CACHE_PIN_WEIGHT, as Page Rank
+    does not use weights otherwise.
+
+    The edges of a slice pair can also be shipped as a compressed edge list,
+    from which the core generates the synaptic rows (see edge_list_codec).
 
     """
 
-    def __init__(self, weights=0.0, delays=1, allow_self_connections=True
-                 # TODO: Add your parameters here
-                 ):
+    def __init__(self, sources, targets, weights=0.0, delays=1,
+                 row_cache_size=0):
         """
         Creates a new MyConnector
+
+        :param sources: array of the pre-synaptic neuron ids of the edges
+        :param targets: array of the post-synaptic neuron ids of the edges
+        :param row_cache_size: DTCM budget of the row cache of each core\
+            (bytes), 0 for no cache
         """
         AbstractConnector.__init__(self)
         self._weights = weights
         self._delays = delays
-        self._allow_self_connections = allow_self_connections
+        self._row_cache_size = row_cache_size
+
+        # CSC order
+        sources = numpy.asarray(sources, dtype="uint32")
+        targets = numpy.asarray(targets, dtype="uint32")
+        order = numpy.lexsort((sources, targets))
+        self._sources = sources[order]
+        self._targets = targets[order]
+        self._out_degrees = numpy.bincount(sources).astype("int64")
 
-        # TODO: Store any additional parameters
+        # CSR order of the edges to the last post-vertex slice queried
+        self._post_slice_key = None
+        self._post_slice_sources = None
+        self._post_slice_targets = None
+        self._post_slice_pinned = None
+
+    def _get_post_slice_edges(self, post_vertex_slice):
+        """ Get the edges to the neurons of the post_vertex_slice, sorted by\
+            source
+        """
+        key = (post_vertex_slice.lo_atom, post_vertex_slice.hi_atom)
+        if key != self._post_slice_key:
+            lo = numpy.searchsorted(
+                self._targets, post_vertex_slice.lo_atom, side="left")
+            hi = numpy.searchsorted(
+                self._targets, post_vertex_slice.hi_atom, side="right")
+            sources = self._sources[lo:hi]
+            order = numpy.argsort(sources, kind="mergesort")
+            self._post_slice_key = key
+            self._post_slice_sources = sources[order]
+            self._post_slice_targets = self._targets[lo:hi][order]
+            self._post_slice_pinned = self._get_pinned(
+                self._post_slice_sources)
+        return self._post_slice_sources, self._post_slice_targets
+
+    def _get_pinned(self, sources):
+        """ Flag the edges of the rows pinned in the row cache of a core,\
+            given the sorted sources of the edges to its post-vertex slice
+        """
+        pinned = numpy.zeros(len(sources), dtype="bool")
+        if self._row_cache_size <= 0 or len(sources) == 0:
+            return pinned
+
+        # Rows of the highest out-degree sources first, as long as they fit
+        row_sources, row_lengths = numpy.unique(sources, return_counts=True)
+        order = numpy.lexsort((row_sources, -self._out_degrees[row_sources]))
+        row_bytes = ROW_CACHE_ENTRY_BYTES + \
+            (N_ROW_HEADER_WORDS + row_lengths[order]) * 4
+        is_pinned = numpy.zeros(len(row_sources), dtype="bool")
+        fits = numpy.cumsum(row_bytes) <= self._row_cache_size
+        is_pinned[order[fits]] = True
+        return numpy.repeat(is_pinned, row_lengths)
+
+    def _get_block(self, pre_vertex_slice, post_vertex_slice):
+        """ Get the sources and targets of the edges from the neurons of the\
+            pre_vertex_slice to those of the post_vertex_slice, and whether\
+            their rows are pinned in the row cache
+        """
+        sources, targets = self._get_post_slice_edges(post_vertex_slice)
+        lo = numpy.searchsorted(
+            sources, pre_vertex_slice.lo_atom, side="left")
+        hi = numpy.searchsorted(
+            sources, pre_vertex_slice.hi_atom, side="right")
+        return sources[lo:hi], targets[lo:hi], self._post_slice_pinned[lo:hi]
+
+    def _get_block_weights(self, pre_vertex_slice, post_vertex_slice):
+        """ Get the weights of the edges from the neurons of the\
+            pre_vertex_slice to those of the post_vertex_slice, as written in\
+            the synaptic block
+        """
+        _, _, pinned = self._get_block(pre_vertex_slice, post_vertex_slice)
+        weight, pinned_weight = self.get_row_weights()
+        return numpy.where(pinned, pinned_weight, weight).astype("float64")
+
+    def get_row_weights(self):
+        """ Get the weights of the synapses of the unpinned and pinned rows
+        """
+        if self._row_cache_size > 0:
+            return 0.0, ROW_CACHE_PIN_WEIGHT
+        return self._weights, self._weights
+
+    def get_compressed_edges(self, pre_vertex_slice, post_vertex_slice,
+                             offset=0, row_length=None, controls=(0, 0)):
+        """ Get the edges from the neurons of the pre_vertex_slice to those of\
+            the post_vertex_slice, as a compressed block from which the core\
+            generates the synaptic rows (see edge_list_codec.encode_edges)
+        """
+        sources, targets, pinned = self._get_block(
+            pre_vertex_slice, post_vertex_slice)
+        return encode_edges(
+            sources, targets, pinned, pre_vertex_slice, post_vertex_slice,
+            offset, row_length, controls)
 
     def get_delay_maximum(self):
         """ Get the maximum delay specified by the user in ms, or None if\
             unbounded
         """
-        # TODO: update accordingly
-        return 16
+        return self._delays
+
+    def get_delay_variance(self, pre_slices, pre_slice_index, post_slices,
+                           post_slice_index, pre_vertex_slice,
+                           post_vertex_slice):
+        """ Get the variance of the delays
+        """
+        return 0.0
 
     def create_synaptic_block(self, pre_slices, pre_slice_index, post_slices,
                               post_slice_index, pre_vertex_slice,
                               post_vertex_slice, synapse_type):
         """ Create a synaptic block from the data
         """
-
-        # TODO: update accordingly
-        pass
+        sources, targets, _ = self._get_block(
+            pre_vertex_slice, post_vertex_slice)
+        block = numpy.zeros(
+            len(sources), dtype=AbstractConnector.NUMPY_SYNAPSES_DTYPE)
+        block["source"] = sources
+        block["target"] = targets
+        block["weight"] = self._get_block_weights(
+            pre_vertex_slice, post_vertex_slice)
+        block["delay"] = self._delays
+        block["synapse_type"] = synapse_type
+        return block
 
     def get_weight_variance(self, pre_slices, pre_slice_index, post_slices,
                             post_slice_index, pre_vertex_slice,
                             post_vertex_slice):
         """ Get the variance of the weights
         """
-        # TODO: update accordingly
-        pass
+        weights = self._get_block_weights(pre_vertex_slice, post_vertex_slice)
+        if len(weights) == 0:
+            return 0.0
+        return numpy.var(weights)
 
     def generate_on_machine(self):
         """ Determines if the connector generation is supported on the machine\
             or if the connector must be generated on the host
         """
-        # TODO: update accordingly
-        pass
+        return True
 
     def get_weight_maximum(self, pre_slices, pre_slice_index, post_slices,
                            post_slice_index, pre_vertex_slice,
                            post_vertex_slice):
         """ Get the maximum of the weights for this connection
         """
-        # TODO: update accordingly
-        pass
+        weights = self._get_block_weights(pre_vertex_slice, post_vertex_slice)
+        if len(weights) == 0:
+            return self._weights
+        return numpy.max(weights)
 
     def get_n_connections_to_post_vertex_maximum(self, pre_slices,
                                                  pre_slice_index, post_slices,
@@ -71,15 +205,19 @@ class MyConnector(AbstractConnector):
             and max_delay (inclusive) if both specified\
             (otherwise all connections)
         """
-        # TODO: update accordingly
-        pass
+        _, targets, _ = self._get_block(pre_vertex_slice, post_vertex_slice)
+        if len(targets) == 0:
+            return 0
+        return numpy.max(numpy.bincount(targets - post_vertex_slice.lo_atom))
 
     def get_weight_mean(self, pre_slices, pre_slice_index, post_slices,
                         post_slice_index, pre_vertex_slice, post_vertex_slice):
         """ Get the mean of the weights for this connection
         """
-        # TODO: update accordingly
-        pass
+        weights = self._get_block_weights(pre_vertex_slice, post_vertex_slice)
+        if len(weights) == 0:
+            return self._weights
+        return numpy.mean(weights)
 
     def get_n_connections_from_pre_vertex_maximum(self, pre_slices,
                                                   pre_slice_index, post_slices,
@@ -92,5 +230,10 @@ class MyConnector(AbstractConnector):
             neurons in the post_vertex_slice from neurons in the\
             pre_vertex_slice
         """
-        # TODO: update accordingly
-        pass
+        if min_delay is not None and max_delay is not None and \
+                not min_delay <= self._delays <= max_delay:
+            return 0
+        sources, _, _ = self._get_block(pre_vertex_slice, post_vertex_slice)
+        if len(sources) == 0:
+            return 0
+        return numpy.max(numpy.bincount(sources - pre_vertex_slice.lo_atom))
@@ -0,0 +1,11 @@
+from python_models8.model_data_holders.page_rank_data_holder import PageRankDataHolder
+from python_models8.neuron.builds.model_page_rank_acc import PageRankAccBase
+
+
+class PageRankAccDataHolder(PageRankDataHolder):
+    """ Same parameters as PageRankDataHolder, for the page_rank_acc build
+    """
+
+    @staticmethod
+    def build_model():
+        return PageRankAccBase
@@ -23,6 +23,8 @@ class PageRankDataHolder(DataHolder):
             # PageRankBase
             damping_factor=PageRankBase.default_parameters['damping_factor'],
             damping_sum=PageRankBase.default_parameters['damping_sum'],
+            row_cache_size=PageRankBase.none_pynn_default_parameters['row_cache_size'],
+            event_driven=PageRankBase.none_pynn_default_parameters['event_driven'],
             incoming_edges_count=PageRankBase.default_parameters['incoming_edges_count'],
             outgoing_edges_count=PageRankBase.default_parameters['outgoing_edges_count'],
             rank_init=PageRankBase.none_pynn_default_parameters['rank_init'],
@@ -38,6 +40,8 @@ class PageRankDataHolder(DataHolder):
                 'label': label,
                 'damping_factor': damping_factor,
                 'damping_sum': damping_sum,
+                'row_cache_size': row_cache_size,
+                'event_driven': event_driven,
                 'incoming_edges_count': incoming_edges_count,
                 'outgoing_edges_count': outgoing_edges_count,
                 'rank_init': rank_init,
@@ -0,0 +1,89 @@
+""" DTCM budget of a core running a build of the Page Rank model, see\
+    c_models/src/neuron: shared by the model and its host emulator, so does\
+    not need sPyNNaker
+"""
+
+DTCM_BYTES = 64 * 1024
+DTCM_RESERVED_BYTES = 8 * 1024  # stacks and static variables
+N_ITER_BUFFERS = 8  # see common/in_spikes.h
+N_DMA_BUFFERS = 2  # see spike_processing.c
+N_ROW_HEADER_WORDS = 3
+N_RECORDED_STATES = 2  # ranks and rank changes, see neuron.c
+N_BIT_FIELDS = 2  # out spikes and iteration barrier, see neuron.c
+
+# DTCM allocated by sPyNNaker's code: the state of the recording channels
+# (spikes, ranks and rank changes), the time stamp of the out spikes, and
+# per slice of the population, an entry of the master population table
+# and one of its address list (see MasterPopTableAsBinarySearch)
+N_RECORDING_CHANNELS = 3
+RECORDING_CHANNEL_BYTES = 32
+OUT_SPIKES_HEADER_BYTES = 4
+MASTER_POP_TABLE_ENTRY_BYTES = 12 + 4
+
+# sPyNNaker's default, see [Simulation] incoming_spike_buffer_size
+INCOMING_SPIKE_BUFFER_SIZE = 256
+
+# Synaptic words index their target neuron within the core on
+# SYNAPSE_INDEX_BITS bits, see spynnaker.pyNN.utilities.constants
+SYNAPSE_INDEX_BITS = 8
+MAX_NEURON_SIZE = 1 << SYNAPSE_INDEX_BITS
+
+
+def get_buffer_words(incoming_spike_buffer_size=INCOMING_SPIKE_BUFFER_SIZE):
+    """ Size of each circular buffer of incoming spikes: 4 * size words,\
+        rounded up to a power of 2
+
+    :return: int, in words
+    """
+    buffer_words = 1
+    while buffer_words < 4 * incoming_spike_buffer_size:
+        buffer_words *= 2
+    return buffer_words
+
+
+def get_max_atoms_per_core(
+        global_parameters_bytes, neuron_bytes, n_iter_buffers=N_ITER_BUFFERS,
+        incoming_spike_buffer_size=INCOMING_SPIKE_BUFFER_SIZE,
+        row_cache_size=0, n_neurons=None):
+    """ Number of neurons which fit in the DTCM of a core, at most\
+        MAX_NEURON_SIZE
+
+    :param global_parameters_bytes: size of the `global_neuron_params_t'
+    :param neuron_bytes: size of the `neuron_t'
+    :param n_iter_buffers: number of incoming spike buffers
+    :param incoming_spike_buffer_size: size of the incoming spike\
+        buffers (words)
+    :param row_cache_size: DTCM budget of the synaptic row cache (bytes)
+    :param n_neurons: size of the population, each slice of which takes\
+        an entry of the master population table of every core, default\
+        is to leave the table out
+    :return: int, 0 if no neuron fits
+    """
+    fixed_bytes = (
+        DTCM_RESERVED_BYTES +
+        global_parameters_bytes +
+        n_iter_buffers * get_buffer_words(incoming_spike_buffer_size) * 4 +
+        N_DMA_BUFFERS * N_ROW_HEADER_WORDS * 4 +
+        row_cache_size +
+        N_RECORDED_STATES * 4 +  # time stamps
+        N_RECORDING_CHANNELS * RECORDING_CHANNEL_BYTES +
+        OUT_SPIKES_HEADER_BYTES)
+
+    # Worst case, a synaptic row targets all the neurons of the core
+    atom_bytes = (
+        neuron_bytes +
+        N_DMA_BUFFERS * 4 +
+        N_RECORDED_STATES * 4 +
+        N_BIT_FIELDS / 8.)
+    n_atoms = min(MAX_NEURON_SIZE,
+                  max(0, int((DTCM_BYTES - fixed_bytes) // atom_bytes)))
+    if n_neurons is None:
+        return n_atoms
+
+    # Smaller slices leave room for the larger master population table of
+    # their larger number: the largest slices which fit along with it
+    for n_atoms in range(n_atoms, 0, -1):
+        table_bytes = MASTER_POP_TABLE_ENTRY_BYTES * -(-n_neurons // n_atoms)
+        if fixed_bytes + n_atoms * atom_bytes + table_bytes <= DTCM_BYTES:
+            return n_atoms
+    return 0
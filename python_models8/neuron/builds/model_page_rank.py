@@ -1,17 +1,26 @@
 # main interface to use the spynnaker related tools.
 # ALL MODELS MUST INHERIT FROM THIS
+from spinn_front_end_common.utilities import globals_variables
 from spynnaker.pyNN.models.neuron import AbstractPopulationVertex
 from spynnaker.pyNN.models.neuron.input_types import InputTypeCurrent
+from python_models8.neuron.builds import dtcm
 from python_models8.neuron.neuron_models.neuron_model_page_rank import NeuronModelPageRank
+from python_models8.neuron.synaptic_manager_page_rank import SynapticManagerPageRank
 from python_models8.neuron.synapse_types.synapse_type_noop import SynapseTypeNoOp
 from python_models8.neuron.threshold_types.threshold_type_noop import ThresholdTypeNoOp
 
 
 class PageRankBase(AbstractPopulationVertex):
 
-    # Maximum number of atoms per core that can be supported.
-    # Note: a higher number would overflow the semaphores used.
-    _model_based_max_atoms_per_core = 255
+    # Neuron model and binary of the build, see c_models/src/neuron/builds
+    _neuron_model_class = NeuronModelPageRank
+    _binary = "page_rank.aplx"
+
+    # Maximum number of atoms per core set by the user, default is computed from the DTCM budget
+    _model_based_max_atoms_per_core = None
+
+    # Incoming spike buffers of the build, see common/in_spikes.h
+    _N_ITER_BUFFERS = dtcm.N_ITER_BUFFERS
 
     # Default parameters for this build, used when end user has not entered any
     default_parameters = {
@@ -22,6 +31,8 @@ class PageRankBase(AbstractPopulationVertex):
     }
 
     none_pynn_default_parameters = {
+        'row_cache_size': 0,
+        'event_driven': False,
         'rank_init': 0,
         'curr_rank_acc_init': 0,
         'curr_rank_count_init': 0,
@@ -41,6 +52,8 @@ class PageRankBase(AbstractPopulationVertex):
             # Global model parameters
             damping_factor=default_parameters['damping_factor'],
             damping_sum=default_parameters['damping_sum'],
+            row_cache_size=none_pynn_default_parameters['row_cache_size'],
+            event_driven=none_pynn_default_parameters['event_driven'],
 
             # Model parameters
             incoming_edges_count=default_parameters['incoming_edges_count'],
@@ -54,9 +67,22 @@ class PageRankBase(AbstractPopulationVertex):
             curr_rank_count_init=none_pynn_default_parameters['curr_rank_count_init'],
             iter_state_init=none_pynn_default_parameters['iter_state_init']):
 
-        neuron_model = NeuronModelPageRank(
+        if incoming_spike_buffer_size is None:
+            incoming_spike_buffer_size = \
+                globals_variables.get_simulator().config.getint(
+                    "Simulation", "incoming_spike_buffer_size")
+
+        max_atoms_per_core = self.get_max_atoms_per_core(
+            incoming_spike_buffer_size, row_cache_size, n_neurons)
+        if max_atoms_per_core <= 0:
+            raise ValueError(
+                "No neuron fits in DTCM next to the buffers, row cache and "
+                "master population table of a core, for %d neurons." %
+                n_neurons)
+
+        neuron_model = self._neuron_model_class(
                 n_neurons,
-                damping_factor, damping_sum,
+                damping_factor, damping_sum, row_cache_size, event_driven,
                 incoming_edges_count, outgoing_edges_count,
                 rank_init, curr_rank_acc_init, curr_rank_count_init, iter_state_init)
 
@@ -73,19 +99,45 @@ class PageRankBase(AbstractPopulationVertex):
             spikes_per_second=spikes_per_second,
             ring_buffer_sigma=ring_buffer_sigma,
             incoming_spike_buffer_size=incoming_spike_buffer_size,
-            max_atoms_per_core=PageRankBase._model_based_max_atoms_per_core,
+            max_atoms_per_core=max_atoms_per_core,
 
             # These are the various model types
             neuron_model=neuron_model, input_type=input_type,
             synapse_type=synapse_type, threshold_type=threshold_type,
             additional_input=None,
             model_name="PageRank", # name shown in reports
-            binary="page_rank.aplx") # c src binary name
-
-    @staticmethod
-    def get_max_atoms_per_core():
-        return PageRankBase._model_based_max_atoms_per_core
-
-    @staticmethod
-    def set_max_atoms_per_core(new_value):
-        PageRankBase._model_based_max_atoms_per_core = new_value
+            binary=self._binary) # c src binary name
+
+        # Ship the edges as compressed edge lists, from which the cores generate their synaptic rows
+        self._synapse_manager = SynapticManagerPageRank(
+            synapse_type, ring_buffer_sigma, spikes_per_second,
+            globals_variables.get_simulator().config)
+
+    @classmethod
+    def get_max_atoms_per_core(
+            cls, incoming_spike_buffer_size=dtcm.INCOMING_SPIKE_BUFFER_SIZE,
+            row_cache_size=0, n_neurons=None):
+        """ Maximum number of atoms per core: as set, or as many as fit in DTCM
+
+        :param incoming_spike_buffer_size: size of the incoming spike\
+            buffers (words)
+        :param row_cache_size: DTCM budget of the synaptic row cache (bytes)
+        :param n_neurons: size of the population, each slice of which takes\
+            an entry of the master population table of every core, default\
+            is to leave the table out
+        """
+        if cls._model_based_max_atoms_per_core is not None:
+            return cls._model_based_max_atoms_per_core
+        return dtcm.get_max_atoms_per_core(
+            cls._neuron_model_class.get_global_parameters_size(),
+            cls._neuron_model_class.get_neural_parameters_size(),
+            cls._N_ITER_BUFFERS, incoming_spike_buffer_size, row_cache_size,
+            n_neurons)
+
+    @classmethod
+    def set_max_atoms_per_core(cls, new_value):
+        if new_value is not None and new_value > dtcm.MAX_NEURON_SIZE:
+            raise ValueError(
+                "Synaptic words index at most %d neurons per core, not %d." %
+                (dtcm.MAX_NEURON_SIZE, new_value))
+        cls._model_based_max_atoms_per_core = new_value
@@ -0,0 +1,15 @@
+from python_models8.neuron.builds.model_page_rank import PageRankBase
+from python_models8.neuron.neuron_models.neuron_model_page_rank_acc import NeuronModelPageRankAcc
+
+
+class PageRankAccBase(PageRankBase):
+    """ Page Rank model of the page_rank_acc build: the ranks received ahead\
+        of their iteration are accumulated by the neurons, in a slot per\
+        iteration, instead of being buffered as packets until it starts
+    """
+
+    _neuron_model_class = NeuronModelPageRankAcc
+    _binary = "page_rank_acc.aplx"
+
+    # Packets of all iterations share one incoming spike buffer, see common/in_spikes.h
+    _N_ITER_BUFFERS = 1
@@ -9,12 +9,16 @@ from spynnaker.pyNN.models.abstract_models import AbstractContainsUnits
 from spynnaker.pyNN.models.neuron.neuron_models import AbstractNeuronModel
 from spynnaker.pyNN.utilities import utility_calls
 from data_specification.enums import DataType
+from python_models8.neuron.neuron_models.u032 import get_reciprocals
 
 
 class _GLOBAL_PARAMETERS(Enum):
     DAMPING_FACTOR = (1, DataType.U032, 'proba')
     DAMPING_SUM = (2, DataType.U032, 'rk')
     MACHINE_TIME_STEP = (3, DataType.UINT32, 'steps')
+    ROW_CACHE_SIZE = (4, DataType.UINT32, 'bytes')
+    EVENT_DRIVEN = (5, DataType.UINT32, 'bool')
+    RESTART = (6, DataType.UINT32, 'bool')
 
     def __new__(cls, value, data_type, unit):
         obj = object.__new__(cls)
@@ -35,10 +39,11 @@ class _GLOBAL_PARAMETERS(Enum):
 class _NEURAL_PARAMETERS(Enum):
     INCOMING_EDGES_COUNT = (1, DataType.UINT32, 'count')
     OUTGOING_EDGES_COUNT = (2, DataType.UINT32, 'count')
-    RANK_INIT = (3, DataType.U032, 'rk')
-    CURR_RANK_ACC_INIT = (4, DataType.U032, 'rk')
-    CURR_RANK_COUNT_INIT = (5, DataType.UINT32, 'count')
-    ITER_STATE_INIT = (6, DataType.UINT32, 'state')
+    OUTGOING_EDGES_RECIPROCAL = (3, DataType.U032, 'proba')
+    RANK_INIT = (4, DataType.U032, 'rk')
+    CURR_RANK_ACC_INIT = (5, DataType.U032, 'rk')
+    CURR_RANK_COUNT_INIT = (6, DataType.UINT32, 'count')
+    ITER_STATE_INIT = (7, DataType.UINT32, 'state')
 
     def __new__(cls, value, data_type, unit):
         obj = object.__new__(cls)
@@ -59,7 +64,7 @@ class _NEURAL_PARAMETERS(Enum):
 class NeuronModelPageRank(AbstractNeuronModel, AbstractContainsUnits):
 
     def __init__(self, n_neurons,
-                 damping_factor, damping_sum,
+                 damping_factor, damping_sum, row_cache_size, event_driven,
                  incoming_edges_count, outgoing_edges_count,
                  rank_init, curr_rank_acc_init, curr_rank_count_init, iter_state_init):
         AbstractNeuronModel.__init__(self)
@@ -70,6 +75,8 @@ class NeuronModelPageRank(AbstractNeuronModel, AbstractContainsUnits):
         # Global parameters
         self._damping_factor = damping_factor
         self._damping_sum = damping_sum
+        self._row_cache_size = row_cache_size
+        self._event_driven = event_driven
 
         # Store any neural parameters
         self._incoming_edges_count = self._var_init(incoming_edges_count)
@@ -103,6 +110,19 @@ class NeuronModelPageRank(AbstractNeuronModel, AbstractContainsUnits):
     def damping_sum(self, damping_sum):
         self._damping_sum = damping_sum
 
+    @property
+    def row_cache_size(self):
+        # Read-only: the cache is allocated when the model starts, see spike_processing.c
+        return self._row_cache_size
+
+    @property
+    def event_driven(self):
+        return self._event_driven
+
+    @event_driven.setter
+    def event_driven(self, event_driven):
+        self._event_driven = event_driven
+
     @property
     def incoming_edges_count(self):
         return self._incoming_edges_count
@@ -119,11 +139,17 @@ class NeuronModelPageRank(AbstractNeuronModel, AbstractContainsUnits):
     def outgoing_edges_count(self, outgoing_edges_count):
         self._outgoing_edges_count = self._var_init(outgoing_edges_count)
 
+    @property
+    def _outgoing_edges_reciprocal(self):
+        # Derived from the out degrees, for the C code not to divide: the raw U0.32 values are
+        # exact as floats, so that they are encoded as is
+        return get_reciprocals(self._outgoing_edges_count) / 2.**32
+
     # Initializers for the state variables
     def _initialize_state_vars(self, state_vars):
         def _mk_initialize(state_var):
-            def initialize(self, val):
-                self[state_var] = self._var_init(val)
+            def initialize(val):
+                setattr(self, state_var, self._var_init(val))
             return initialize
 
         for name, val in state_vars:
@@ -168,6 +194,10 @@ class NeuronModelPageRank(AbstractNeuronModel, AbstractContainsUnits):
             name = item.name.lower()
             if name == 'machine_time_step':
                 return machine_time_step
+            if name == 'restart':
+                # Written after a reset: the model starts its iterations
+                # over when it reloads the parameters, see neuron.c
+                return 1
             return getattr(self, '_'+name)
 
         # Note: must match the order of the parameters in the `global_neuron_t' in the C code
@@ -180,10 +210,23 @@ class NeuronModelPageRank(AbstractNeuronModel, AbstractContainsUnits):
     def get_global_parameter_types(self):
         return [item.data_type for item in _GLOBAL_PARAMETERS]
 
+    @staticmethod
+    def get_neural_parameters_size():
+        """ Size of the `neuron_t' in C code, in bytes
+        """
+        return sum(item.data_type.size for item in _NEURAL_PARAMETERS)
+
+    @staticmethod
+    def get_global_parameters_size():
+        """ Size of the `global_neuron_t' in C code, in bytes
+        """
+        return sum(item.data_type.size for item in _GLOBAL_PARAMETERS)
+
     @overrides(AbstractNeuronModel.get_n_cpu_cycles_per_neuron)
     def get_n_cpu_cycles_per_neuron(self):
         # Number of CPU cycles taken by neuron_model functions in main loop
-        #   Note: This can be a guess
+        #   Note: This can be a guess, kept until measured on a board with the reciprocal of the
+        #   out degree which replaced the division
         return 40
 
     @overrides(AbstractContainsUnits.get_units)
@@ -0,0 +1,82 @@
+import numpy as np
+
+from pacman.model.decorators.overrides import overrides
+from spynnaker.pyNN.models.neural_properties import NeuronParameter
+from spynnaker.pyNN.models.neuron.neuron_models import AbstractNeuronModel
+from python_models8.neuron.neuron_models.neuron_model_page_rank import NeuronModelPageRank, \
+    _NEURAL_PARAMETERS
+
+# Number of iterations ranks are accumulated for, see `N_ACC_SLOTS' in the C code
+N_ACC_SLOTS = 8
+
+# Parameters held in one slot per iteration
+_SLOT_PARAMETERS = (_NEURAL_PARAMETERS.CURR_RANK_ACC_INIT, _NEURAL_PARAMETERS.CURR_RANK_COUNT_INIT)
+
+
+class NeuronModelPageRankAcc(NeuronModelPageRank):
+    """ Page Rank neuron of the page_rank_acc build, whose `neuron_t' holds\
+        N_ACC_SLOTS accumulators and counts of the ranks received, one per\
+        iteration number
+
+    The state variables `curr_rank_acc' and `curr_rank_count' initialize the\
+    slot of the first iteration, the other slots being set to 0.
+    """
+
+    # Slots of the state variables, as (N_ACC_SLOTS x n_neurons) arrays whose rows are the
+    # parameters written to / read back from the machine
+    @property
+    def _curr_rank_acc_init(self):
+        return self._curr_rank_acc_slots[0]
+
+    @_curr_rank_acc_init.setter
+    def _curr_rank_acc_init(self, curr_rank_acc):
+        self._curr_rank_acc_slots = self._slots_init(curr_rank_acc)
+
+    @property
+    def _curr_rank_count_init(self):
+        return self._curr_rank_count_slots[0]
+
+    @_curr_rank_count_init.setter
+    def _curr_rank_count_init(self, curr_rank_count):
+        self._curr_rank_count_slots = self._slots_init(curr_rank_count)
+
+    def _slots_init(self, state_var):
+        slots = np.zeros((N_ACC_SLOTS, self._n_neurons))
+        slots[0] = state_var
+        return slots
+
+    def _get_neural_parameter_values(self):
+        """ Values of the parameters, in the order of the `neuron_t' in the C\
+            code, each slot being a parameter
+
+        :return: list of (values, data type)
+        """
+        values = []
+        for item in _NEURAL_PARAMETERS:
+            name = '_' + item.name.lower()
+            if item in _SLOT_PARAMETERS:
+                slots = getattr(self, name[:-len('_init')] + '_slots')
+                values.extend((slot, item.data_type) for slot in slots)
+            else:
+                values.append((getattr(self, name), item.data_type))
+        return values
+
+    @overrides(AbstractNeuronModel.get_n_neural_parameters)
+    def get_n_neural_parameters(self):
+        return len(_NEURAL_PARAMETERS) + len(_SLOT_PARAMETERS) * (N_ACC_SLOTS - 1)
+
+    @overrides(AbstractNeuronModel.get_neural_parameters)
+    def get_neural_parameters(self):
+        return [NeuronParameter(values, data_type)
+                for values, data_type in self._get_neural_parameter_values()]
+
+    @overrides(AbstractNeuronModel.get_neural_parameter_types)
+    def get_neural_parameter_types(self):
+        return [data_type for _, data_type in self._get_neural_parameter_values()]
+
+    @staticmethod
+    def get_neural_parameters_size():
+        """ Size of the `neuron_t' in C code, in bytes
+        """
+        return NeuronModelPageRank.get_neural_parameters_size() + sum(
+            item.data_type.size for item in _SLOT_PARAMETERS) * (N_ACC_SLOTS - 1)
@@ -0,0 +1,30 @@
+""" U0.32 fixed-point numbers, as encoded by sPyNNaker for DataType.U032:\
+    shared by the model and its host emulator, so only needs numpy
+"""
+import numpy as np
+
+U032_MAX = 2**32 - 1
+
+
+def to_u032(value):
+    """ Encodes values in [0, 1] as U0.32 numbers, rounded to the nearest\
+        and saturating to the largest U0.32 number
+
+    :return: uint64 array of the raw U0.32 values
+    """
+    raw = np.round(np.asarray(value, dtype=np.float64) * 2**32)
+    return np.minimum(raw, U032_MAX).astype(np.uint64)
+
+
+def get_reciprocals(counts):
+    """ U0.32 reciprocals of counts, rounded to the nearest: 1 / 1 saturates\
+        to the largest U0.32 number, and 1 / 0 is 0
+
+    :return: uint64 array of the raw U0.32 values
+    """
+    counts = np.asarray(counts, dtype=np.uint64)
+    divisors = np.maximum(counts, np.uint64(1))
+    reciprocals = (np.uint64(2**32) + divisors // np.uint64(2)) // divisors
+    return np.where(
+        counts > 0, np.minimum(reciprocals, np.uint64(U032_MAX)),
+        0).astype(np.uint64)
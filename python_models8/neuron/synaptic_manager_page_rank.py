@@ -0,0 +1,165 @@
+import numpy
+
+from spynnaker.pyNN.models.neural_projections import ProjectionApplicationEdge
+from spynnaker.pyNN.models.neural_projections.connectors \
+    import AbstractConnector
+from spynnaker.pyNN.models.neuron.synapse_dynamics \
+    import AbstractStaticSynapseDynamics
+from spynnaker.pyNN.models.neuron.synaptic_manager import SynapticManager
+from python_models8.connectors.edge_list_codec import \
+    COMPRESSED_MATRIX_FLAG, N_MATRIX_HEADER_WORDS, N_ROW_HEADER_WORDS
+from python_models8.connectors.my_connector import MyConnector
+
+
+class SynapticManagerPageRank(SynapticManager):
+    """ Synaptic manager shipping the edges of MyConnector projections as
+    compressed edge lists, from which the cores generate their synaptic rows
+    in synapses_initialise (see c_models/src/neuron/edge_list.h), rather
+    than the rows themselves
+
+    The synaptic matrix region is reserved, and the master population table
+    written, as for the rows: only the data loaded into the region shrinks.
+    The rows are written by the host as usual when a projection to the
+    vertex cannot be generated on the machine (other connectors, plastic or
+    delayed synapses, connections read before the run) or the compressed
+    edge lists would not fit in the region.
+    """
+
+    def _get_generated_synapse_information(
+            self, in_edges, graph_mapper, machine_time_step):
+        """ Get the projections of the in_edges, if all of them can be\
+            generated on the machine
+
+        :return: list of (machine edge, application edge, synapse\
+            information), or None
+        """
+        max_delay = self._synapse_io.get_maximum_delay_supported_in_ms(
+            machine_time_step)
+        projections = list()
+        for m_edge in in_edges:
+            app_edge = graph_mapper.get_application_edge(m_edge)
+            if not isinstance(app_edge, ProjectionApplicationEdge):
+                continue
+            for synapse_info in app_edge.synapse_information:
+                connector = synapse_info.connector
+                if (not isinstance(connector, MyConnector) or
+                        not connector.generate_on_machine() or
+                        not isinstance(synapse_info.synapse_dynamics,
+                                       AbstractStaticSynapseDynamics) or
+                        app_edge.delay_edge is not None or
+                        (max_delay is not None and
+                         connector.get_delay_maximum() > max_delay) or
+                        (app_edge, synapse_info) in
+                        self._pre_run_connection_holders):
+                    return None
+                projections.append((m_edge, app_edge, synapse_info))
+        return projections
+
+    @staticmethod
+    def _get_controls(synapse_info, post_vertex_slice, n_synapse_types,
+                      weight_scales, machine_time_step):
+        """ Get the bits of the synaptic words other than the target, of the\
+            unpinned and pinned rows, as the synapse dynamics encode them
+        """
+        connector = synapse_info.connector
+        connections = numpy.zeros(
+            2, dtype=AbstractConnector.NUMPY_SYNAPSES_DTYPE)
+        connections["target"] = post_vertex_slice.lo_atom
+        connections["weight"] = numpy.array(connector.get_row_weights()) * \
+            weight_scales[synapse_info.synapse_type]
+        connections["delay"] = numpy.rint(
+            connector.get_delay_maximum() * (1000.0 / machine_time_step))
+        connections["synapse_type"] = synapse_info.synapse_type
+        ff_data, _ = synapse_info.synapse_dynamics.get_static_synaptic_data(
+            connections, numpy.arange(2), 2, post_vertex_slice,
+            n_synapse_types)
+        return ff_data[0][0], ff_data[1][0]
+
+    def _write_synaptic_matrix_and_master_population_table(
+            self, spec, post_slices, post_slice_index, machine_vertex,
+            post_vertex_slice, all_syn_block_sz, weight_scales,
+            master_pop_table_region, synaptic_matrix_region, routing_info,
+            graph_mapper, machine_graph, machine_time_step):
+        """ Simultaneously generates both the master population table and\
+            the compressed edge lists of the synaptic matrix
+        """
+        in_edges = machine_graph.get_edges_ending_at_vertex(machine_vertex)
+        projections = self._get_generated_synapse_information(
+            in_edges, graph_mapper, machine_time_step)
+        if projections is None:
+            return SynapticManager.\
+                _write_synaptic_matrix_and_master_population_table(
+                    self, spec, post_slices, post_slice_index, machine_vertex,
+                    post_vertex_slice, all_syn_block_sz, weight_scales,
+                    master_pop_table_region, synaptic_matrix_region,
+                    routing_info, graph_mapper, machine_graph,
+                    machine_time_step)
+
+        # Lay the rows out as sPyNNaker would, but keep their edge lists
+        n_synapse_types = self._synapse_type.get_n_synapse_types()
+        next_block_start_address = 0
+        blocks = list()
+        table_entries = list()
+        for m_edge, app_edge, synapse_info in projections:
+            pre_vertex_slice = graph_mapper.get_slice(m_edge.pre_vertex)
+            pre_slices = graph_mapper.get_slices(app_edge.pre_vertex)
+            pre_slice_idx = graph_mapper.get_machine_vertex_index(
+                m_edge.pre_vertex)
+            connector = synapse_info.connector
+            rinfo = routing_info.get_routing_info_for_edge(m_edge)
+
+            max_row_length = \
+                connector.get_n_connections_from_pre_vertex_maximum(
+                    pre_slices, pre_slice_idx, post_slices, post_slice_index,
+                    pre_vertex_slice, post_vertex_slice)
+            if max_row_length > 0:
+                row_length = self._poptable_type.get_allowed_row_length(
+                    max_row_length)
+                next_block_start_address = self._poptable_type\
+                    .get_next_allowed_address(next_block_start_address)
+                blocks.append(connector.get_compressed_edges(
+                    pre_vertex_slice, post_vertex_slice,
+                    next_block_start_address, row_length,
+                    self._get_controls(
+                        synapse_info, post_vertex_slice, n_synapse_types,
+                        weight_scales, machine_time_step)))
+                table_entries.append((
+                    next_block_start_address, row_length,
+                    rinfo.first_key_and_mask))
+                next_block_start_address += pre_vertex_slice.n_atoms * (
+                    N_ROW_HEADER_WORDS + row_length) * 4
+            elif rinfo is not None:
+                table_entries.append((0, 0, rinfo.first_key_and_mask))
+
+            if next_block_start_address > all_syn_block_sz:
+                raise Exception(
+                    "Too much synaptic memory has been written:"
+                    " {} of {} ".format(
+                        next_block_start_address, all_syn_block_sz))
+
+        n_words = N_MATRIX_HEADER_WORDS + sum(len(block) for block in blocks)
+        if n_words * 4 > all_syn_block_sz:
+            return SynapticManager.\
+                _write_synaptic_matrix_and_master_population_table(
+                    self, spec, post_slices, post_slice_index, machine_vertex,
+                    post_vertex_slice, all_syn_block_sz, weight_scales,
+                    master_pop_table_region, synaptic_matrix_region,
+                    routing_info, graph_mapper, machine_graph,
+                    machine_time_step)
+
+        spec.comment(
+            "\nWriting Compressed Synaptic Matrix and Master Population "
+            "Table:\n")
+        self._poptable_type.initialise_table(spec, master_pop_table_region)
+        for address, row_length, key_and_mask in table_entries:
+            self._poptable_type.update_master_population_table(
+                spec, address, row_length, key_and_mask,
+                master_pop_table_region)
+        self._poptable_type.finish_master_pop_table(
+            spec, master_pop_table_region)
+
+        spec.switch_write_focus(synaptic_matrix_region)
+        spec.write_value(next_block_start_address | COMPRESSED_MATRIX_FLAG)
+        spec.write_value(len(blocks))
+        for block in blocks:
+            spec.write_array(block)
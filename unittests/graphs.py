@@ -0,0 +1,18 @@
+import numpy as np
+
+
+def random_graph(n_vertices, n_edges, seed=0, power_law=True):
+    """A ring, so that no vertex is dangling, plus edges towards power-law distributed targets, or
+    uniformly distributed ones.
+
+    :return: (<np.array> sources, <np.array> targets), without duplicate edges
+    """
+    rng = np.random.RandomState(seed)
+    src = np.r_[np.arange(n_vertices), rng.randint(0, n_vertices, n_edges - n_vertices)]
+    if power_law:
+        targets = np.minimum(rng.pareto(1., n_edges - n_vertices), n_vertices - 1).astype(np.int64)
+    else:
+        targets = rng.randint(0, n_vertices, n_edges - n_vertices)
+    tgt = np.r_[(np.arange(n_vertices) + 1) % n_vertices, targets]
+    keys = np.unique(src * n_vertices + tgt)
+    return keys // n_vertices, keys % n_vertices
@@ -0,0 +1,97 @@
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from python_models8.connectors.edge_list_codec import (
+    COMPRESSED_MATRIX_FLAG, N_ROW_HEADER_WORDS, _decode_varints, _encode_varints, decode_edges,
+    encode_edges, expand_edges, expand_matrix)
+from unittests.graphs import random_graph
+
+Slice = namedtuple('Slice', ['lo_atom', 'n_atoms'])
+
+N_VERTICES = 1000
+N_EDGES = 20000
+ATOMS_PER_CORE = 256
+SLICES = [Slice(lo, min(ATOMS_PER_CORE, N_VERTICES - lo))
+          for lo in range(0, N_VERTICES, ATOMS_PER_CORE)]
+CONTROLS = (1 << 9, (100 << 16) | (1 << 9))
+
+
+def _get_edges(pre_vertex_slice, post_vertex_slice, seed=0):
+    src, tgt = random_graph(N_VERTICES, N_EDGES, seed)
+    pairs = np.unique(src.astype('int64') * N_VERTICES + tgt)
+    src, tgt = pairs // N_VERTICES, pairs % N_VERTICES
+    in_block = ((src >= pre_vertex_slice.lo_atom) &
+                (src < pre_vertex_slice.lo_atom + pre_vertex_slice.n_atoms) &
+                (tgt >= post_vertex_slice.lo_atom) &
+                (tgt < post_vertex_slice.lo_atom + post_vertex_slice.n_atoms))
+    src, tgt = src[in_block], tgt[in_block]
+    return src, tgt, src % 3 == 0
+
+
+def _get_rows(src, tgt, pinned, pre_vertex_slice, post_vertex_slice, row_length):
+    """ The rows sPyNNaker writes for static synapses """
+    rows = np.zeros((pre_vertex_slice.n_atoms, N_ROW_HEADER_WORDS + row_length), 'uint32')
+    for row in range(pre_vertex_slice.n_atoms):
+        in_row = src == pre_vertex_slice.lo_atom + row
+        targets = np.sort(tgt[in_row]) - post_vertex_slice.lo_atom
+        rows[row, 1] = len(targets)
+        rows[row, N_ROW_HEADER_WORDS:N_ROW_HEADER_WORDS + len(targets)] = \
+            CONTROLS[int(pinned[in_row].any())] | targets
+    return rows.ravel()
+
+
+def test_varints_round_trip():
+    values = np.array([0, 1, 127, 128, 16383, 16384, 2**21, 2**28 - 1, 2**28, 2**32 - 1],
+                      dtype='uint32')
+    stream = _encode_varints(values)
+    assert len(stream) == 1 + 1 + 1 + 2 + 2 + 3 + 4 + 4 + 5 + 5
+    assert _decode_varints(np.append(stream, [0, 0])).tolist() == values.tolist() + [0, 0]
+
+
+@pytest.mark.parametrize('pre', range(len(SLICES)))
+@pytest.mark.parametrize('post', range(len(SLICES)))
+def test_edges_round_trip(pre, post):
+    src, tgt, pinned = _get_edges(SLICES[pre], SLICES[post])
+    order = np.random.RandomState(pre).permutation(len(src))
+    block = encode_edges(src[order], tgt[order], pinned[order], SLICES[pre], SLICES[post])
+
+    assert block[0] == len(block)
+    assert block[2] == SLICES[pre].n_atoms
+    assert block[3] == np.bincount(src - SLICES[pre].lo_atom).max()
+    sources, targets, is_pinned = decode_edges(block, SLICES[pre], SLICES[post])
+    assert sources.tolist() == src.tolist()
+    assert targets.tolist() == tgt.tolist()
+    assert is_pinned.tolist() == pinned.tolist()
+
+
+def test_blocks_expand_into_the_rows_written_by_the_host():
+    post = SLICES[1]
+    region = [0, 0]
+    expected = [0]
+    for pre in SLICES:
+        src, tgt, pinned = _get_edges(pre, post, seed=1)
+        row_length = np.bincount(src - pre.lo_atom).max() + 1
+        rows = _get_rows(src, tgt, pinned, pre, post, row_length)
+
+        block = encode_edges(src, tgt, pinned, pre, post, 4 * (len(expected) - 1), row_length,
+                             CONTROLS)
+        assert len(block) < len(rows) / 8
+        assert expand_edges(block).tolist() == rows.tolist()
+        region[1] += 1
+        region.extend(block)
+        expected.extend(rows)
+
+    # Sizes of the indirect and the empty direct matrix
+    region[0] = COMPRESSED_MATRIX_FLAG | 4 * (len(expected) - 1)
+    expected[0] = 4 * (len(expected) - 1)
+    expected.append(0)
+    assert expand_matrix(region).tolist() == expected
+
+
+def test_rows_must_hold_their_targets():
+    src, tgt, pinned = _get_edges(SLICES[0], SLICES[0])
+    row_length = np.bincount(src).max()
+    with pytest.raises(ValueError):
+        encode_edges(src, tgt, pinned, SLICES[0], SLICES[0], row_length=row_length - 1)
@@ -0,0 +1,146 @@
+import logging
+
+import numpy as np
+import pytest
+
+from examples.emulator import (
+    PageRankEmulator, PageRankEmulatorMP, _Packets, _RingBuffer, get_max_atoms_per_core)
+from examples.page_rank import PageRankSimulation, TOL
+from unittests.graphs import random_graph
+
+N_VERTICES = 200
+N_EDGES = 1000
+RUN_TIME = 3.  # ms, 30 time steps
+TIME_SCALE_FACTOR = 100
+ATOMS_PER_CORE = 40  # 5 cores
+CORES_PER_CHIP = 2  # on 3 chips
+
+OPTIONS = [
+    {},
+    {'accumulators': True},
+    {'row_cache_size': 1024},
+    {'event_driven': True},
+    {'accumulators': True, 'row_cache_size': 1024, 'event_driven': True},
+]
+
+
+def _emulate(emulator_cls, options, **kwargs):
+    """Runs an emulation of the graph, next to the simulation which computes its reference ranks.
+
+    :return: (PageRankSimulation, <np.array> decoded ranks, <np.array> decoded rank changes,
+              <dict> provenance)
+    """
+    src, tgt = random_graph(N_VERTICES, N_EDGES)
+    sim = PageRankSimulation.from_arrays(RUN_TIME, src, tgt, N_VERTICES, backend='emulator',
+                                         log_level=logging.WARNING, **options)
+    emulator = emulator_cls(
+        N_VERTICES, src, tgt, sim._get_damping_factor(), sim._get_damping_sum(),
+        time_scale_factor=TIME_SCALE_FACTOR, max_atoms_per_core=ATOMS_PER_CORE,
+        cores_per_chip=CORES_PER_CHIP, seed=0, **dict(options, **kwargs))
+    try:
+        emulator.run(RUN_TIME)
+        # U0.32 ranks, read back as S16.15 numbers
+        ranks, deltas = emulator.get_ranks() / 2.**17, emulator.get_deltas() / 2.**17
+        provenance = emulator.get_provenance()
+    finally:
+        emulator.end()
+    return sim, ranks, deltas, provenance
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+@pytest.mark.parametrize('emulator_cls, kwargs', [
+    (PageRankEmulator, {}),
+    (PageRankEmulatorMP, {'n_workers': 2}),
+])
+def test_ranks_match_power_iteration(emulator_cls, kwargs, options):
+    sim, ranks, deltas, provenance = _emulate(emulator_cls, options, **kwargs)
+    expected_ranks, it = sim._power_iterate(100)
+
+    assert provenance['cores'] == N_VERTICES // ATOMS_PER_CORE
+    assert provenance['chips'] == 3
+    assert provenance['packets_dropped'] == 0
+    if options.get('row_cache_size'):
+        assert provenance['row_cache_hits'] > 0
+    if options.get('event_driven'):
+        assert provenance['iterations_min'] > provenance['time_steps']
+        assert sim._matches_reference(ranks[-1], expected_ranks)
+    else:
+        # Same iterations as the reference, one per time step
+        convergence = np.flatnonzero(deltas[1:].sum(axis=1) < N_VERTICES * TOL)[0] + 1
+        assert convergence == it
+        assert np.allclose(ranks[convergence], expected_ranks, atol=TOL)
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_multiprocessing_matches_single_process(options):
+    _, ranks, deltas, provenance = _emulate(PageRankEmulator, options)
+    _, mp_ranks, mp_deltas, mp_provenance = _emulate(PageRankEmulatorMP, options, n_workers=3)
+
+    assert np.array_equal(ranks, mp_ranks)
+    assert np.array_equal(deltas, mp_deltas)
+    for key in ('packets_sent', 'packets_processed', 'row_cache_hits', 'iterations_min',
+                'iterations_max'):
+        assert provenance[key] == mp_provenance[key]
+
+
+def test_ring_buffer_round_trip():
+    row_core = np.array([0, 0, 1, 2], dtype=np.int64)
+    packets = _Packets(
+        core=row_core, slot=np.array([0, 1, 7, 3]), row=np.arange(4),
+        payload=np.array([0, 8, 2**32 - 8, 2**31], dtype=np.uint64),
+        arrival=np.array([10, 20, 30, 2**40]))
+    ring = _RingBuffer(6)
+
+    for _ in range(3):  # wraps around
+        ring.write(packets[:3])
+        read = ring.read(row_core)
+        for name in ('core', 'slot', 'row', 'payload', 'arrival'):
+            assert np.array_equal(getattr(read, name), getattr(packets[:3], name))
+        assert np.all(read.ready == -1)
+
+    ring.write(packets)
+    with pytest.raises(RuntimeError):
+        ring.write(packets)
+
+
+@pytest.mark.parametrize('accumulators', [False, True])
+def test_master_population_table_limits_atoms_per_core(accumulators):
+    # Synaptic words index 256 neurons per core
+    n_atoms = get_max_atoms_per_core(accumulators=accumulators)
+    assert n_atoms == 256
+    assert get_max_atoms_per_core(accumulators=accumulators, n_neurons=n_atoms) == n_atoms
+
+    # Larger populations have more slices, until no neuron fits next to their table
+    sizes = [get_max_atoms_per_core(accumulators=accumulators, row_cache_size=8192, n_neurons=n)
+             for n in (10**4, 10**5, 10**6)]
+    assert n_atoms >= sizes[0] >= sizes[1] >= sizes[2] == 0
+    assert get_max_atoms_per_core(accumulators=accumulators, n_neurons=10**5) > 0
+    with pytest.raises(ValueError):
+        PageRankEmulator(10**6, np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), .85,
+                         .15, accumulators=accumulators)
+    with pytest.raises(ValueError):
+        PageRankEmulator(1000, np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), .85,
+                         .15, max_atoms_per_core=257, accumulators=accumulators)
+
+
+def test_large_graph_ranks_match_power_iterations():
+    # Sized by the DTCM budget of the default build, in slices of 256 neurons
+    n_vertices = 10**5
+    src, tgt = random_graph(n_vertices, 5 * n_vertices, power_law=False)
+    sim = PageRankSimulation.from_arrays(1., src, tgt, n_vertices, backend='emulator',
+                                         log_level=logging.WARNING)
+    emulator = PageRankEmulator(n_vertices, src, tgt, sim._get_damping_factor(),
+                                sim._get_damping_sum(), time_scale_factor=1000, seed=0)
+    try:
+        emulator.run(1.)
+        ranks = emulator.get_ranks() / 2.**17
+        provenance = emulator.get_provenance()
+    finally:
+        emulator.end()
+
+    assert provenance['cores'] == -(-n_vertices // 256)
+    assert provenance['packets_dropped'] == 0
+    assert provenance['iterations_min'] == provenance['time_steps'] - 1
+    # Ranks of 1 / N, off by a few U0.32 truncations
+    for it, (expected_ranks, _) in zip(range(1, len(ranks)), sim._iter_power()):
+        assert np.allclose(ranks[it], expected_ranks.toFloat(), rtol=0, atol=TOL / 100)
@@ -0,0 +1,73 @@
+import operator
+
+import numpy as np
+import pytest
+
+from examples.fixed_point import FXarray, FXfamily, FXnum, FXoverflowError
+
+N_VALUES = 200
+
+# Family, with the largest magnitude of the left operands and the range of magnitudes of the right
+# ones, such that results fit in the family and in int64 scaled values
+FAMILIES = [
+    (FXfamily(12, 4), 2., (1., 2.)),
+    (FXfamily(32), 4., (.5, 4.)),
+    (FXfamily(48), 4., (.5, 4.)),
+    (FXfamily(64), .05, (.2, .45)),
+]
+
+
+def _operands(fam, a_max, b_range, seed=0):
+    """:return: (FXarray, FXarray) random operands, plus the smallest and rounding-tie values"""
+    rng = np.random.RandomState(seed)
+    a = rng.uniform(-a_max, a_max, N_VALUES)
+    b = rng.uniform(*b_range, size=N_VALUES) * rng.choice([-1, 1], N_VALUES)
+    a = FXarray(a, fam)
+    a[:4] = FXarray(family=fam, scaled_value=[0, 1, -1, 3])
+    return a, FXarray(b, fam)
+
+
+def _fxnums(arr):
+    return [FXnum(family=arr.family, scaled_value=int(sv)) for sv in arr.scaledval]
+
+
+@pytest.mark.parametrize('op', [operator.add, operator.sub, operator.mul, operator.truediv])
+@pytest.mark.parametrize('fam, a_max, b_range', FAMILIES)
+def test_binary_operations_match_fxnum(op, fam, a_max, b_range):
+    a, b = _operands(fam, a_max, b_range)
+    expected = [op(x, y).scaledval for x, y in zip(_fxnums(a), _fxnums(b))]
+    assert op(a, b).scaledval.tolist() == expected
+
+    # With an FXnum operand, on either side
+    y = _fxnums(b)[-1]
+    assert op(a, y).scaledval.tolist() == [op(x, y).scaledval for x in _fxnums(a)]
+    x = _fxnums(a)[-1]
+    assert op(x, b).scaledval.tolist() == [op(x, y).scaledval for y in _fxnums(b)]
+
+
+@pytest.mark.parametrize('fam, a_max, b_range', FAMILIES)
+def test_rounding_matches_fxnum(fam, a_max, b_range):
+    values = np.random.RandomState(1).uniform(-a_max, a_max, N_VALUES)
+    assert FXarray(values, fam).scaledval.tolist() == [FXnum(v, fam).scaledval for v in values]
+    small = values / N_VALUES  # whose sum fits in the family
+    assert FXarray(small, fam).sum().scaledval == sum(FXnum(v, fam) for v in small).scaledval
+
+    # Conversions between families, with more or fewer fraction bits
+    for other in (FXfamily(16), FXfamily(40)):
+        a = FXarray(values, other)
+        assert FXarray(a, fam).scaledval.tolist() == [FXnum(x, fam).scaledval for x in a]
+
+
+def test_overflows_raise():
+    with pytest.raises(FXoverflowError):
+        FXarray([1.], FXfamily(64))  # scaled value does not fit in int64
+    with pytest.raises(FXoverflowError):
+        FXarray([2**40], FXfamily(32))
+    with pytest.raises(FXoverflowError):
+        FXarray([1.], FXfamily(32)) << 40
+    with pytest.raises(FXoverflowError):
+        FXarray([1.5], FXfamily(12, 4)) * 6  # out of the range of the family
+    with pytest.raises(FXoverflowError):
+        FXarray([-7.5], FXfamily(12, 4)) - 1
+    with pytest.raises(ZeroDivisionError):
+        FXarray([1.], FXfamily(32)) / 0
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from examples.graph_cache import GraphCache
+from unittests.graphs import random_graph
+
+N_VERTICES = 200
+N_EDGES = 1000
+
+
+@pytest.fixture
+def cache_dir(tmpdir):
+    return str(tmpdir.join('cache'))
+
+
+@pytest.fixture
+def cache(cache_dir):
+    return GraphCache(cache_dir)
+
+
+def test_get_key_ignores_the_order_and_duplicates_of_edges():
+    src, tgt = random_graph(N_VERTICES, N_EDGES)
+    key = GraphCache.get_key(src, tgt, N_VERTICES)
+
+    order = np.random.RandomState(1).permutation(len(src))
+    assert GraphCache.get_key(src[order], tgt[order], N_VERTICES) == key
+    assert GraphCache.get_key(np.append(src, src[:5]), np.append(tgt, tgt[:5]),
+                              N_VERTICES) == key
+
+    # Different graphs, or numbers of vertices
+    assert GraphCache.get_key(tgt, src, N_VERTICES) != key
+    assert GraphCache.get_key(src[1:], tgt[1:], N_VERTICES) != key
+    assert GraphCache.get_key(src, tgt, N_VERTICES + 1) != key
+
+
+def test_store_load_round_trip(cache):
+    src, tgt = random_graph(N_VERTICES, N_EDGES)
+    order = np.random.RandomState(1).permutation(len(src))
+    key = cache.store(src[order], tgt[order], N_VERTICES)
+
+    assert key == GraphCache.get_key(src, tgt, N_VERTICES)
+    assert key in cache
+    assert cache.store(src, tgt, N_VERTICES) == key  # already cached
+
+    graph = cache.load(key)
+    assert graph.n_vertices == N_VERTICES
+    assert list(graph.labels) == list(range(N_VERTICES))
+    edges = np.column_stack((src, tgt))
+    assert np.array_equal(graph.edges, edges[np.lexsort((tgt, src))])
+    assert np.array_equal(graph.in_degrees, np.bincount(tgt, minlength=N_VERTICES))
+    assert np.array_equal(graph.out_degrees, np.bincount(src, minlength=N_VERTICES))
+
+    # CSR arrays, of the edges by source and of the transition matrix by target
+    for v in range(N_VERTICES):
+        out_edges = graph.edges[graph.indptr[v]:graph.indptr[v + 1]]
+        assert np.all(out_edges[:, 0] == v)
+        in_neighbours = graph.matrix_indices[graph.matrix_indptr[v]:graph.matrix_indptr[v + 1]]
+        assert in_neighbours.tolist() == sorted(src[tgt == v].tolist())
+
+
+def test_labels_round_trip(cache):
+    src, tgt = random_graph(N_VERTICES, N_EDGES)
+    labels = ['v%d' % v for v in range(N_VERTICES)]
+    key = cache.store(src, tgt, N_VERTICES, labels=labels)
+
+    assert list(cache.load(key).labels) == labels
+
+
+def test_ranks_round_trip(cache, cache_dir):
+    src, tgt = random_graph(N_VERTICES, N_EDGES)
+    key = cache.store(src, tgt, N_VERTICES)
+    ranks = np.random.RandomState(1).uniform(size=N_VERTICES)
+
+    assert cache.get_ranks(key, .85) is None
+    cache.store_ranks(key, .85, ranks, 12)
+    cached_ranks, iterations = cache.get_ranks(key, .85)
+    assert np.array_equal(cached_ranks, ranks)
+    assert iterations == 12
+
+    # Kept by damping factor, and by graph
+    assert cache.get_ranks(key, .9) is None
+    other_key = cache.store(tgt, src, N_VERTICES)
+    assert cache.get_ranks(other_key, .85) is None
+
+    # Persisted
+    assert GraphCache(cache_dir).get_ranks(key, .85)[1] == 12
+
+
+def test_load_missing_graph_raises(cache):
+    with pytest.raises(KeyError):
+        cache.load('0' * 40)
@@ -0,0 +1,129 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from examples.graph_loaders import LabelInterner, load_graph
+from unittests.graphs import random_graph
+
+N_VERTICES = 200
+N_EDGES = 1000
+CHUNK_BYTES = 2**10  # many chunks, cut in the middle of lines
+
+
+def _edges():
+    """:return: (src, tgt) with shuffled vertex ids, so that ids differ from file order ones"""
+    src, tgt = random_graph(N_VERTICES, N_EDGES)
+    ids = np.random.RandomState(1).permutation(N_VERTICES) * 3 + 7
+    return ids[src], ids[tgt]
+
+
+def _write(path, text):
+    with (gzip.open(path, 'wb') if str(path).endswith('.gz') else open(str(path), 'wb')) as f:
+        f.write(text.encode('utf-8'))
+    return str(path)
+
+
+def _edge_set(src, tgt):
+    return set(zip(np.asarray(src).tolist(), np.asarray(tgt).tolist()))
+
+
+def _check(graph, src, tgt):
+    """Checks the loaded graph has the edges (src, tgt), ids in order of first appearance"""
+    labels = np.asarray(graph.labels)
+    file_order = np.column_stack((src, tgt)).ravel()
+    _, first = np.unique(file_order, return_index=True)
+    assert labels.tolist() == file_order[np.sort(first)].tolist()
+
+    assert graph.n_vertices == len(labels)
+    assert len(graph.src) == len(_edge_set(src, tgt))
+    assert _edge_set(labels[graph.src], labels[graph.tgt]) == _edge_set(src, tgt)
+    assert np.array_equal(graph.out_degrees, np.bincount(graph.src, minlength=graph.n_vertices))
+    assert np.array_equal(graph.in_degrees, np.bincount(graph.tgt, minlength=graph.n_vertices))
+
+
+@pytest.mark.parametrize('name, separator', [
+    ('graph.txt', ' '),
+    ('graph.tsv', '\t'),
+    ('graph.txt.gz', ' '),
+])
+def test_edgelist_round_trip(tmpdir, name, separator):
+    src, tgt = _edges()
+    text = '# Directed graph\n# FromNodeId\tToNodeId\n' + ''.join(
+        '%d%s%d%s1\n' % (s, separator, t, separator) for s, t in zip(src, tgt))
+    path = _write(tmpdir.join(name), text)
+
+    _check(load_graph(path, chunk_bytes=CHUNK_BYTES, n_threads=2), src, tgt)
+
+
+def test_edgelist_string_labels_round_trip(tmpdir):
+    src, tgt = _edges()
+    src, tgt = np.array(['v%d' % s for s in src]), np.array(['v%d' % t for t in tgt])
+    text = '% KONECT style comment\n' + ''.join('%s\t%s\n' % edge for edge in zip(src, tgt))
+    path = _write(tmpdir.join('graph.tsv'), text)
+
+    # Spills the labels table to disk
+    graph = load_graph(path, chunk_bytes=CHUNK_BYTES, max_labels_in_memory=50,
+                       spill_dir=str(tmpdir))
+    _check(graph, src, tgt)
+
+
+@pytest.mark.parametrize('name', ['graph.mtx', 'graph.mtx.gz'])
+def test_mtx_round_trip(tmpdir, name):
+    src, tgt = _edges()
+    text = '%%%%MatrixMarket matrix coordinate pattern general\n%% comment\n%d %d %d\n' % (
+        src.max(), tgt.max(), len(src)) + ''.join('%d %d\n' % edge for edge in zip(src, tgt))
+    path = _write(tmpdir.join(name), text)
+
+    _check(load_graph(path, chunk_bytes=CHUNK_BYTES), src, tgt)
+
+
+def test_symmetric_mtx_has_both_directions(tmpdir):
+    src, tgt = _edges()
+    lower = src > tgt
+    src, tgt = src[lower], tgt[lower]
+    text = '%%%%MatrixMarket matrix coordinate real symmetric\n%d %d %d\n' % (
+        N_VERTICES, N_VERTICES, len(src) + 1) + \
+        ''.join('%d %d 1.5\n' % edge for edge in zip(src, tgt)) + '7 7 1.\n'
+    path = _write(tmpdir.join('graph.mtx'), text)
+
+    graph = load_graph(path)
+    labels = np.asarray(graph.labels)
+    assert _edge_set(labels[graph.src], labels[graph.tgt]) == \
+        _edge_set(src, tgt) | _edge_set(tgt, src) | {(7, 7)}
+
+
+def test_edges_written_to_out_dir(tmpdir):
+    src, tgt = _edges()
+    path = _write(tmpdir.join('graph.txt'), ''.join('%d %d\n' % edge for edge in zip(src, tgt)))
+
+    graph = load_graph(path, chunk_bytes=CHUNK_BYTES, out_dir=str(tmpdir), dedup=False)
+    assert isinstance(graph.src, np.memmap)
+    assert tmpdir.join('src.bin').size() == len(src) * 8
+    _check(graph, src, tgt)
+
+
+def test_duplicate_edges_are_removed(tmpdir):
+    src, tgt = _edges()
+    lines = ['%d %d\n' % edge for edge in zip(src, tgt)]
+    path = _write(tmpdir.join('graph.txt'), ''.join(lines + lines[::7]))
+
+    graph = load_graph(path, chunk_bytes=CHUNK_BYTES)
+    _check(graph, src, tgt)
+    assert len(load_graph(path, dedup=False).src) == len(lines) + len(lines[::7])
+
+
+def test_unknown_format_raises(tmpdir):
+    path = _write(tmpdir.join('graph.txt'), '1 2\n')
+    with pytest.raises(ValueError):
+        load_graph(path, fmt='csv')
+
+
+def test_label_interner_ids_follow_first_appearance():
+    interner = LabelInterner()
+    try:
+        assert interner.intern([30, 10, 30]).tolist() == [0, 1, 0]
+        assert interner.intern([20, 10, 40, 20]).tolist() == [2, 1, 3, 2]
+        assert interner.get_labels().tolist() == [30, 10, 20, 40]
+    finally:
+        interner.close()
@@ -0,0 +1,84 @@
+import logging
+
+import numpy as np
+import pytest
+
+from examples.page_rank import PageRankSimulation, TOL
+from unittests.graphs import random_graph
+
+N_VERTICES = 200
+N_EDGES = 1000
+RUN_TIME = 3.  # ms, 30 time steps
+PARAMETERS = {'time_scale_factor': 100}
+
+
+def _simulation(backend='emulator', parameters=PARAMETERS, **kwargs):
+    src, tgt = random_graph(N_VERTICES, N_EDGES)
+    return PageRankSimulation.from_arrays(RUN_TIME, src, tgt, N_VERTICES, parameters=parameters,
+                                          log_level=logging.WARNING, backend=backend, **kwargs)
+
+
+def test_event_driven_ranks_match_an_iteration_past_convergence():
+    with _simulation(event_driven=True) as sim:
+        sim.run()
+        ranks, _ = sim._extract_sim_ranks()
+        expected_ranks, it = sim._compute_page_rank()
+        stats = sim.get_run_stats()
+        provenance = sim._model.get_provenance()
+
+    # Cores iterated past the convergence, more than once per time step
+    assert stats['dropped_packets'] == 0
+    assert provenance['iterations_min'] > max(it, provenance['time_steps'])
+    assert sim._matches_reference(ranks[-1], expected_ranks)
+
+    # Ranks off by more than TOL, or of iterations before the convergence, do not match
+    wrong_ranks = ranks[-1].copy()
+    wrong_ranks[0] += 2 * TOL
+    assert not sim._matches_reference(wrong_ranks, expected_ranks)
+    assert not sim._matches_reference(ranks[1], expected_ranks)
+
+
+def test_tick_driven_ranks_match_the_convergence():
+    with _simulation() as sim:
+        sim.run()
+        ranks, sim_it = sim._extract_sim_ranks()
+        expected_ranks, it = sim._compute_page_rank()
+
+    assert sim_it == it
+    assert np.allclose(ranks[-1], expected_ranks, atol=TOL)
+    assert sim._matches_reference(ranks[-1], expected_ranks)
+
+
+def test_multiprocessing_backend_matches_emulator():
+    with _simulation() as sim:
+        sim.run()
+        ranks, _ = sim._extract_sim_ranks()
+    with _simulation(backend='emulator-mp') as sim:
+        sim.run()
+        mp_ranks, _ = sim._extract_sim_ranks()
+
+    assert np.array_equal(ranks, mp_ranks)
+
+
+def test_stalled_time_steps_do_not_converge():
+    # Cores too slow to finish an iteration every time step
+    with _simulation(parameters={'time_scale_factor': 1}) as sim:
+        sim.run(early_stop=True)
+        stats = sim.get_run_stats()
+        provenance = sim._model.get_provenance()
+
+    assert provenance['iterations_min'] < provenance['time_steps']
+    assert not stats['converged']
+    assert stats['simulated_time'] == RUN_TIME
+
+
+def test_graph_shape_needs_a_neuron_per_core(monkeypatch):
+    with _simulation() as sim:
+        monkeypatch.setattr(sim, '_get_atoms_per_core', lambda: N_VERTICES)
+        shape = sim._get_graph_shape()
+        assert shape['max_core_synapses'] == shape['edges']
+        assert shape['max_core_packets'] == len(np.unique(sim._get_model_edges_arrays()[0]))
+
+        monkeypatch.setattr(sim, '_get_atoms_per_core', lambda: 0)
+        with pytest.raises(ValueError):
+            sim._get_graph_shape()
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from examples.partitioning import get_traffic_stats, partition
+from unittests.graphs import random_graph
+
+N_VERTICES = 400
+N_EDGES = 2000
+
+
+@pytest.mark.parametrize('atoms_per_core', [20, 50])
+def test_partition_reduces_the_traffic_between_cores(atoms_per_core):
+    # Clusters of vertices, shuffled
+    rng = np.random.RandomState(0)
+    cluster_src, cluster_tgt = random_graph(atoms_per_core, 4 * atoms_per_core)
+    n_clusters = N_VERTICES // atoms_per_core
+    src = np.concatenate([cluster_src + i * atoms_per_core for i in range(n_clusters)])
+    tgt = np.concatenate([cluster_tgt + i * atoms_per_core for i in range(n_clusters)])
+    shuffle = rng.permutation(N_VERTICES)
+    src, tgt = shuffle[src], shuffle[tgt]
+
+    perm, before, after = partition(src, tgt, N_VERTICES, atoms_per_core, cores_per_chip=2)
+    assert sorted(perm.tolist()) == list(range(N_VERTICES))
+    assert before == get_traffic_stats(src, tgt, N_VERTICES, None, atoms_per_core, 2)
+    assert after == get_traffic_stats(src, tgt, N_VERTICES, perm, atoms_per_core, 2)
+    assert after['remote_packets'] < before['remote_packets']
+
+
+def test_partition_falls_back_to_the_identity():
+    src, tgt = random_graph(N_VERTICES, N_EDGES)
+
+    # A single core has no traffic between cores to reduce
+    perm, before, after = partition(src, tgt, N_VERTICES, atoms_per_core=N_VERTICES + 1)
+    assert np.array_equal(perm, np.arange(N_VERTICES))
+    assert before == after
+    assert before['remote_packets'] == 0
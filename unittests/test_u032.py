@@ -0,0 +1,16 @@
+import numpy as np
+
+from python_models8.neuron.neuron_models.u032 import U032_MAX, get_reciprocals, to_u032
+
+
+def test_reciprocals_are_rounded_to_the_nearest():
+    counts = np.concatenate((np.arange(1, 1000), [2**16 - 1, 2**16, 2**31, 2**32 - 1]))
+    expected = [min((2**32 + count // 2) // count, U032_MAX) for count in counts.tolist()]
+    assert get_reciprocals(counts).tolist() == expected
+    assert get_reciprocals([0, 1, 2, 3]).tolist() == [0, U032_MAX, 2**31, 1431655765]
+
+
+def test_to_u032_rounds_and_saturates():
+    assert to_u032([0., .5, 1., 2.**-33, 3 * 2.**-33]).tolist() == [0, 2**31, U032_MAX, 0, 2]
+    assert np.array_equal(to_u032(get_reciprocals(np.arange(1, 100)) / 2.**32),
+                          get_reciprocals(np.arange(1, 100)))